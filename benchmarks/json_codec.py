@@ -0,0 +1,605 @@
+"""
+Compares the generated JSON serializers with a DOM-based approach
+(parse into a tree of values, then copy the values into the DTOs):
+python -m benchmarks.json_codec [--lines 20] [--iterations 20000]
+
+Both variants are compiled with g++ -O2 into a single binary, which
+checks that they decode the same document equally before timing.
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import tempfile
+from typing import Optional
+
+from codegen.emitter.cpp import CppEmitter, EmitterOptions
+from codegen.emitter.templates import Template
+from codegen.parser.linker import Linker
+from codegen.parser.parser import Parser
+
+
+SCHEMA = {
+    'definitions': {
+        'Status': {
+            'type': 'string',
+            'enum': ['new', 'paid', 'shipped', 'cancelled'],
+        },
+        'OrderLine': {
+            'type': 'object',
+            'properties': {
+                'sku': {'type': 'string'},
+                'quantity': {'type': 'int', 'format': 'int32'},
+                'price': {'type': 'number', 'format': 'double'},
+                'tags': {'type': 'array', 'items': {'type': 'string'}},
+            },
+            'required': ['sku', 'quantity', 'price'],
+        },
+        'Order': {
+            'type': 'object',
+            'properties': {
+                'id': {'type': 'int', 'format': 'int64'},
+                'customer': {'type': 'string'},
+                'status': '#Status',
+                'lines': {'type': 'array', 'items': '#OrderLine'},
+                'note': {'type': 'string'},
+                'express': {'type': 'bool'},
+            },
+            'required': ['id', 'customer', 'status', 'lines'],
+        },
+    },
+}
+
+BENCHMARK = Template('''\
+#include <chrono>
+#include <cstdio>
+#include <cstring>
+#include <map>
+#include <string>
+#include <type_traits>
+#include <vector>
+
+#include "models.h"
+
+namespace dom {
+
+struct Value {
+    enum Kind { kNull, kBool, kNumber, kString, kArray, kObject };
+
+    Kind kind = kNull;
+    bool boolean = false;
+    double number = 0;
+    std::string string;
+    std::vector<Value> array;
+    std::map<std::string, Value> object;
+
+    const Value* Find(const std::string& key) const {
+        auto it = object.find(key);
+        return it == object.end() ? nullptr : &it->second;
+    }
+};
+
+class Parser {
+public:
+    explicit Parser(const std::string& text) : p_(text.c_str()) {}
+
+    bool Parse(Value& value) {
+        if (!ParseValue(value)) {
+            return false;
+        }
+        SkipWhitespace();
+        return *p_ == '\\0';
+    }
+
+private:
+    void SkipWhitespace() {
+        while (*p_ == ' ' || *p_ == '\\n' || *p_ == '\\r' || *p_ == '\\t') {
+            ++p_;
+        }
+    }
+
+    bool ParseValue(Value& value) {
+        SkipWhitespace();
+        switch (*p_) {
+            case '{': return ParseObject(value);
+            case '[': return ParseArray(value);
+            case '"':
+                value.kind = Value::kString;
+                return ParseString(value.string);
+            case 't': return ParseLiteral("true", Value::kBool, true, value);
+            case 'f': return ParseLiteral("false", Value::kBool, false, value);
+            case 'n': return ParseLiteral("null", Value::kNull, false, value);
+            default: return ParseNumber(value);
+        }
+    }
+
+    bool ParseLiteral(
+        const char* text, Value::Kind kind, bool boolean, Value& value) {
+        std::size_t size = std::strlen(text);
+        if (std::strncmp(p_, text, size) != 0) {
+            return false;
+        }
+        p_ += size;
+        value.kind = kind;
+        value.boolean = boolean;
+        return true;
+    }
+
+    bool ParseNumber(Value& value) {
+        char* end = nullptr;
+        value.number = std::strtod(p_, &end);
+        if (end == p_) {
+            return false;
+        }
+        p_ = end;
+        value.kind = Value::kNumber;
+        return true;
+    }
+
+    // the document has no \\u escapes
+    bool ParseString(std::string& out) {
+        ++p_;
+        out.clear();
+        while (*p_ != '"') {
+            if (*p_ == '\\0') {
+                return false;
+            }
+            if (*p_ != '\\\\') {
+                out.push_back(*p_++);
+                continue;
+            }
+            switch (*++p_) {
+                case '\\0': return false;
+                case 'n': out.push_back('\\n'); break;
+                case 'r': out.push_back('\\r'); break;
+                case 't': out.push_back('\\t'); break;
+                default: out.push_back(*p_);
+            }
+            ++p_;
+        }
+        ++p_;
+        return true;
+    }
+
+    bool ParseArray(Value& value) {
+        ++p_;
+        value.kind = Value::kArray;
+        SkipWhitespace();
+        if (*p_ == ']') {
+            ++p_;
+            return true;
+        }
+        while (ParseValue(value.array.emplace_back())) {
+            SkipWhitespace();
+            if (*p_ == ']') {
+                ++p_;
+                return true;
+            }
+            if (*p_++ != ',') {
+                return false;
+            }
+        }
+        return false;
+    }
+
+    bool ParseObject(Value& value) {
+        ++p_;
+        value.kind = Value::kObject;
+        SkipWhitespace();
+        if (*p_ == '}') {
+            ++p_;
+            return true;
+        }
+        std::string key;
+        while (true) {
+            SkipWhitespace();
+            if (*p_ != '"' || !ParseString(key)) {
+                return false;
+            }
+            SkipWhitespace();
+            if (*p_++ != ':' || !ParseValue(value.object[key])) {
+                return false;
+            }
+            SkipWhitespace();
+            if (*p_ == '}') {
+                ++p_;
+                return true;
+            }
+            if (*p_++ != ',') {
+                return false;
+            }
+        }
+    }
+
+    const char* p_;
+};
+
+void DumpString(const std::string& value, std::string& out) {
+    out.push_back('"');
+    for (char c : value) {
+        switch (c) {
+            case '"': out += "\\\\\\""; break;
+            case '\\\\': out += "\\\\\\\\"; break;
+            case '\\n': out += "\\\\n"; break;
+            case '\\r': out += "\\\\r"; break;
+            case '\\t': out += "\\\\t"; break;
+            default: out.push_back(c);
+        }
+    }
+    out.push_back('"');
+}
+
+void Dump(const Value& value, std::string& out) {
+    switch (value.kind) {
+        case Value::kNull:
+            out += "null";
+            break;
+        case Value::kBool:
+            out += value.boolean ? "true" : "false";
+            break;
+        case Value::kNumber: {
+            char buffer[32];
+            int size = std::snprintf(
+                buffer, sizeof(buffer), "%.17g", value.number);
+            out.append(buffer, size);
+            break;
+        }
+        case Value::kString:
+            DumpString(value.string, out);
+            break;
+        case Value::kArray: {
+            out.push_back('[');
+            for (std::size_t i = 0; i < value.array.size(); ++i) {
+                if (i != 0) {
+                    out.push_back(',');
+                }
+                Dump(value.array[i], out);
+            }
+            out.push_back(']');
+            break;
+        }
+        case Value::kObject: {
+            out.push_back('{');
+            bool first = true;
+            for (const auto& [key, item] : value.object) {
+                if (!first) {
+                    out.push_back(',');
+                }
+                first = false;
+                DumpString(key, out);
+                out.push_back(':');
+                Dump(item, out);
+            }
+            out.push_back('}');
+            break;
+        }
+    }
+}
+
+// copying between the DOM and the DTOs, written by hand
+
+bool Get(const Value* value, std::string& result);
+bool Get(const Value* value, bool& result);
+template <typename T>
+std::enable_if_t<std::is_arithmetic_v<T>, bool> Get(
+    const Value* value, T& result);
+template <typename T>
+bool Get(const Value* value, std::optional<T>& result);
+template <typename T>
+bool Get(const Value* value, std::vector<T>& result);
+bool Get(const Value* value, models::Status& result);
+bool Get(const Value* value, models::OrderLine& result);
+bool Get(const Value* value, models::Order& result);
+
+bool Get(const Value* value, std::string& result) {
+    if (value == nullptr || value->kind != Value::kString) {
+        return false;
+    }
+    result = value->string;
+    return true;
+}
+
+bool Get(const Value* value, bool& result) {
+    if (value == nullptr || value->kind != Value::kBool) {
+        return false;
+    }
+    result = value->boolean;
+    return true;
+}
+
+template <typename T>
+std::enable_if_t<std::is_arithmetic_v<T>, bool> Get(
+    const Value* value, T& result) {
+    if (value == nullptr || value->kind != Value::kNumber) {
+        return false;
+    }
+    result = static_cast<T>(value->number);
+    return true;
+}
+
+template <typename T>
+bool Get(const Value* value, std::optional<T>& result) {
+    if (value == nullptr || value->kind == Value::kNull) {
+        result.reset();
+        return true;
+    }
+    return Get(value, result.emplace());
+}
+
+template <typename T>
+bool Get(const Value* value, std::vector<T>& result) {
+    if (value == nullptr || value->kind != Value::kArray) {
+        return false;
+    }
+    result.clear();
+    for (const Value& item : value->array) {
+        if (!Get(&item, result.emplace_back())) {
+            return false;
+        }
+    }
+    return true;
+}
+
+bool Get(const Value* value, models::Status& result) {
+    return value != nullptr && value->kind == Value::kString &&
+           models::FromString(value->string, result);
+}
+
+bool Get(const Value* value, models::OrderLine& result) {
+    return value != nullptr && value->kind == Value::kObject &&
+           Get(value->Find("sku"), result.sku) &&
+           Get(value->Find("quantity"), result.quantity) &&
+           Get(value->Find("price"), result.price) &&
+           Get(value->Find("tags"), result.tags);
+}
+
+bool Get(const Value* value, models::Order& result) {
+    return value != nullptr && value->kind == Value::kObject &&
+           Get(value->Find("id"), result.id) &&
+           Get(value->Find("customer"), result.customer) &&
+           Get(value->Find("status"), result.status) &&
+           Get(value->Find("lines"), result.lines) &&
+           Get(value->Find("note"), result.note) &&
+           Get(value->Find("express"), result.express);
+}
+
+Value ToDom(const std::string& value);
+Value ToDom(bool value);
+template <typename T>
+std::enable_if_t<std::is_arithmetic_v<T>, Value> ToDom(T value);
+template <typename T>
+Value ToDom(const std::vector<T>& value);
+Value ToDom(models::Status value);
+Value ToDom(const models::OrderLine& value);
+
+Value ToDom(const std::string& value) {
+    Value result;
+    result.kind = Value::kString;
+    result.string = value;
+    return result;
+}
+
+Value ToDom(bool value) {
+    Value result;
+    result.kind = Value::kBool;
+    result.boolean = value;
+    return result;
+}
+
+template <typename T>
+std::enable_if_t<std::is_arithmetic_v<T>, Value> ToDom(T value) {
+    Value result;
+    result.kind = Value::kNumber;
+    result.number = static_cast<double>(value);
+    return result;
+}
+
+template <typename T>
+Value ToDom(const std::vector<T>& value) {
+    Value result;
+    result.kind = Value::kArray;
+    for (const T& item : value) {
+        result.array.push_back(ToDom(item));
+    }
+    return result;
+}
+
+Value ToDom(models::Status value) {
+    return ToDom(std::string(models::ToString(value)));
+}
+
+Value ToDom(const models::OrderLine& value) {
+    Value result;
+    result.kind = Value::kObject;
+    result.object["sku"] = ToDom(value.sku);
+    result.object["quantity"] = ToDom(value.quantity);
+    result.object["price"] = ToDom(value.price);
+    if (value.tags) {
+        result.object["tags"] = ToDom(*value.tags);
+    }
+    return result;
+}
+
+Value ToDom(const models::Order& value) {
+    Value result;
+    result.kind = Value::kObject;
+    result.object["id"] = ToDom(value.id);
+    result.object["customer"] = ToDom(value.customer);
+    result.object["status"] = ToDom(value.status);
+    result.object["lines"] = ToDom(value.lines);
+    if (value.note) {
+        result.object["note"] = ToDom(*value.note);
+    }
+    if (value.express) {
+        result.object["express"] = ToDom(*value.express);
+    }
+    return result;
+}
+
+}  // namespace dom
+
+namespace {
+
+const std::string kDocument = R"json(${document})json";
+
+volatile std::size_t sink;
+
+template <typename F>
+double Measure(int iterations, F&& body) {
+    auto start = std::chrono::steady_clock::now();
+    for (int i = 0; i < iterations; ++i) {
+        body();
+    }
+    std::chrono::duration<double, std::nano> elapsed =
+        std::chrono::steady_clock::now() - start;
+    return elapsed.count() / iterations;
+}
+
+}  // namespace
+
+int main() {
+    const int iterations = ${iterations};
+
+    models::Order generated{};
+    models::Order from_dom{};
+    dom::Value value;
+    if (!models::FromJson(kDocument, generated) ||
+        !dom::Parser(kDocument).Parse(value) ||
+        !dom::Get(&value, from_dom) ||
+        models::ToJson(generated) != models::ToJson(from_dom)) {
+        std::puts("decoded orders differ");
+        return 1;
+    }
+
+    double decode_generated = Measure(iterations, [] {
+        models::Order order{};
+        models::FromJson(kDocument, order);
+        sink = sink + order.lines.size();
+    });
+    double decode_dom = Measure(iterations, [] {
+        dom::Value value;
+        dom::Parser(kDocument).Parse(value);
+        models::Order order{};
+        dom::Get(&value, order);
+        sink = sink + order.lines.size();
+    });
+    double encode_generated = Measure(iterations, [&generated] {
+        sink = sink + models::ToJson(generated).size();
+    });
+    double encode_dom = Measure(iterations, [&generated] {
+        std::string out;
+        dom::Dump(dom::ToDom(generated), out);
+        sink = sink + out.size();
+    });
+
+    std::printf("decode %f %f\\n", decode_generated, decode_dom);
+    std::printf("encode %f %f\\n", encode_generated, encode_dom);
+    return 0;
+}
+''')
+
+
+def generate_document(lines_count: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    order = {
+        'id': rng.randrange(1, 2 ** 40),
+        'customer': 'customer "{}"\n'.format(rng.randrange(10 ** 6)),
+        'status': rng.choice(['new', 'paid', 'shipped', 'cancelled']),
+        'lines': [
+            {
+                'sku': 'SKU-{:08d}'.format(rng.randrange(10 ** 8)),
+                'quantity': rng.randrange(1, 100),
+                'price': round(rng.uniform(0.5, 500.0), 2),
+                'tags': [
+                    rng.choice(['fragile', 'gift', 'bulk', 'sale'])
+                    for _ in range(rng.randrange(3))
+                ],
+            }
+            for _ in range(lines_count)
+        ],
+        'note': 'leave at the door',
+        # unknown to the schema, skipped by both decoders
+        'metadata': {'source': 'web', 'campaign': [1, 2, 3]},
+    }
+    return json.dumps(order, indent=1)
+
+
+def run_json_benchmark(
+    lines_count: int = 20,
+    iterations: int = 20000,
+    work_dir: Optional[str] = None,
+    compiler: str = 'g++',
+) -> dict:
+    """
+    returns average nanoseconds per operation for the decoding and
+    the encoding of an order with lines_count lines
+    """
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        work_dir = work_dir or temp_dir
+        os.makedirs(work_dir, exist_ok=True)
+        document = generate_document(lines_count)
+        _write_sources(work_dir, document, iterations)
+        binary = os.path.join(work_dir, 'json_benchmark')
+        subprocess.run(
+            [compiler, '-std=c++17', '-O2', 'benchmark.cpp', 'models.cpp',
+             '-o', binary],
+            cwd=work_dir, check=True,
+        )
+        output = subprocess.run(
+            [binary], check=True, stdout=subprocess.PIPE, text=True
+        ).stdout
+
+    result = {'document_bytes': len(document.encode('utf-8'))}
+    for line in output.splitlines():
+        operation, generated_ns, dom_ns = line.split()
+        result[operation] = {
+            'generated_ns': float(generated_ns),
+            'dom_ns': float(dom_ns),
+            'speedup': float(dom_ns) / float(generated_ns),
+        }
+    return result
+
+
+def _write_sources(work_dir: str, document: str, iterations: int) -> None:
+    items = Linker(Parser().parse(SCHEMA)).link()
+    sources = CppEmitter(
+        EmitterOptions(namespace='models', json=True)
+    ).emit(items, 'models')
+    files = {
+        sources.header_name: sources.header,
+        'models.cpp': sources.source,
+        'benchmark.cpp': BENCHMARK.substitute(
+            document=document, iterations=iterations
+        ),
+    }
+    for name, content in files.items():
+        with open(os.path.join(work_dir, name), 'w') as file:
+            file.write(content)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip())
+    arg_parser.add_argument('--lines', type=int, default=20)
+    arg_parser.add_argument('--iterations', type=int, default=20000)
+    arg_parser.add_argument(
+        '--keep', metavar='DIR', help='keep the sources and the binary in DIR'
+    )
+    args = arg_parser.parse_args()
+
+    result = run_json_benchmark(args.lines, args.iterations, args.keep)
+    print('document: {} bytes'.format(result['document_bytes']))
+    for operation in ('decode', 'encode'):
+        timings = result[operation]
+        print('{}: generated {:9.0f} ns, DOM {:9.0f} ns, {:.2f}x'.format(
+            operation,
+            timings['generated_ns'],
+            timings['dom_ns'],
+            timings['speedup'],
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Measures memory retained by the intermediate model of a generated
+schema: python -m benchmarks.model_memory [definitions_count]
+"""
+
+import gc
+import logging
+import sys
+import tracemalloc
+
+import codegen.log as log
+from benchmarks.schema_gen import generate_schema
+from codegen.parser.parser import Parser
+
+
+def measure_model_memory(definitions_count: int) -> dict:
+    schema = generate_schema(definitions_count)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        parser = Parser()
+        model = parser.parse(schema)
+        # drop incremental parsing state, only the model is measured
+        del parser
+        gc.collect()
+        size, peak = tracemalloc.get_traced_memory()
+        blocks = sum(
+            stat.count
+            for stat in tracemalloc.take_snapshot().statistics('filename')
+        )
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'definitions': len(model),
+        'model_bytes': size,
+        'peak_bytes': peak,
+        'allocated_blocks': blocks,
+        'bytes_per_definition': size / len(model),
+    }
+
+
+def main():
+    definitions_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    log.configure(logging.WARNING)
+    result = measure_model_memory(definitions_count)
+    for key, value in result.items():
+        print('{:>22}: {:,.0f}'.format(key, value))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""
+Measures Parser.parse throughput on a generated schema:
+python -m benchmarks.parse_speed [definitions_count] [repeats]
+"""
+
+import logging
+import sys
+import time
+
+import codegen.log as log
+from benchmarks.schema_gen import generate_schema
+from codegen.parser.parser import Parser
+
+
+def measure_parse_speed(definitions_count: int, repeats: int = 5) -> dict:
+    schema = generate_schema(definitions_count)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        Parser().parse(schema)
+        timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+    return {
+        'definitions': definitions_count,
+        'best_seconds': best,
+        'definitions_per_second': definitions_count / best,
+    }
+
+
+def main():
+    definitions_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    log.configure(logging.WARNING)
+    result = measure_parse_speed(definitions_count, repeats)
+    for key, value in result.items():
+        print('{:>22}: {:,.3f}'.format(key, value))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,247 @@
+"""
+Benchmark suite: times every stage of the generation separately
+on synthetic schemas and reports throughput and peak memory.
+
+    python -m benchmarks.run --sizes 1000 10000 --output results.json
+    python -m benchmarks.run --compare results.json
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import closing
+from typing import Callable, Dict, List
+
+import codegen
+import codegen.log as log
+import codegen.yaml_loader as yaml_loader
+from benchmarks.schema_gen import SHAPES, generate_schema, write_schema
+from codegen.emitter.cpp import CppEmitter
+from codegen.parser.linker import Linker
+from codegen.parser.parser import Parser
+
+
+class Stage:
+    """
+    a benchmarked step; prepare() builds its input outside the timing,
+    run() does the measured work
+    """
+
+    def __init__(
+        self,
+        name: str,
+        prepare: Callable[[str], object],
+        run: Callable[[object], object],
+    ) -> None:
+        self.name = name
+        self.prepare = prepare
+        self.run = run
+
+
+def _parse(schema_path: str):
+    definitions = yaml_loader.iter_definitions(schema_path)
+    with closing(definitions):
+        return Parser().parse_definitions(definitions)
+
+
+def _load_all(schema_path: str):
+    return list(yaml_loader.iter_definitions(schema_path))
+
+
+def _link(schema_path: str):
+    return Linker(_parse(schema_path)).link()
+
+
+def _emit(items) -> int:
+    sources = CppEmitter().emit(items, 'benchmark')
+    return len(sources.header) + len(sources.source)
+
+
+STAGES = [
+    Stage(
+        'load',
+        prepare=lambda schema_path: schema_path,
+        run=yaml_loader.load,
+    ),
+    Stage(
+        'stream',
+        prepare=lambda schema_path: schema_path,
+        run=_load_all,
+    ),
+    Stage(
+        'parse',
+        prepare=_load_all,
+        run=lambda definitions: Parser().parse_definitions(definitions),
+    ),
+    Stage(
+        'link',
+        prepare=_parse,
+        run=lambda model: Linker(model).link(),
+    ),
+    Stage(
+        'emit',
+        prepare=_link,
+        run=_emit,
+    ),
+]
+
+
+def measure_stage(
+    stage: Stage, schema_path: str, definitions_count: int, repeats: int
+) -> Dict:
+    timings = []
+    for _ in range(repeats):
+        stage_input = stage.prepare(schema_path)
+        gc.collect()
+        start = time.perf_counter()
+        stage.run(stage_input)
+        timings.append(time.perf_counter() - start)
+        del stage_input
+
+    # memory is measured in a separate run, tracing distorts timings
+    stage_input = stage.prepare(schema_path)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        stage.run(stage_input)
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    best = min(timings)
+    return {
+        'best_seconds': best,
+        'mean_seconds': sum(timings) / len(timings),
+        'definitions_per_second': definitions_count / best if best else 0,
+        'peak_bytes': peak_bytes,
+    }
+
+
+def run_suite(
+    shapes: List[str], sizes: List[int], stages: List[str], repeats: int
+) -> Dict:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for shape in shapes:
+            for size in sizes:
+                schema_path = os.path.join(
+                    tmp_dir, '{}_{}.yaml'.format(shape, size)
+                )
+                write_schema(generate_schema(size, shape=shape), schema_path)
+                for stage in STAGES:
+                    if stage.name not in stages:
+                        continue
+                    result = measure_stage(stage, schema_path, size, repeats)
+                    result.update({
+                        'shape': shape,
+                        'definitions': size,
+                        'stage': stage.name,
+                        'file_bytes': os.path.getsize(schema_path),
+                    })
+                    results.append(result)
+                    _print_result(result, sys.stderr)
+
+    return {'metadata': _get_metadata(), 'results': results}
+
+
+def compare(baseline: Dict, current: Dict) -> List[str]:
+    """
+    returns lines describing the change of every measurement
+    present in both runs
+    """
+
+    def key(result):
+        return result['shape'], result['definitions'], result['stage']
+
+    baseline_results = {key(result): result for result in baseline['results']}
+    lines = []
+    for result in current['results']:
+        old = baseline_results.get(key(result))
+        if old is None:
+            continue
+        lines.append(
+            '{:<9} {:>8} {:<7} time {:>7.2f}x  memory {:>7.2f}x'.format(
+                result['shape'],
+                result['definitions'],
+                result['stage'],
+                result['best_seconds'] / old['best_seconds'],
+                result['peak_bytes'] / max(old['peak_bytes'], 1),
+            )
+        )
+    return lines
+
+
+def _print_result(result: Dict, stream) -> None:
+    print(
+        '{:<9} {:>8} {:<7} {:>9.4f}s {:>12,.0f} defs/s {:>9.1f} MB'.format(
+            result['shape'],
+            result['definitions'],
+            result['stage'],
+            result['best_seconds'],
+            result['definitions_per_second'],
+            result['peak_bytes'] / 1024 / 1024,
+        ),
+        file=stream,
+    )
+
+
+def _get_metadata() -> Dict:
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'generator_version': codegen.__version__,
+        'python': platform.python_version(),
+        'libyaml': yaml_loader.HAS_LIBYAML,
+        'timestamp': time.time(),
+    }
+
+
+def main():
+    stage_names = [stage.name for stage in STAGES]
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument(
+        '--shapes', nargs='+', choices=SHAPES, default=list(SHAPES)
+    )
+    arg_parser.add_argument(
+        '--sizes', nargs='+', type=int, default=[1000, 10000]
+    )
+    arg_parser.add_argument(
+        '--stages', nargs='+', choices=stage_names, default=stage_names
+    )
+    arg_parser.add_argument('--repeats', type=int, default=3)
+    arg_parser.add_argument('--output', help='save results as JSON')
+    arg_parser.add_argument(
+        '--compare', help='JSON results of a previous run to compare with'
+    )
+    args = arg_parser.parse_args()
+
+    # progress records of the generator stay disabled while measuring
+    log.configure(logging.WARNING)
+    report = run_suite(args.shapes, args.sizes, args.stages, args.repeats)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        print('\n'.join(compare(baseline, report)))
+
+
+if __name__ == '__main__':
+    main()
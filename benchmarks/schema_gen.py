@@ -0,0 +1,144 @@
+import random
+from typing import Dict
+
+import yaml
+
+
+INT_FORMATS = ['int32', 'int64', 'uint32', 'uint64']
+NUMBER_FORMATS = ['float', 'double']
+
+SHAPES = ('mixed', 'flat', 'nested', 'crossref', 'enums')
+
+
+def generate_schema(
+    definitions_count: int,
+    seed: int = 0,
+    shape: str = 'mixed',
+    depth: int = 4,
+    fanout: int = 8,
+    enum_size: int = 256,
+) -> Dict:
+    """
+    generates a synthetic schema of the given shape:
+    mixed - a mix of all the item types, objects reference previous items
+    flat - primitive items only
+    nested - objects with inline items nested depth levels deep
+    crossref - objects with fanout references to previous items
+    enums - strings with enum_size enum values
+    """
+
+    if shape not in SHAPES:
+        raise ValueError('unknown schema shape \'{}\''.format(shape))
+
+    rand = random.Random(seed)
+    generate_item = {
+        'mixed': _generate_mixed_item,
+        'flat': _generate_flat_item,
+        'nested': _generate_nested_item,
+        'crossref': _generate_crossref_item,
+        'enums': _generate_enum_item,
+    }[shape]
+    options = {'depth': depth, 'fanout': fanout, 'enum_size': enum_size}
+
+    definitions = {}
+    for index in range(definitions_count):
+        name = 'Item{}'.format(index)
+        definitions[name] = generate_item(rand, index, **options)
+    return {'definitions': definitions}
+
+
+def write_schema(schema: Dict, path: str) -> None:
+    dumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+    with open(path, 'w') as file:
+        yaml.dump(schema, file, Dumper=dumper, sort_keys=False)
+
+
+def _generate_mixed_item(rand: random.Random, index: int, **_) -> Dict:
+    kind = index % 6
+    if kind == 0:
+        return {
+            'type': 'int',
+            'format': rand.choice(INT_FORMATS),
+            'description': 'integer {}'.format(index),
+        }
+    if kind == 1:
+        return {'type': 'number', 'format': rand.choice(NUMBER_FORMATS)}
+    if kind == 2:
+        return {'type': 'bool'}
+    if kind == 3:
+        return {
+            'type': 'string',
+            'enum': ['value{}'.format(i) for i in range(8)],
+        }
+    if kind == 4:
+        return {
+            'type': 'array',
+            'array_type': rand.choice(['array', 'set']),
+            'items': '#Item{}'.format(rand.randrange(index)),
+        }
+
+    properties = {
+        'field{}'.format(i): '#Item{}'.format(rand.randrange(index))
+        for i in range(4)
+    }
+    properties['nested'] = {'type': 'int', 'format': 'int64'}
+    return {
+        'type': 'object',
+        'properties': properties,
+        'required': ['field0', 'nested'],
+    }
+
+
+def _generate_flat_item(rand: random.Random, index: int, **_) -> Dict:
+    kind = index % 4
+    if kind == 0:
+        return {'type': 'int', 'format': rand.choice(INT_FORMATS)}
+    if kind == 1:
+        return {'type': 'number', 'format': rand.choice(NUMBER_FORMATS)}
+    if kind == 2:
+        return {'type': 'bool', 'description': 'flag {}'.format(index)}
+    return {'type': 'string'}
+
+
+def _generate_nested_item(
+    rand: random.Random, index: int, depth: int, **_
+) -> Dict:
+    item = {'type': 'int', 'format': rand.choice(INT_FORMATS)}
+    for level in range(depth):
+        if level % 2:
+            item = {'type': 'array', 'items': item}
+        else:
+            item = {
+                'type': 'object',
+                'properties': {
+                    'value': item,
+                    'flag': {'type': 'bool'},
+                },
+                'required': ['value'],
+            }
+    return item
+
+
+def _generate_crossref_item(
+    rand: random.Random, index: int, fanout: int, **_
+) -> Dict:
+    if index < fanout:
+        return {'type': 'int'}
+    return {
+        'type': 'object',
+        'properties': {
+            'ref{}'.format(i): '#Item{}'.format(rand.randrange(index))
+            for i in range(fanout)
+        },
+    }
+
+
+def _generate_enum_item(
+    rand: random.Random, index: int, enum_size: int, **_
+) -> Dict:
+    return {
+        'type': 'string',
+        'enum': [
+            'item{}_value{}'.format(index, i) for i in range(enum_size)
+        ],
+    }
@@ -0,0 +1,328 @@
+import glob
+import os
+import time
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+import codegen.stats as stats
+
+# the generator itself (and PyYAML with it) is imported by the functions
+# running it, so the CLI and the server client start without it
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+    from codegen.emitter.cpp import EmitterOptions
+
+
+SCHEMA_EXTENSIONS = ('.yaml', '.yml')
+
+
+class GenerationResult:
+    def __init__(
+        self,
+        source_path: str,
+        result_path: str,
+        error: str = None,
+        changed_paths: List[str] = None,
+        seconds: float = 0.0,
+    ) -> None:
+        """
+        changed_paths: output files written (or to be written in a dry run)
+        """
+
+        self.source_path = source_path
+        self.result_path = result_path
+        self.error = error
+        self.changed_paths = changed_paths or []
+        self.seconds = seconds
+        # stats of a worker process, merged into the active profile
+        self.profile: Optional[stats.Profile] = None
+
+    def is_ok(self) -> bool:
+        return self.error is None
+
+    def to_dict(self) -> dict:
+        return {
+            'source_path': self.source_path,
+            'result_path': self.result_path,
+            'error': self.error,
+            'changed_paths': self.changed_paths,
+            'seconds': self.seconds,
+        }
+
+    @staticmethod
+    def from_dict(result_dict: dict) -> 'GenerationResult':
+        return GenerationResult(**result_dict)
+
+
+class BatchError(RuntimeError):
+    """
+    raised once the whole batch is processed
+    if generation of any of the schemas failed
+    """
+
+    def __init__(self, results: List[GenerationResult]) -> None:
+        self.results = results
+        self.failed = [result for result in results if not result.is_ok()]
+        super().__init__(
+            '{} of {} schemas failed:\n{}'.format(
+                len(self.failed),
+                len(results),
+                '\n'.join(
+                    '{}: {}'.format(result.source_path, result.error)
+                    for result in self.failed
+                ),
+            )
+        )
+
+
+def collect_sources(paths: Iterable[str]) -> List[str]:
+    """
+    expands directories (recursively) and glob patterns into
+    a sorted list of schema files, keeping explicitly listed files as is
+    """
+
+    return list(collect_source_roots(paths))
+
+
+def collect_source_roots(paths: Iterable[str]) -> Dict[str, str]:
+    """
+    finds the schema files as collect_sources() does and maps each one
+    to the input it was found through: the directory itself, the directory
+    a glob pattern starts from or the directory of a listed file
+    """
+
+    sources = {}
+    for path in paths:
+        if os.path.isdir(path):
+            root = path
+            found = [
+                os.path.join(directory, file_name)
+                for directory, _, file_names in os.walk(path)
+                for file_name in file_names
+                if file_name.endswith(SCHEMA_EXTENSIONS)
+            ]
+        elif glob.has_magic(path):
+            root = os.path.dirname(path)
+            while glob.has_magic(root):
+                root = os.path.dirname(root)
+            found = glob.glob(path, recursive=True)
+        else:
+            root = os.path.dirname(path)
+            found = [path]
+        for source in sorted(found):
+            sources.setdefault(source, root or os.curdir)
+    return sources
+
+
+def get_result_path(
+    source_path: str, output_dir: str, source_root: Optional[str] = None
+) -> str:
+    """
+    the sources found under a directory are mirrored under output_dir,
+    so equally named schemas of different subdirectories do not collide
+    """
+
+    if source_root is None:
+        name = os.path.basename(source_path)
+    else:
+        name = os.path.relpath(source_path, source_root)
+    name, _ = os.path.splitext(name)
+    return os.path.join(output_dir, name)
+
+
+def generate_batch(
+    source_paths: List[str],
+    output_dir: str,
+    jobs: Optional[int] = None,
+    cache_dir: Optional[str] = None,
+    dry_run: bool = False,
+    executor: Optional['Executor'] = None,
+    emitter_options: Optional['EmitterOptions'] = None,
+    collect_errors: bool = False,
+    error_format: str = 'text',
+    source_roots: Optional[Dict[str, str]] = None,
+) -> List[GenerationResult]:
+    """
+    generates C++ sources for every schema using a pool of
+    worker processes (os.cpu_count() by default, jobs=1 runs in-process).
+    A long-lived executor (see create_executor()) may be passed
+    instead to reuse warm worker processes between batches.
+    Results are returned in the order of source_paths; errors of all
+    the failed schemas are reported together with a BatchError.
+    dry_run generates everything but writes nothing.
+    collect_errors reports all the errors of a schema at once,
+    error_format ('text' or 'json') is the format of GenerationResult.error.
+    source_roots (see collect_source_roots()) mirror the sources
+    under output_dir, otherwise their results are named by the file name.
+    """
+
+    tasks = _make_tasks(
+        source_paths,
+        output_dir,
+        cache_dir,
+        dry_run,
+        emitter_options,
+        collect_errors,
+        error_format,
+        source_roots or {},
+    )
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    jobs = max(1, min(jobs, len(tasks)))
+
+    profile = stats.get_active()
+    generate = _generate if profile is None else _generate_profiled
+    if executor is not None:
+        results = list(executor.map(generate, tasks))
+    elif jobs == 1:
+        results = [_generate(task) for task in tasks]
+    else:
+        chunk_size = max(1, len(tasks) // (jobs * 4))
+        with create_executor(jobs) as executor:
+            results = list(
+                executor.map(generate, tasks, chunksize=chunk_size)
+            )
+    for result in results:
+        if result.profile is not None:
+            profile.merge(result.profile)
+            result.profile = None
+
+    if any(not result.is_ok() for result in results):
+        raise BatchError(results)
+    return results
+
+
+def create_executor(jobs: Optional[int] = None) -> 'Executor':
+    from concurrent.futures import ProcessPoolExecutor
+
+    import codegen.log as log
+
+    # workers started without fork() do not inherit the log level
+    return ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=_init_worker,
+        initargs=(log.get_configured_level(),),
+    )
+
+
+def _init_worker(log_level: int) -> None:
+    import logging
+
+    import codegen.log as log
+
+    if log_level != logging.NOTSET:
+        log.configure(log_level)
+
+
+_Task = Tuple[
+    str, str, Optional[str], bool, Optional['EmitterOptions'], bool, str
+]
+
+
+def _make_tasks(
+    source_paths: List[str],
+    output_dir: str,
+    cache_dir: Optional[str],
+    dry_run: bool,
+    emitter_options: Optional['EmitterOptions'],
+    collect_errors: bool,
+    error_format: str,
+    source_roots: Dict[str, str],
+) -> List[_Task]:
+    from codegen.parser.utils import ParsingErrors
+
+    if error_format not in ParsingErrors.FORMATS:
+        raise ValueError('unknown error format {!r}'.format(error_format))
+    tasks = []
+    sources_by_result = {}
+    for source_path in source_paths:
+        result_path = get_result_path(
+            source_path, output_dir, source_roots.get(source_path)
+        )
+        if result_path in sources_by_result:
+            raise ValueError(
+                '{} and {} would both be generated into {}'.format(
+                    sources_by_result[result_path],
+                    source_path,
+                    result_path,
+                )
+            )
+        sources_by_result[result_path] = source_path
+        tasks.append((
+            source_path,
+            result_path,
+            cache_dir,
+            dry_run,
+            emitter_options,
+            collect_errors,
+            error_format,
+        ))
+    return tasks
+
+
+def _generate_profiled(task: _Task) -> GenerationResult:
+    with stats.profiling() as profile:
+        result = _generate(task)
+    result.profile = profile
+    return result
+
+
+def _generate(task: _Task) -> GenerationResult:
+    from codegen.cache import ParseCache
+    from codegen.codegen import CodeGenerator
+    from codegen.output import OutputWriter
+
+    (
+        source_path,
+        result_path,
+        cache_dir,
+        dry_run,
+        emitter_options,
+        collect_errors,
+        error_format,
+    ) = task
+    start = time.perf_counter()
+    try:
+        # e.g. an unusable cache directory fails this source only
+        cache = ParseCache(cache_dir) if cache_dir else None
+        code_generator = CodeGenerator(
+            cache,
+            collect_errors=collect_errors,
+            emitter_options=emitter_options,
+            output_writer=OutputWriter(dry_run=dry_run),
+        )
+        changed_paths = code_generator.generate_cpp(source_path, result_path)
+    except Exception as e:
+        return GenerationResult(
+            source_path,
+            result_path,
+            error=_format_error(e, error_format),
+            seconds=time.perf_counter() - start,
+        )
+    return GenerationResult(
+        source_path,
+        result_path,
+        changed_paths=changed_paths,
+        seconds=time.perf_counter() - start,
+    )
+
+
+def _format_error(error: Exception, error_format: str) -> str:
+    """
+    the json format always lists the errors as ParsingErrors.to_json() does
+    """
+
+    from codegen.parser.utils import ErrorRecord, ParsingError, ParsingErrors
+
+    if error_format == 'text':
+        return '{}: {}'.format(type(error).__name__, error)
+    if not isinstance(error, ParsingErrors):
+        if isinstance(error, ParsingError):
+            record = ErrorRecord(definition=error.context, message=error.msg)
+        else:
+            record = ErrorRecord(
+                definition='',
+                message='{}: {}'.format(type(error).__name__, error),
+            )
+        error = ParsingErrors([record])
+    return error.format(error_format)
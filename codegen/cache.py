@@ -0,0 +1,138 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import zlib
+from typing import Dict, Optional
+
+import codegen
+import codegen.stats as stats
+from codegen.parser.models import ModelItem, get_model_layout
+
+
+# bump whenever the meaning of cached models changes, changes of their
+# slots are detected by get_model_layout()
+CACHE_FORMAT_VERSION = 2
+CACHE_FILE_SUFFIX = '.model'
+DEFAULT_MAX_SIZE_BYTES = 256 * 1024 * 1024
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class ParseCache:
+    """
+    On-disk cache of parsed intermediate models keyed by the content
+    hash of the source file and the generator version.
+    Entries are compressed pickles; the least recently used ones
+    are evicted once the cache grows over max_size_bytes.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_size_bytes: int = DEFAULT_MAX_SIZE_BYTES,
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def get_key(source_path: str) -> str:
+        digest = hashlib.sha256()
+        digest.update('{}:{}:{}\n'.format(
+            codegen.__version__, CACHE_FORMAT_VERSION, get_model_layout()
+        ).encode())
+        with open(source_path, 'rb') as file:
+            for chunk in iter(lambda: file.read(_HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def load(self, key: str) -> Optional[Dict[str, ModelItem]]:
+        path = self.__get_entry_path(key)
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+            model = pickle.loads(zlib.decompress(data))
+        except FileNotFoundError:
+            return self.__miss()
+        except (OSError, zlib.error, pickle.UnpicklingError, AttributeError,
+                EOFError, ImportError, ValueError, KeyError, TypeError):
+            # broken or stale entry, drop it and parse again
+            self.__remove(path)
+            return self.__miss()
+        if not isinstance(model, dict):
+            self.__remove(path)
+            return self.__miss()
+
+        # refresh recency for LRU eviction
+        os.utime(path)
+        self.hits += 1
+        stats.count(stats.CACHE_HITS)
+        return model
+
+    def store(self, key: str, model: Dict[str, ModelItem]) -> None:
+        data = zlib.compress(
+            pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)
+        )
+        if len(data) > self.max_size_bytes:
+            return
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(data)
+            os.replace(tmp_path, self.__get_entry_path(key))
+        except BaseException:
+            self.__remove(tmp_path)
+            raise
+
+        self.__evict()
+
+    def __miss(self) -> None:
+        self.misses += 1
+        stats.count(stats.CACHE_MISSES)
+        return None
+
+    def clear(self) -> None:
+        for entry in self.__list_entries():
+            self.__remove(entry.path)
+
+    def __evict(self) -> None:
+        entries = []
+        total_size = 0
+        for entry in self.__list_entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+            total_size += stat.st_size
+
+        if total_size <= self.max_size_bytes:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            if total_size <= self.max_size_bytes:
+                break
+            self.__remove(path)
+            total_size -= size
+
+    def __list_entries(self):
+        with os.scandir(self.cache_dir) as entries:
+            return [
+                entry for entry in entries
+                if entry.name.endswith(CACHE_FILE_SUFFIX)
+            ]
+
+    def __get_entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + CACHE_FILE_SUFFIX)
+
+    @staticmethod
+    def __remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
@@ -0,0 +1,476 @@
+"""
+Command-line interface of the generator
+
+    python main.py schemas/ -o generated --jobs 8 --cache-dir .codegen-cache
+    python main.py --serve /tmp/codegen.sock --jobs 8
+    python main.py schemas/ -o generated --connect /tmp/codegen.sock
+"""
+
+import argparse
+import logging
+import sys
+import time
+from typing import Dict, List, Optional
+
+import codegen
+import codegen.log as log
+from codegen.batch import (
+    BatchError,
+    GenerationResult,
+    collect_source_roots,
+    generate_batch,
+)
+
+# everything not needed by every invocation (the generation server,
+# the watcher, profilers, the generator itself) is imported where it is used:
+# the CLI runs once per target and its startup time is a build cost
+
+
+# exit codes
+EXIT_OK = 0
+EXIT_GENERATION_FAILED = 1
+EXIT_USAGE_ERROR = 2
+EXIT_SERVER_UNAVAILABLE = 3
+EXIT_INTERRUPTED = 130
+
+PROFILE_STATS_LIMIT = 30
+
+
+class _ServerUnavailable(Exception):
+    pass
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    arg_parser = argparse.ArgumentParser(
+        prog='cpp-code-gen',
+        description='Generates C++ DTOs from YAML schemas.',
+        epilog=(
+            'exit codes: {} success, {} generation of some schemas failed, '
+            '{} invalid usage, {} server unavailable, {} interrupted'.format(
+                EXIT_OK,
+                EXIT_GENERATION_FAILED,
+                EXIT_USAGE_ERROR,
+                EXIT_SERVER_UNAVAILABLE,
+                EXIT_INTERRUPTED,
+            )
+        ),
+    )
+    arg_parser.add_argument(
+        'inputs',
+        nargs='*',
+        help='schema files, directories (searched recursively) '
+             'or glob patterns',
+    )
+    arg_parser.add_argument(
+        '-o', '--output-dir',
+        default='result',
+        help='directory for the generated sources (default: %(default)s)',
+    )
+    arg_parser.add_argument(
+        '-j', '--jobs',
+        type=_positive_int,
+        help='number of worker processes (default: number of CPUs)',
+    )
+    arg_parser.add_argument(
+        '-n', '--dry-run',
+        action='store_true',
+        help='generate everything, but only report the files '
+             'which would be changed',
+    )
+    arg_parser.add_argument(
+        '--json',
+        action='store_true',
+        help='generate ToJson()/FromJson() for every object',
+    )
+    arg_parser.add_argument(
+        '--binary',
+        action='store_true',
+        help='generate ToBinary()/FromBinary() for every object',
+    )
+    arg_parser.add_argument(
+        '--reorder-members',
+        action='store_true',
+        help='declare struct members by descending alignment '
+             'to minimise padding',
+    )
+    arg_parser.add_argument(
+        '--array-container',
+        choices=['vector', 'small_vector'],
+        default='vector',
+        help='container of the arrays which do not choose one '
+             '(default: %(default)s)',
+    )
+    arg_parser.add_argument(
+        '--set-container',
+        choices=['set', 'flat_set', 'unordered_set'],
+        default='set',
+        help='container of the sets which do not choose one '
+             '(default: %(default)s)',
+    )
+    arg_parser.add_argument(
+        '--collect-errors',
+        action='store_true',
+        help='report all the errors of a schema instead of the first one',
+    )
+    arg_parser.add_argument(
+        '--error-format',
+        choices=['text', 'json'],
+        default='text',
+        help='format of the reported schema errors, json is printed '
+             'to stderr as a single document (default: %(default)s)',
+    )
+    arg_parser.add_argument(
+        '--layout-report',
+        action='store_true',
+        help='print estimated struct sizes in the schema order and '
+             'ordered by alignment instead of generating',
+    )
+    arg_parser.add_argument(
+        '--cache-dir',
+        help='reuse parsed models of unchanged schemas between runs',
+    )
+    arg_parser.add_argument(
+        '--timing',
+        action='store_true',
+        help='report generation time of every schema',
+    )
+    arg_parser.add_argument(
+        '--profile',
+        nargs='?',
+        const='-',
+        metavar='FILE',
+        help='run in-process under cProfile, print the top functions '
+             'or save the stats to FILE',
+    )
+    arg_parser.add_argument(
+        '--stats',
+        metavar='FILE',
+        help='save per-stage timings and counters to FILE as JSON',
+    )
+    arg_parser.add_argument(
+        '--trace',
+        metavar='FILE',
+        help='save a trace of the stages to FILE in Chrome trace format',
+    )
+    arg_parser.add_argument(
+        '-w', '--watch',
+        action='store_true',
+        help='keep running and regenerate schemas when they change, '
+             '`watch <inputs>` is an alias',
+    )
+    arg_parser.add_argument(
+        '--serve',
+        metavar='SOCKET',
+        help='run a generation server listening on the Unix socket',
+    )
+    arg_parser.add_argument(
+        '--connect',
+        metavar='SOCKET',
+        help='send the schemas to the generation server on the socket',
+    )
+    arg_parser.add_argument(
+        '-q', '--quiet',
+        action='store_true',
+        help='report errors only',
+    )
+    arg_parser.add_argument(
+        '-v', '--verbose',
+        action='count',
+        default=0,
+        help='log progress, repeat (-vv) to dump every parsed item',
+    )
+    arg_parser.add_argument(
+        '--version',
+        action='version',
+        version='%(prog)s {}'.format(codegen.__version__),
+    )
+    return arg_parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    if argv is None:
+        argv = sys.argv[1:]
+    # `watch <inputs>` is kept as an alias of `--watch <inputs>`
+    if argv[:1] == ['watch']:
+        argv = ['--watch'] + argv[1:]
+    arg_parser = build_arg_parser()
+    args = arg_parser.parse_args(argv)
+    log.configure(_get_log_level(args))
+
+    if args.serve is not None:
+        from codegen.server import GenerationServer
+        try:
+            GenerationServer(args.serve, args.jobs).run()
+        except RuntimeError as e:
+            _print_error(str(e))
+            return EXIT_USAGE_ERROR
+        return EXIT_OK
+
+    if not args.inputs:
+        arg_parser.print_usage(sys.stderr)
+        _print_error('no inputs given')
+        return EXIT_USAGE_ERROR
+
+    # the sources found in directories are mirrored under the output dir
+    source_roots = collect_source_roots(args.inputs)
+    if not source_roots and not args.watch:
+        _print_error('no schema files found in {}'.format(
+            ', '.join(args.inputs)
+        ))
+        return EXIT_USAGE_ERROR
+
+    if args.layout_report:
+        return _report_layouts(args, list(source_roots))
+
+    if args.watch:
+        return _watch(args)
+
+    if args.stats is None and args.trace is None:
+        return _run(args, source_roots)
+
+    import codegen.stats as stats
+
+    with stats.profiling() as profile:
+        try:
+            return _run(args, source_roots)
+        finally:
+            if args.stats is not None:
+                profile.dump_json(args.stats)
+            if args.trace is not None:
+                profile.dump_chrome_trace(args.trace)
+
+
+def _watch(args: argparse.Namespace) -> int:
+    from codegen.codegen import CodeGenerator
+    from codegen.output import OutputWriter
+    from codegen.watch import WatchSession, run_watch
+
+    # the watcher keeps parsed models in memory instead
+    if args.cache_dir is not None:
+        _print_error('--cache-dir cannot be used with --watch')
+        return EXIT_USAGE_ERROR
+
+    session = WatchSession(args.output_dir, CodeGenerator(
+        collect_errors=args.collect_errors,
+        emitter_options=_get_emitter_options(args),
+        output_writer=OutputWriter(dry_run=args.dry_run),
+    ))
+    try:
+        run_watch(
+            args.inputs, args.output_dir, session=session, quiet=args.quiet
+        )
+    except KeyboardInterrupt:
+        return EXIT_INTERRUPTED
+    return EXIT_OK
+
+
+def _run(args: argparse.Namespace, source_roots: Dict[str, str]) -> int:
+    if args.profile is None:
+        return _generate(args, source_roots)
+
+    import cProfile
+
+    # worker processes are not visible to the profiler
+    args.jobs = 1
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(_generate, args, source_roots)
+    finally:
+        _report_profile(profiler, args.profile)
+
+
+def _generate(
+    args: argparse.Namespace, source_roots: Dict[str, str]
+) -> int:
+    start = time.perf_counter()
+    exit_code = EXIT_OK
+    try:
+        if args.connect is None:
+            results = generate_batch(
+                list(source_roots),
+                args.output_dir,
+                jobs=args.jobs,
+                cache_dir=args.cache_dir,
+                dry_run=args.dry_run,
+                emitter_options=_get_emitter_options(args),
+                collect_errors=args.collect_errors,
+                error_format=args.error_format,
+                source_roots=source_roots,
+            )
+        else:
+            results = _generate_remotely(args, source_roots)
+    except BatchError as e:
+        results = e.results
+        exit_code = EXIT_GENERATION_FAILED
+    except ValueError as e:
+        _print_error(str(e))
+        return EXIT_USAGE_ERROR
+    except _ServerUnavailable as e:
+        _print_error('cannot reach the server: {}'.format(e))
+        return EXIT_SERVER_UNAVAILABLE
+    except KeyboardInterrupt:
+        return EXIT_INTERRUPTED
+
+    if args.error_format == 'json':
+        _print_json_errors(results)
+    for result in results:
+        if not result.is_ok():
+            if args.error_format == 'text':
+                _print_error(
+                    '{}: {}'.format(result.source_path, result.error)
+                )
+        elif not args.quiet:
+            _print_result(result, args)
+
+    if not args.quiet:
+        failed_count = sum(1 for result in results if not result.is_ok())
+        changed_count = sum(len(result.changed_paths) for result in results)
+        print('{} schema(s), {} failed, {} file(s) {}, {:.2f} s'.format(
+            len(results),
+            failed_count,
+            changed_count,
+            'to change' if args.dry_run else 'changed',
+            time.perf_counter() - start,
+        ))
+    return exit_code
+
+
+def _generate_remotely(
+    args: argparse.Namespace, source_roots: Dict[str, str]
+) -> List[GenerationResult]:
+    from codegen.client import GenerationClient, ServerError
+
+    try:
+        with GenerationClient(args.connect) as client:
+            result_dicts = client.generate(
+                list(source_roots),
+                args.output_dir,
+                cache_dir=args.cache_dir,
+                dry_run=args.dry_run,
+                json=args.json,
+                binary=args.binary,
+                reorder_members=args.reorder_members,
+                array_container=args.array_container,
+                set_container=args.set_container,
+                collect_errors=args.collect_errors,
+                error_format=args.error_format,
+                source_roots=source_roots,
+            )
+    except ServerError as e:
+        raise ValueError(str(e))
+    except OSError as e:
+        raise _ServerUnavailable(str(e))
+    results = [GenerationResult.from_dict(d) for d in result_dicts]
+    if any(not result.is_ok() for result in results):
+        raise BatchError(results)
+    return results
+
+
+def _get_emitter_options(args: argparse.Namespace):
+    from codegen.emitter.cpp import EmitterOptions
+
+    return EmitterOptions(
+        json=args.json,
+        binary=args.binary,
+        reorder_members=args.reorder_members,
+        array_container=args.array_container,
+        set_container=args.set_container,
+    )
+
+
+def _report_layouts(
+    args: argparse.Namespace, source_paths: List[str]
+) -> int:
+    from codegen.codegen import CodeGenerator
+    from codegen.emitter.cpp import EmitterOptions
+
+    # sizes depend on the containers
+    code_generator = CodeGenerator(emitter_options=EmitterOptions(
+        reorder_members=True,
+        array_container=args.array_container,
+        set_container=args.set_container,
+    ))
+    exit_code = EXIT_OK
+    declared_total = 0
+    packed_total = 0
+    for source_path in source_paths:
+        try:
+            with open(source_path, 'rb') as file:
+                output = code_generator.generate(file.read(), 'layout')
+        except Exception as e:
+            _print_error('{}: {}: {}'.format(
+                source_path, type(e).__name__, e
+            ))
+            exit_code = EXIT_GENERATION_FAILED
+            continue
+        print(source_path)
+        for layout in output.sources.struct_layouts:
+            print('    {:<32} {:>6} -> {:>6} bytes'.format(
+                layout.name, layout.declared_size, layout.packed_size
+            ))
+            declared_total += layout.declared_size
+            packed_total += layout.packed_size
+    print(
+        'total {} -> {} bytes, sizes of libstdc++ on 64-bit '
+        'targets'.format(declared_total, packed_total)
+    )
+    return exit_code
+
+
+def _print_result(result: GenerationResult, args: argparse.Namespace):
+    line = '{} -> {}'.format(result.source_path, result.result_path)
+    if args.timing:
+        line += ' ({:.1f} ms)'.format(result.seconds * 1000)
+    print(line)
+    for path in result.changed_paths:
+        print('    {} {}'.format(
+            'would write' if args.dry_run else 'wrote', path
+        ))
+
+
+def _print_json_errors(results: List[GenerationResult]) -> None:
+    import json
+
+    # results carry the errors as ParsingErrors.to_json() formats them
+    errors = [
+        dict(source_path=result.source_path, **error)
+        for result in results
+        if not result.is_ok()
+        for error in json.loads(result.error)['errors']
+    ]
+    if errors:
+        print(json.dumps({'errors': errors}, indent=2), file=sys.stderr)
+
+
+def _report_profile(profiler, output_path: str) -> None:
+    import pstats
+
+    if output_path != '-':
+        profiler.dump_stats(output_path)
+        return
+    stats = pstats.Stats(profiler, stream=sys.stderr)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE)
+    stats.print_stats(PROFILE_STATS_LIMIT)
+
+
+def _get_log_level(args: argparse.Namespace) -> int:
+    if args.quiet:
+        return logging.ERROR
+    if args.verbose >= 2:
+        return logging.DEBUG
+    if args.verbose == 1:
+        return logging.INFO
+    return logging.WARNING
+
+
+def _print_error(message: str) -> None:
+    print('error: {}'.format(message), file=sys.stderr)
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(
+            '{} is not a positive number'.format(value)
+        )
+    return number
@@ -0,0 +1,115 @@
+"""
+Thin client of the generation server (see codegen.server).
+Depends on the standard library only, so it starts quickly.
+
+    with GenerationClient('/tmp/codegen.sock') as client:
+        results = client.generate(['model.yaml'], 'result')
+"""
+
+import json
+import os
+import socket
+from typing import Dict, List
+
+
+class ServerError(RuntimeError):
+    """
+    the server rejected the request
+    """
+
+
+class GenerationClient:
+    def __init__(self, socket_path: str, timeout: float = None) -> None:
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.__socket = None
+        self.__reader = None
+
+    def __enter__(self) -> 'GenerationClient':
+        self.connect()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except BaseException:
+            sock.close()
+            raise
+        self.__socket = sock
+        self.__reader = sock.makefile('rb')
+
+    def close(self) -> None:
+        if self.__socket is None:
+            return
+        self.__reader.close()
+        self.__socket.close()
+        self.__socket = None
+        self.__reader = None
+
+    def request(self, request: dict) -> dict:
+        if self.__socket is None:
+            self.connect()
+        self.__socket.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        line = self.__reader.readline()
+        if not line:
+            raise ConnectionError('server closed the connection')
+        response = json.loads(line)
+        if not response.get('ok'):
+            raise ServerError(response.get('error', 'unknown error'))
+        return response
+
+    def ping(self) -> str:
+        """
+        returns the version of the server
+        """
+
+        return self.request({'command': 'ping'})['version']
+
+    def generate(
+        self,
+        source_paths: List[str],
+        output_dir: str,
+        cache_dir: str = None,
+        dry_run: bool = False,
+        json: bool = False,
+        binary: bool = False,
+        reorder_members: bool = False,
+        array_container: str = 'vector',
+        set_container: str = 'set',
+        collect_errors: bool = False,
+        error_format: str = 'text',
+        source_roots: Dict[str, str] = None,
+    ) -> List[dict]:
+        """
+        returns results as GenerationResult.to_dict() does,
+        in the order of source_paths. Relative paths are resolved
+        against the current directory of the client.
+        """
+
+        response = self.request({
+            'command': 'generate',
+            'source_paths': [os.path.abspath(path) for path in source_paths],
+            'output_dir': os.path.abspath(output_dir),
+            'cache_dir': cache_dir and os.path.abspath(cache_dir),
+            'dry_run': dry_run,
+            'json': json,
+            'binary': binary,
+            'reorder_members': reorder_members,
+            'array_container': array_container,
+            'set_container': set_container,
+            'collect_errors': collect_errors,
+            'error_format': error_format,
+            'source_roots': {
+                os.path.abspath(path): os.path.abspath(root)
+                for path, root in (source_roots or {}).items()
+            },
+        })
+        return response['results']
+
+    def shutdown(self) -> None:
+        self.request({'command': 'shutdown'})
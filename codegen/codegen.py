@@ -1,25 +1,150 @@
-from yaml.scanner import ScannerError
+import logging
+import os
+from contextlib import closing
+from typing import Dict, List, Union
 
-import codegen.yaml_loader as yaml_loader
+import codegen.stats as stats
+from codegen.cache import ParseCache
+from codegen.emitter.cpp import CppEmitter, EmitterOptions, GeneratedSources
+from codegen.output import OutputWriter
+from codegen.parser.linker import Linker
+from codegen.parser.models import ModelItem
 from codegen.parser.parser import Parser
 
 
+_logger = logging.getLogger(__name__)
+
+# parsed YAML document or its text
+Document = Union[dict, str, bytes]
+
+
+class GenerationOutput:
+    """
+    in-memory result of CodeGenerator.generate()
+    """
+
+    def __init__(
+        self,
+        model: Dict[str, ModelItem],
+        ordered_items: List[ModelItem],
+        sources: GeneratedSources,
+    ) -> None:
+        self.model = model
+        self.ordered_items = ordered_items
+        self.sources = sources
+
+
 class CodeGenerator:
-    def __init__(self) -> None:
-        pass
+    def __init__(
+        self,
+        cache: ParseCache = None,
+        collect_errors: bool = False,
+        emitter_options: EmitterOptions = None,
+        output_writer: OutputWriter = None,
+    ) -> None:
+        """
+        collect_errors: report all the schema errors at once
+        instead of stopping on the first one
+        """
+
+        self.cache = cache
+        self.collect_errors = collect_errors
+        self.emitter = CppEmitter(emitter_options)
+        self.output_writer = output_writer or OutputWriter()
+
+    def generate_cpp(
+        self, source_file_path: str, result_file_path: str
+    ) -> List[str]:
+        """
+        returns paths of the changed output files
+        """
+
+        # read YAML and parse definitions into intermediate model
+        _logger.info('parsing file %s', source_file_path)
+        data_model = self.__load_model(source_file_path)
+        _logger.info('parsed %d item(s)', len(data_model))
 
-    def generate_cpp(self, source_file_path: str, result_file_path: str):
-        # read YAML
-        print('loading file {}...'.format(source_file_path))
-        yaml_doc = yaml_loader.load(source_file_path)
-        print('done.')
+        return self.write_model(data_model, result_file_path)
 
-        # parse YAML into intermediate model
-        print('parsing schema...')
-        parser = Parser()
-        data_model = parser.parse(yaml_doc)
-        print('done.')
+    def parse(self, document: Document) -> Dict[str, ModelItem]:
+        """
+        parses a YAML document given as a dict, a string or bytes
+        and returns the items by name. Nothing is read from
+        or written to disk, the cache is not used.
+        """
+
+        parser = Parser(collect_errors=self.collect_errors)
+        if isinstance(document, dict):
+            return parser.parse(document)
+        import codegen.yaml_loader as yaml_loader
+        definitions = yaml_loader.iter_stream_definitions(document)
+        with closing(definitions):
+            return parser.parse_definitions(definitions)
+
+    def generate(self, document: Document, name: str) -> GenerationOutput:
+        """
+        parses, links and emits a document in memory,
+        name is the base name of the generated files
+        """
+
+        data_model = self.parse(document)
+        ordered_items = Linker(data_model).link()
+        sources = self.__emit(ordered_items, name)
+        return GenerationOutput(data_model, ordered_items, sources)
+
+    def write_model(
+        self, data_model: Dict[str, ModelItem], result_file_path: str
+    ) -> List[str]:
+        # resolve references and order items by their dependencies
+        ordered_items = Linker(data_model).link()
 
         # write resulting .h/.cpp
+        name = os.path.basename(result_file_path)
+        sources = self.__emit(ordered_items, name)
+        with stats.span('write'):
+            return self.__write_sources(sources, result_file_path)
+
+    def __emit(
+        self, ordered_items: List[ModelItem], name: str
+    ) -> GeneratedSources:
+        with stats.span('emit'):
+            return self.emitter.emit(ordered_items, name)
+
+    def __write_sources(
+        self, sources: GeneratedSources, result_file_path: str
+    ) -> List[str]:
+        result_dir = os.path.dirname(result_file_path)
+        if result_dir and not self.output_writer.dry_run:
+            os.makedirs(result_dir, exist_ok=True)
+        # unchanged files are left untouched to keep their mtimes
+        outputs = [
+            (result_file_path + '.h', sources.header),
+            (result_file_path + '.cpp', sources.source),
+        ]
+        changed_paths = [
+            path for path, content in outputs
+            if self.output_writer.write(path, content)
+        ]
+        self.output_writer.save_manifest()
+        return changed_paths
+
+    def __load_model(self, source_file_path: str) -> Dict[str, ModelItem]:
+        if self.cache is None:
+            return self.__parse_file(source_file_path)
+
+        cache_key = self.cache.get_key(source_file_path)
+        data_model = self.cache.load(cache_key)
+        if data_model is None:
+            data_model = self.__parse_file(source_file_path)
+            self.cache.store(cache_key, data_model)
+        return data_model
+
+    def __parse_file(self, source_file_path: str) -> Dict[str, ModelItem]:
+        # PyYAML is only imported when a model is not found in the cache
+        import codegen.yaml_loader as yaml_loader
 
-        pass
+        # definitions are parsed as they are streamed from the file
+        parser = Parser(collect_errors=self.collect_errors)
+        definitions = yaml_loader.iter_definitions(source_file_path)
+        with closing(definitions):
+            return parser.parse_definitions(definitions)
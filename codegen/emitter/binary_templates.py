@@ -0,0 +1,472 @@
+"""
+C++ templates of the generated binary (de)serializers
+
+The format follows the schema and carries no field names or tags:
+integers are varints (signed ones zigzag-encoded), float and double
+are little-endian fixed-width, strings are length-prefixed, arrays
+and sets are count-prefixed. An object starts with a bitset holding
+the presence of its optional members and the values of its bool
+members, followed by the other present members in declaration order.
+"""
+
+from codegen.emitter.templates import Template
+
+
+RUNTIME = Template('''\
+#ifndef CPP_CODE_GEN_BINARY_RUNTIME_V1
+#define CPP_CODE_GEN_BINARY_RUNTIME_V1
+
+#include <algorithm>
+#include <cstddef>
+#include <cstdint>
+#include <cstring>
+#include <limits>
+#include <string>
+#include <string_view>
+#include <type_traits>
+#include <utility>
+#include <vector>
+
+namespace codegen_binary {
+
+class Encoder {
+public:
+    explicit Encoder(std::string& out) : out_(out) {}
+
+    void Varint(std::uint64_t value) {
+        while (value >= 0x80) {
+            out_.push_back(static_cast<char>(value | 0x80));
+            value >>= 7;
+        }
+        out_.push_back(static_cast<char>(value));
+    }
+
+    template <typename T>
+    void Fixed(T value) {
+        char bytes[sizeof(T)];
+        for (std::size_t i = 0; i < sizeof(T); ++i) {
+            bytes[i] = static_cast<char>(value >> (8 * i));
+        }
+        out_.append(bytes, sizeof(T));
+    }
+
+    void Bytes(std::string_view value) {
+        Varint(value.size());
+        out_.append(value);
+    }
+
+    void Bits(const std::uint8_t* bits, std::size_t size) {
+        out_.append(reinterpret_cast<const char*>(bits), size);
+    }
+
+private:
+    std::string& out_;
+};
+
+class Decoder {
+public:
+    explicit Decoder(std::string_view input)
+        : p_(reinterpret_cast<const std::uint8_t*>(input.data())),
+          end_(p_ + input.size()) {}
+
+    bool Varint(std::uint64_t& value) {
+        value = 0;
+        for (int shift = 0; shift < 64; shift += 7) {
+            if (p_ == end_) {
+                return false;
+            }
+            std::uint8_t byte = *p_++;
+            value |= static_cast<std::uint64_t>(byte & 0x7F) << shift;
+            if ((byte & 0x80) == 0) {
+                return true;
+            }
+        }
+        return false;
+    }
+
+    template <typename T>
+    bool Fixed(T& value) {
+        if (Remaining() < sizeof(T)) {
+            return false;
+        }
+        value = 0;
+        for (std::size_t i = 0; i < sizeof(T); ++i) {
+            value |= static_cast<T>(p_[i]) << (8 * i);
+        }
+        p_ += sizeof(T);
+        return true;
+    }
+
+    // the value points into the input, nothing is copied
+    bool Bytes(std::string_view& value) {
+        std::uint64_t size = 0;
+        if (!Varint(size) || size > Remaining()) {
+            return false;
+        }
+        value = std::string_view(reinterpret_cast<const char*>(p_), size);
+        p_ += size;
+        return true;
+    }
+
+    bool Bits(const std::uint8_t*& bits, std::size_t size) {
+        if (Remaining() < size) {
+            return false;
+        }
+        bits = p_;
+        p_ += size;
+        return true;
+    }
+
+    std::size_t Remaining() const { return end_ - p_; }
+
+    bool AtEnd() const { return p_ == end_; }
+
+private:
+    const std::uint8_t* p_;
+    const std::uint8_t* end_;
+};
+
+template <typename T, typename = void>
+struct IsRange : std::false_type {};
+
+template <typename T>
+struct IsRange<T, std::void_t<
+    typename T::value_type, decltype(std::declval<const T&>().begin())>>
+    : std::bool_constant<!std::is_convertible_v<const T&, std::string_view>> {
+};
+
+template <typename T, typename = void>
+struct HasEmplaceBack : std::false_type {};
+
+template <typename T>
+struct HasEmplaceBack<T, std::void_t<
+    decltype(std::declval<T&>().emplace_back())>> : std::true_type {};
+
+template <typename T, typename = void>
+struct HasReserve : std::false_type {};
+
+template <typename T>
+struct HasReserve<T, std::void_t<
+    decltype(std::declval<T&>().reserve(0))>> : std::true_type {};
+
+template <typename T>
+std::enable_if_t<std::is_integral_v<T> && !std::is_same_v<T, bool>>
+EncodeBinary(Encoder& encoder, T value) {
+    if constexpr (std::is_signed_v<T>) {
+        // zigzag: small negative values stay short
+        std::int64_t wide = value;
+        encoder.Varint(
+            (static_cast<std::uint64_t>(wide) << 1) ^
+            static_cast<std::uint64_t>(wide >> 63));
+    } else {
+        encoder.Varint(value);
+    }
+}
+
+inline void EncodeBinary(Encoder& encoder, bool value) {
+    encoder.Varint(value ? 1 : 0);
+}
+
+inline void EncodeBinary(Encoder& encoder, float value) {
+    std::uint32_t bits;
+    std::memcpy(&bits, &value, sizeof(bits));
+    encoder.Fixed(bits);
+}
+
+inline void EncodeBinary(Encoder& encoder, double value) {
+    std::uint64_t bits;
+    std::memcpy(&bits, &value, sizeof(bits));
+    encoder.Fixed(bits);
+}
+
+inline void EncodeBinary(Encoder& encoder, std::string_view value) {
+    encoder.Bytes(value);
+}
+
+inline void EncodeBinary(Encoder& encoder, const std::string& value) {
+    encoder.Bytes(value);
+}
+
+inline void EncodeBinary(Encoder& encoder, const std::vector<bool>& value) {
+    encoder.Varint(value.size());
+    std::uint8_t byte = 0;
+    for (std::size_t i = 0; i < value.size(); ++i) {
+        if (value[i]) {
+            byte |= 1 << (i % 8);
+        }
+        if (i % 8 == 7) {
+            encoder.Bits(&byte, 1);
+            byte = 0;
+        }
+    }
+    if (value.size() % 8 != 0) {
+        encoder.Bits(&byte, 1);
+    }
+}
+
+template <typename T>
+void Encode(Encoder& encoder, const T& value);
+
+// arrays and sets of any container type
+template <typename T>
+std::enable_if_t<IsRange<T>::value> EncodeBinary(
+    Encoder& encoder, const T& value) {
+    encoder.Varint(value.size());
+    for (const auto& item : value) {
+        Encode(encoder, item);
+    }
+}
+
+template <typename T>
+std::enable_if_t<std::is_integral_v<T> && !std::is_same_v<T, bool>, bool>
+DecodeBinary(Decoder& decoder, T& value) {
+    std::uint64_t raw = 0;
+    if (!decoder.Varint(raw)) {
+        return false;
+    }
+    if constexpr (std::is_signed_v<T>) {
+        std::int64_t wide =
+            static_cast<std::int64_t>(raw >> 1) ^
+            -static_cast<std::int64_t>(raw & 1);
+        if (wide < std::numeric_limits<T>::min() ||
+            wide > std::numeric_limits<T>::max()) {
+            return false;
+        }
+        value = static_cast<T>(wide);
+    } else {
+        if (raw > std::numeric_limits<T>::max()) {
+            return false;
+        }
+        value = static_cast<T>(raw);
+    }
+    return true;
+}
+
+inline bool DecodeBinary(Decoder& decoder, bool& value) {
+    std::uint64_t raw = 0;
+    if (!decoder.Varint(raw) || raw > 1) {
+        return false;
+    }
+    value = raw != 0;
+    return true;
+}
+
+inline bool DecodeBinary(Decoder& decoder, float& value) {
+    std::uint32_t bits = 0;
+    if (!decoder.Fixed(bits)) {
+        return false;
+    }
+    std::memcpy(&value, &bits, sizeof(bits));
+    return true;
+}
+
+inline bool DecodeBinary(Decoder& decoder, double& value) {
+    std::uint64_t bits = 0;
+    if (!decoder.Fixed(bits)) {
+        return false;
+    }
+    std::memcpy(&value, &bits, sizeof(bits));
+    return true;
+}
+
+// zero-copy, the view is valid while the input is
+inline bool DecodeBinary(Decoder& decoder, std::string_view& value) {
+    return decoder.Bytes(value);
+}
+
+inline bool DecodeBinary(Decoder& decoder, std::string& value) {
+    std::string_view view;
+    if (!decoder.Bytes(view)) {
+        return false;
+    }
+    value.assign(view);
+    return true;
+}
+
+inline bool DecodeBinary(Decoder& decoder, std::vector<bool>& value) {
+    std::uint64_t size = 0;
+    const std::uint8_t* bits = nullptr;
+    if (!decoder.Varint(size) || size > decoder.Remaining() * 8 ||
+        !decoder.Bits(bits, (size + 7) / 8)) {
+        return false;
+    }
+    value.resize(size);
+    for (std::size_t i = 0; i < size; ++i) {
+        value[i] = (bits[i / 8] >> (i % 8)) & 1;
+    }
+    return true;
+}
+
+template <typename T>
+bool Decode(Decoder& decoder, T& value);
+
+template <typename T>
+std::enable_if_t<IsRange<T>::value, bool> DecodeBinary(
+    Decoder& decoder, T& value) {
+    using Item = typename T::value_type;
+    std::uint64_t size = 0;
+    if (!decoder.Varint(size)) {
+        return false;
+    }
+    value.clear();
+    if constexpr (HasReserve<T>::value) {
+        // the count is not trusted for preallocation
+        value.reserve(std::min<std::uint64_t>(size, decoder.Remaining()));
+    }
+    for (std::uint64_t i = 0; i < size; ++i) {
+        if constexpr (HasEmplaceBack<T>::value) {
+            if (!Decode(decoder, value.emplace_back())) {
+                return false;
+            }
+        } else {
+            // sets are encoded in order, the hint makes the insertion cheap
+            Item item{};
+            if (!Decode(decoder, item)) {
+                return false;
+            }
+            value.insert(value.end(), std::move(item));
+        }
+    }
+    return true;
+}
+
+// unqualified calls find the generated overloads by ADL
+template <typename T>
+void Encode(Encoder& encoder, const T& value) {
+    EncodeBinary(encoder, value);
+}
+
+template <typename T>
+bool Decode(Decoder& decoder, T& value) {
+    return DecodeBinary(decoder, value);
+}
+
+}  // namespace codegen_binary
+
+#endif  // CPP_CODE_GEN_BINARY_RUNTIME_V1
+
+''')
+
+OBJECT_DECLARATIONS = Template('''\
+void EncodeBinary(codegen_binary::Encoder& encoder, const ${name}& value);
+bool DecodeBinary(codegen_binary::Decoder& decoder, ${name}& result);
+std::string ToBinary(const ${name}& value);
+bool FromBinary(std::string_view data, ${name}& result);
+
+''')
+
+ENUM_DECLARATIONS = Template('''\
+void EncodeBinary(codegen_binary::Encoder& encoder, ${name} value);
+bool DecodeBinary(codegen_binary::Decoder& decoder, ${name}& result);
+
+''')
+
+OBJECT_ENCODE = Template('''\
+void EncodeBinary(codegen_binary::Encoder& encoder, const ${name}& value) {
+${bits_encode}${members}}
+
+''')
+
+BITS_ENCODE = Template('''\
+    std::uint8_t bits[${size}] = {};
+${bits}    encoder.Bits(bits, sizeof(bits));
+''')
+
+# the value of a bool or the presence of an optional member
+BIT_SET = Template('''\
+    if (value.${member}) {
+        bits[${byte}] |= ${mask};
+    }
+''')
+
+OPTIONAL_BOOL_BITS_SET = Template('''\
+    if (value.${member}) {
+        bits[${byte}] |= ${mask};
+        if (*value.${member}) {
+            bits[${value_byte}] |= ${value_mask};
+        }
+    }
+''')
+
+REQUIRED_MEMBER_ENCODE = Template('''\
+    codegen_binary::Encode(encoder, value.${member});
+''')
+
+OPTIONAL_MEMBER_ENCODE = Template('''\
+    if (value.${member}) {
+        codegen_binary::Encode(encoder, *value.${member});
+    }
+''')
+
+OBJECT_DECODE = Template('''\
+bool DecodeBinary(codegen_binary::Decoder& decoder, ${name}& result) {
+${bits_decode}${members}    return true;
+}
+
+''')
+
+BITS_DECODE = Template('''\
+    const std::uint8_t* bits = nullptr;
+    if (!decoder.Bits(bits, ${size})) {
+        return false;
+    }
+''')
+
+REQUIRED_BOOL_DECODE = Template('''\
+    result.${member} = (bits[${byte}] & ${mask}) != 0;
+''')
+
+OPTIONAL_BOOL_DECODE = Template('''\
+    if (bits[${byte}] & ${mask}) {
+        result.${member} = (bits[${value_byte}] & ${value_mask}) != 0;
+    } else {
+        result.${member}.reset();
+    }
+''')
+
+REQUIRED_MEMBER_DECODE = Template('''\
+    if (!codegen_binary::Decode(decoder, result.${member})) {
+        return false;
+    }
+''')
+
+OPTIONAL_MEMBER_DECODE = Template('''\
+    if (bits[${byte}] & ${mask}) {
+        if (!codegen_binary::Decode(decoder, result.${member}.emplace())) {
+            return false;
+        }
+    } else {
+        result.${member}.reset();
+    }
+''')
+
+OBJECT_CONVERSIONS = Template('''\
+std::string ToBinary(const ${name}& value) {
+    std::string data;
+    codegen_binary::Encoder encoder(data);
+    EncodeBinary(encoder, value);
+    return data;
+}
+
+bool FromBinary(std::string_view data, ${name}& result) {
+    codegen_binary::Decoder decoder(data);
+    return DecodeBinary(decoder, result) && decoder.AtEnd();
+}
+
+''')
+
+ENUM_BINARY = Template('''\
+void EncodeBinary(codegen_binary::Encoder& encoder, ${name} value) {
+    encoder.Varint(static_cast<std::uint64_t>(value));
+}
+
+bool DecodeBinary(codegen_binary::Decoder& decoder, ${name}& result) {
+    std::uint64_t raw = 0;
+    if (!decoder.Varint(raw) || raw >= ${count}) {
+        return false;
+    }
+    result = static_cast<${name}>(raw);
+    return true;
+}
+
+''')
@@ -0,0 +1,413 @@
+"""
+C++ templates of the containers selected for arrays and sets,
+and of the equality, ordering and hashing of objects kept in sets
+"""
+
+from codegen.emitter.templates import Template
+
+
+# header-only support code, included when a model uses any of it
+RUNTIME = Template('''\
+#ifndef CPP_CODE_GEN_CONTAINERS_RUNTIME_V1
+#define CPP_CODE_GEN_CONTAINERS_RUNTIME_V1
+
+#include <algorithm>
+#include <cstddef>
+#include <functional>
+#include <initializer_list>
+#include <memory>
+#include <new>
+#include <optional>
+#include <string>
+#include <string_view>
+#include <type_traits>
+#include <unordered_set>
+#include <utility>
+#include <vector>
+
+namespace codegen_containers {
+
+// a vector keeping up to N items inline, without a heap allocation
+template <typename T, std::size_t N>
+class SmallVector {
+public:
+    using value_type = T;
+    using size_type = std::size_t;
+    using iterator = T*;
+    using const_iterator = const T*;
+
+    SmallVector() = default;
+
+    SmallVector(std::initializer_list<T> items) {
+        reserve(items.size());
+        for (const T& item : items) {
+            push_back(item);
+        }
+    }
+
+    SmallVector(const SmallVector& other) {
+        reserve(other.size_);
+        for (const T& item : other) {
+            push_back(item);
+        }
+    }
+
+    SmallVector(SmallVector&& other) noexcept(
+        std::is_nothrow_move_constructible_v<T>) {
+        MoveFrom(other);
+    }
+
+    SmallVector& operator=(const SmallVector& other) {
+        if (this != &other) {
+            clear();
+            reserve(other.size_);
+            for (const T& item : other) {
+                push_back(item);
+            }
+        }
+        return *this;
+    }
+
+    SmallVector& operator=(SmallVector&& other) noexcept(
+        std::is_nothrow_move_constructible_v<T>) {
+        if (this != &other) {
+            clear();
+            Deallocate();
+            MoveFrom(other);
+        }
+        return *this;
+    }
+
+    ~SmallVector() {
+        clear();
+        Deallocate();
+    }
+
+    iterator begin() { return data_; }
+    iterator end() { return data_ + size_; }
+    const_iterator begin() const { return data_; }
+    const_iterator end() const { return data_ + size_; }
+
+    T* data() { return data_; }
+    const T* data() const { return data_; }
+    size_type size() const { return size_; }
+    size_type capacity() const { return capacity_; }
+    bool empty() const { return size_ == 0; }
+
+    T& operator[](size_type index) { return data_[index]; }
+    const T& operator[](size_type index) const { return data_[index]; }
+    T& front() { return data_[0]; }
+    const T& front() const { return data_[0]; }
+    T& back() { return data_[size_ - 1]; }
+    const T& back() const { return data_[size_ - 1]; }
+
+    void reserve(size_type capacity) {
+        if (capacity <= capacity_) {
+            return;
+        }
+        T* data = static_cast<T*>(::operator new(capacity * sizeof(T)));
+        std::uninitialized_move(data_, data_ + size_, data);
+        std::destroy(data_, data_ + size_);
+        Deallocate();
+        data_ = data;
+        capacity_ = capacity;
+    }
+
+    template <typename... Args>
+    T& emplace_back(Args&&... args) {
+        if (size_ == capacity_) {
+            // the arguments may refer to the items being moved
+            T item(std::forward<Args>(args)...);
+            reserve(capacity_ * 2);
+            return Append(std::move(item));
+        }
+        return Append(std::forward<Args>(args)...);
+    }
+
+    void push_back(const T& item) { emplace_back(item); }
+    void push_back(T&& item) { emplace_back(std::move(item)); }
+
+    void pop_back() {
+        --size_;
+        data_[size_].~T();
+    }
+
+    void clear() {
+        std::destroy(data_, data_ + size_);
+        size_ = 0;
+    }
+
+private:
+    template <typename... Args>
+    T& Append(Args&&... args) {
+        T* item = ::new (static_cast<void*>(data_ + size_))
+            T(std::forward<Args>(args)...);
+        ++size_;
+        return *item;
+    }
+
+    T* InlineData() { return reinterpret_cast<T*>(inline_); }
+
+    void Deallocate() {
+        if (data_ != InlineData()) {
+            ::operator delete(data_);
+            data_ = InlineData();
+            capacity_ = N;
+        }
+    }
+
+    // expects this to be empty and inline
+    void MoveFrom(SmallVector& other) {
+        if (other.data_ != other.InlineData()) {
+            data_ = other.data_;
+            size_ = other.size_;
+            capacity_ = other.capacity_;
+            other.data_ = other.InlineData();
+            other.size_ = 0;
+            other.capacity_ = N;
+            return;
+        }
+        std::uninitialized_move(other.begin(), other.end(), data_);
+        size_ = other.size_;
+        other.clear();
+    }
+
+    alignas(T) unsigned char inline_[N * sizeof(T)];
+    T* data_ = InlineData();
+    size_type size_ = 0;
+    size_type capacity_ = N;
+};
+
+template <typename T, std::size_t N>
+bool operator==(const SmallVector<T, N>& lhs, const SmallVector<T, N>& rhs) {
+    return std::equal(lhs.begin(), lhs.end(), rhs.begin(), rhs.end());
+}
+
+template <typename T, std::size_t N>
+bool operator!=(const SmallVector<T, N>& lhs, const SmallVector<T, N>& rhs) {
+    return !(lhs == rhs);
+}
+
+template <typename T, std::size_t N>
+bool operator<(const SmallVector<T, N>& lhs, const SmallVector<T, N>& rhs) {
+    return std::lexicographical_compare(
+        lhs.begin(), lhs.end(), rhs.begin(), rhs.end());
+}
+
+// a set kept as a sorted vector: compact and fast to iterate
+// and to look up, inserting into the middle is linear
+template <typename T>
+class FlatSet {
+public:
+    using value_type = T;
+    using size_type = std::size_t;
+    using iterator = typename std::vector<T>::const_iterator;
+    using const_iterator = iterator;
+
+    FlatSet() = default;
+
+    FlatSet(std::initializer_list<T> items) {
+        reserve(items.size());
+        for (const T& item : items) {
+            insert(item);
+        }
+    }
+
+    iterator begin() const { return items_.begin(); }
+    iterator end() const { return items_.end(); }
+    size_type size() const { return items_.size(); }
+    bool empty() const { return items_.empty(); }
+
+    void reserve(size_type capacity) { items_.reserve(capacity); }
+    void clear() { items_.clear(); }
+
+    iterator find(const T& item) const {
+        auto it = std::lower_bound(items_.begin(), items_.end(), item);
+        return it != items_.end() && !(item < *it) ? it : items_.end();
+    }
+
+    size_type count(const T& item) const {
+        return find(item) != items_.end() ? 1 : 0;
+    }
+
+    std::pair<iterator, bool> insert(T item) {
+        auto it = std::lower_bound(items_.begin(), items_.end(), item);
+        if (it != items_.end() && !(item < *it)) {
+            return {it, false};
+        }
+        return {items_.insert(it, std::move(item)), true};
+    }
+
+    // appending sorted items is constant time
+    iterator insert(iterator hint, T item) {
+        if (hint == items_.end() &&
+            (items_.empty() || items_.back() < item)) {
+            items_.push_back(std::move(item));
+            return items_.end() - 1;
+        }
+        return insert(std::move(item)).first;
+    }
+
+    size_type erase(const T& item) {
+        auto it = find(item);
+        if (it == items_.end()) {
+            return 0;
+        }
+        items_.erase(it);
+        return 1;
+    }
+
+    const std::vector<T>& items() const { return items_; }
+
+private:
+    std::vector<T> items_;
+};
+
+template <typename T>
+bool operator==(const FlatSet<T>& lhs, const FlatSet<T>& rhs) {
+    return lhs.items() == rhs.items();
+}
+
+template <typename T>
+bool operator!=(const FlatSet<T>& lhs, const FlatSet<T>& rhs) {
+    return !(lhs == rhs);
+}
+
+template <typename T>
+bool operator<(const FlatSet<T>& lhs, const FlatSet<T>& rhs) {
+    return lhs.items() < rhs.items();
+}
+
+inline std::size_t HashCombine(std::size_t seed, std::size_t hash) {
+    return seed ^ (hash + 0x9e3779b97f4a7c15ULL + (seed << 6) + (seed >> 2));
+}
+
+template <typename T, typename = void>
+struct IsRange : std::false_type {};
+
+template <typename T>
+struct IsRange<T, std::void_t<
+    typename T::value_type, decltype(std::declval<const T&>().begin())>>
+    : std::bool_constant<!std::is_convertible_v<const T&, std::string_view>> {
+};
+
+template <typename T>
+std::size_t Hash(const T& value);
+
+template <typename T>
+std::enable_if_t<std::is_arithmetic_v<T> || std::is_enum_v<T>, std::size_t>
+HashValue(T value) {
+    return std::hash<T>()(value);
+}
+
+inline std::size_t HashValue(std::string_view value) {
+    return std::hash<std::string_view>()(value);
+}
+
+inline std::size_t HashValue(const std::string& value) {
+    return std::hash<std::string_view>()(value);
+}
+
+template <typename T>
+std::size_t HashValue(const std::optional<T>& value) {
+    return value ? HashCombine(1, Hash(*value)) : 0;
+}
+
+template <typename T>
+std::enable_if_t<IsRange<T>::value, std::size_t> HashValue(const T& value) {
+    std::size_t seed = value.size();
+    for (const auto& item : value) {
+        seed = HashCombine(seed, Hash(item));
+    }
+    return seed;
+}
+
+// does not depend on the order of the items
+template <typename T, typename H, typename E, typename A>
+std::size_t HashValue(const std::unordered_set<T, H, E, A>& value) {
+    std::size_t sum = 0;
+    for (const auto& item : value) {
+        sum += Hash(item);
+    }
+    return HashCombine(value.size(), sum);
+}
+
+// unqualified calls find the generated overloads by ADL
+template <typename T>
+std::size_t Hash(const T& value) {
+    return HashValue(value);
+}
+
+struct Hasher {
+    template <typename T>
+    std::size_t operator()(const T& value) const {
+        return Hash(value);
+    }
+};
+
+}  // namespace codegen_containers
+
+#endif  // CPP_CODE_GEN_CONTAINERS_RUNTIME_V1
+
+''')
+
+OBJECT_DECLARATIONS = Template('''\
+bool operator==(const ${name}& lhs, const ${name}& rhs);
+bool operator!=(const ${name}& lhs, const ${name}& rhs);
+std::size_t HashValue(const ${name}& value);
+
+''')
+
+OBJECT_LESS_DECLARATION = Template('''\
+bool operator<(const ${name}& lhs, const ${name}& rhs);
+
+''')
+
+OBJECT_EQUALITY = Template('''\
+bool operator==(const ${name}& lhs, const ${name}& rhs) {
+    return std::tie(${lhs_members}) == std::tie(${rhs_members});
+}
+
+bool operator!=(const ${name}& lhs, const ${name}& rhs) {
+    return !(lhs == rhs);
+}
+
+std::size_t HashValue(const ${name}& value) {
+    std::size_t seed = ${member_count};
+${hashes}    return seed;
+}
+
+''')
+
+MEMBER_HASH = Template('''\
+    seed = codegen_containers::HashCombine(
+        seed, codegen_containers::Hash(value.${member}));
+''')
+
+OBJECT_LESS = Template('''\
+bool operator<(const ${name}& lhs, const ${name}& rhs) {
+    return std::tie(${lhs_members}) < std::tie(${rhs_members});
+}
+
+''')
+
+# specialisations have to be declared in namespace std
+STD_HASH_BEGIN = Template('''\
+
+namespace std {
+
+''')
+
+STD_HASH = Template('''\
+template <>
+struct hash<${qualified_name}> {
+    std::size_t operator()(const ${qualified_name}& value) const {
+        return ${qualified_prefix}HashValue(value);
+    }
+};
+
+''')
+
+STD_HASH_END = Template('''\
+}  // namespace std
+''')
@@ -0,0 +1,840 @@
+import json
+from typing import Dict, Iterable, List, Optional, Set
+
+import codegen
+import codegen.emitter.binary_templates as binary_templates
+import codegen.emitter.container_templates as container_templates
+import codegen.emitter.json_templates as json_templates
+import codegen.emitter.templates as templates
+from codegen.emitter.dispatch import emit_string_switch
+from codegen.emitter.layout import LayoutCalculator, StructLayout
+from codegen.emitter.names import (
+    to_enum_constants,
+    to_identifier,
+    to_string_literal,
+)
+from codegen.parser.models import (
+    ItemRef,
+    Keys,
+    ModelArray,
+    ModelBool,
+    ModelInt,
+    ModelItem,
+    ModelItemType,
+    ModelNumber,
+    ModelObject,
+    ModelString,
+    get_shape,
+)
+from codegen.parser.utils import ParsingError, get_nested_item_name
+
+
+INT_TYPES = {
+    ModelInt.IntType.Int32: 'std::int32_t',
+    ModelInt.IntType.Int64: 'std::int64_t',
+    ModelInt.IntType.Uint32: 'std::uint32_t',
+    ModelInt.IntType.Uint64: 'std::uint64_t',
+}
+
+NUMBER_TYPES = {
+    ModelNumber.NumberType.Float: 'float',
+    ModelNumber.NumberType.Double: 'double',
+}
+
+# C++ type patterns of the containers and their standard headers
+CONTAINER_TYPES = {
+    ModelArray.Container.Vector: ('std::vector<{item}>', 'vector'),
+    ModelArray.Container.SmallVector: (
+        'codegen_containers::SmallVector<{item}, {capacity}>', None
+    ),
+    ModelArray.Container.Set: ('std::set<{item}>', 'set'),
+    ModelArray.Container.FlatSet: (
+        'codegen_containers::FlatSet<{item}>', None
+    ),
+    ModelArray.Container.UnorderedSet: (
+        'std::unordered_set<{item}, codegen_containers::Hasher>',
+        'unordered_set',
+    ),
+}
+
+
+class EmitterOptions:
+    def __init__(
+        self,
+        namespace: str = None,
+        json: bool = False,
+        binary: bool = False,
+        reorder_members: bool = False,
+        array_container=ModelArray.Container.Vector,
+        set_container=ModelArray.Container.Set,
+    ) -> None:
+        """
+        json: generate ToJson()/FromJson() for objects
+        binary: generate ToBinary()/FromBinary() for objects
+        reorder_members: declare struct members by descending alignment
+        to minimise padding; serialized forms keep the schema order
+        array_container, set_container: ModelArray.Container or its value,
+        used for the arrays and sets which do not choose their own
+        """
+
+        self.namespace = namespace
+        self.json = json
+        self.binary = binary
+        self.reorder_members = reorder_members
+        self.containers = {
+            ModelArray.ArrayType.Array: to_container(
+                array_container, ModelArray.ArrayType.Array
+            ),
+            ModelArray.ArrayType.Set: to_container(
+                set_container, ModelArray.ArrayType.Set
+            ),
+        }
+
+
+class GeneratedSources:
+    """
+    in-memory contents of the generated .h/.cpp pair
+    """
+
+    def __init__(
+        self,
+        header_name: str,
+        header: str,
+        source: str,
+        struct_layouts: List[StructLayout] = None,
+    ) -> None:
+        """
+        struct_layouts: estimated sizes of the structs,
+        collected when their members are reordered
+        """
+
+        self.header_name = header_name
+        self.header = header
+        self.source = source
+        self.struct_layouts = struct_layouts or []
+
+
+class _EmitContext:
+    """
+    state of a single emit() call; generated code is collected
+    in chunk lists which are joined once at the end
+    """
+
+    def __init__(self, options: EmitterOptions) -> None:
+        self.declarations: List[str] = []
+        self.definitions: List[str] = []
+        # std::hash specialisations following the namespace
+        self.std_hashes: List[str] = []
+        self.includes: Set[str] = set()
+        self.uses_containers = False
+        # C++ names of the emitted items by id()
+        self.names: Dict[int, str] = {}
+        # nested items of the same shape share a single declaration
+        self.nested_names: Dict[tuple, str] = {}
+        self.used_names: Set[str] = set()
+        self.layouts = LayoutCalculator(options.containers)
+        self.struct_layouts: List[StructLayout] = []
+        # ids of the objects kept in sets, mapped to their orderability
+        self.set_objects: Dict[int, bool] = {}
+        # nested objects of the same shape are declared once
+        self.set_shapes: Dict[tuple, bool] = {}
+
+
+class CppEmitter:
+    """
+    Turns the linked intermediate model into C++ DTO declarations (.h)
+    and the accompanying definitions (.cpp)
+    """
+
+    def __init__(self, options: EmitterOptions = None) -> None:
+        self.options = options or EmitterOptions()
+        self.__item_emitters = {
+            ModelItemType.Int: self.__emit_int,
+            ModelItemType.Number: self.__emit_number,
+            ModelItemType.Bool: self.__emit_bool,
+            ModelItemType.String: self.__emit_string,
+            ModelItemType.Array: self.__emit_array,
+            ModelItemType.Object: self.__emit_object,
+        }
+
+    def emit(self, items: Iterable[ModelItem], name: str) -> GeneratedSources:
+        """
+        items must be linked and ordered by dependencies,
+        name is the base name of the generated files
+        """
+
+        items = list(items)
+        context = _EmitContext(self.options)
+        self.__find_set_objects(items, context)
+        # named items keep their names, nested ones are renamed on clashes
+        context.used_names.update(CppEmitter.__get_item_names(items))
+        for item in items:
+            self.__emit_item(item, to_identifier(item.name), context)
+
+        header_name = '{}.h'.format(name)
+        namespace_begin, namespace_end = self.__get_namespace()
+        header = templates.HEADER_FILE.substitute(
+            version=codegen.__version__,
+            includes=''.join(
+                templates.INCLUDE.substitute(header=header)
+                for header in sorted(context.includes)
+            ),
+            prelude=self.__get_prelude(context),
+            namespace_begin=namespace_begin,
+            declarations=''.join(context.declarations),
+            namespace_end=namespace_end,
+            epilogue=CppEmitter.__get_epilogue(context),
+        )
+        source = templates.SOURCE_FILE.substitute(
+            version=codegen.__version__,
+            header_name=header_name,
+            namespace_begin=namespace_begin,
+            definitions=''.join(context.definitions),
+            namespace_end=namespace_end,
+        )
+        return GeneratedSources(
+            header_name, header, source, context.struct_layouts
+        )
+
+    @staticmethod
+    def __get_item_names(items: List[ModelItem]) -> Set[str]:
+        """
+        returns the C++ names of the named items, raises ParsingError
+        if two of them map to the same name
+        """
+
+        names: Dict[str, str] = {}
+        for item in items:
+            identifier = to_identifier(item.name)
+            if identifier in names:
+                raise ParsingError(
+                    msg="'{}' and '{}' have the same C++ name '{}'".format(
+                        names[identifier], item.name, identifier
+                    ),
+                    context=item.name,
+                )
+            names[identifier] = item.name
+        return set(names)
+
+    def __get_prelude(self, context: _EmitContext) -> str:
+        """
+        returns the support code of the used containers
+        and of the enabled serializers
+        """
+
+        runtimes = []
+        if context.uses_containers:
+            runtimes.append(container_templates.RUNTIME.substitute())
+        if self.options.json:
+            runtimes.append(json_templates.RUNTIME.substitute())
+        if self.options.binary:
+            runtimes.append(binary_templates.RUNTIME.substitute())
+        return ''.join(runtimes)
+
+    @staticmethod
+    def __get_epilogue(context: _EmitContext) -> str:
+        if not context.std_hashes:
+            return ''
+        return (
+            container_templates.STD_HASH_BEGIN.substitute()
+            + ''.join(context.std_hashes)
+            + container_templates.STD_HASH_END.substitute()
+        )
+
+    def __find_set_objects(
+        self, items: List[ModelItem], context: _EmitContext
+    ) -> None:
+        """
+        marks the objects kept in sets and the objects they contain,
+        all of them need equality and hashing. Raises ParsingError
+        if an ordered set keeps items which cannot be ordered
+        """
+
+        pending = []
+        visited = set()
+        stack = list(items)
+        while stack:
+            item = stack.pop()
+            if id(item) in visited:
+                continue
+            visited.add(id(item))
+            stack.extend(nested for _, nested in item.get_nested_items())
+            if item.get_type() == ModelItemType.Array and (
+                item.array_type == ModelArray.ArrayType.Set
+            ):
+                self.__check_set_items(item)
+                pending.append(item.items_type.get_target())
+
+        while pending:
+            item = pending.pop()
+            if id(item) in context.set_objects:
+                continue
+            if item.get_type() == ModelItemType.Array:
+                pending.append(item.items_type.get_target())
+            elif item.get_type() == ModelItemType.Object:
+                orderable = self.__is_orderable(item, set())
+                context.set_objects[id(item)] = orderable
+                context.set_shapes[get_shape(item)] = orderable
+                pending.extend(
+                    item_ref.get_target()
+                    for item_ref in item.properties.values()
+                )
+
+    def __check_set_items(self, item: ModelArray) -> None:
+        container = item.get_container(self.options.containers)
+        if container == ModelArray.Container.UnorderedSet:
+            return
+        if not self.__is_orderable(item.items_type.get_target(), set()):
+            raise ParsingError(
+                msg='items of {} {} contain an unordered set and cannot '
+                    'be ordered, use {} {}'.format(
+                        Keys.CONTAINER,
+                        container.value,
+                        Keys.CONTAINER,
+                        ModelArray.Container.UnorderedSet.value,
+                    ),
+                context=item.name,
+            )
+
+    def __is_orderable(self, item: ModelItem, visited: Set[int]) -> bool:
+        """
+        returns False if the item contains an unordered set
+        """
+
+        if id(item) in visited:
+            return True
+        visited.add(id(item))
+        if item.get_type() == ModelItemType.Array:
+            return item.get_container(
+                self.options.containers
+            ) != ModelArray.Container.UnorderedSet and self.__is_orderable(
+                item.items_type.get_target(), visited
+            )
+        if item.get_type() == ModelItemType.Object:
+            return all(
+                self.__is_orderable(item_ref.get_target(), visited)
+                for item_ref in item.properties.values()
+            )
+        return True
+
+    def __get_namespace(self):
+        if not self.options.namespace:
+            return '', ''
+        return (
+            templates.NAMESPACE_BEGIN.substitute(
+                namespace=self.options.namespace
+            ),
+            templates.NAMESPACE_END.substitute(
+                namespace=self.options.namespace
+            ),
+        )
+
+    def __get_qualified_name(self, name: str) -> str:
+        if not self.options.namespace:
+            return '::' + name
+        return '::{}::{}'.format(self.options.namespace, name)
+
+    def __emit_item(
+        self, item: ModelItem, name: str, context: _EmitContext
+    ) -> None:
+        if id(item) in context.names:
+            return
+        context.names[id(item)] = name
+
+        # nested items are declared right before their owner
+        for field_name, nested_item in item.get_nested_items():
+            self.__emit_nested_item(
+                nested_item,
+                get_nested_item_name(name, field_name),
+                context,
+            )
+
+        CppEmitter.__emit_description(item.description, '', context)
+        self.__item_emitters[item.get_type()](item, name, context)
+
+    def __emit_nested_item(
+        self, item: ModelItem, name: str, context: _EmitContext
+    ) -> None:
+        if id(item) in context.names:
+            return
+        shape = get_shape(item)
+        shared_name = context.nested_names.get(shape)
+        if shared_name is not None:
+            context.names[id(item)] = shared_name
+            return
+
+        name = get_unique_name(to_identifier(name), context.used_names)
+        context.used_names.add(name)
+        context.nested_names[shape] = name
+        self.__emit_item(item, name, context)
+
+    def __emit_int(
+        self, item: ModelInt, name: str, context: _EmitContext
+    ) -> None:
+        context.includes.add('cstdint')
+        CppEmitter.__emit_alias(name, INT_TYPES[item.int_type], context)
+
+    def __emit_number(
+        self, item: ModelNumber, name: str, context: _EmitContext
+    ) -> None:
+        CppEmitter.__emit_alias(name, NUMBER_TYPES[item.number_type], context)
+
+    def __emit_bool(
+        self, item: ModelBool, name: str, context: _EmitContext
+    ) -> None:
+        CppEmitter.__emit_alias(name, 'bool', context)
+
+    def __emit_string(
+        self, item: ModelString, name: str, context: _EmitContext
+    ) -> None:
+        if item.enum is None:
+            context.includes.add('string')
+            CppEmitter.__emit_alias(name, 'std::string', context)
+            return
+
+        context.includes.add('string_view')
+        constants = to_enum_constants(item.enum.enum_list)
+        context.declarations.append(templates.ENUM.substitute(
+            name=name,
+            constants=''.join(
+                templates.ENUM_CONSTANT.substitute(constant=constant)
+                for constant in constants.values()
+            ),
+        ))
+        context.definitions.append(templates.ENUM_TO_STRING.substitute(
+            name=name,
+            cases=''.join(
+                templates.ENUM_TO_STRING_CASE.substitute(
+                    name=name,
+                    constant=constant,
+                    literal=to_string_literal(value),
+                )
+                for value, constant in constants.items()
+            ),
+        ))
+        context.definitions.append(templates.ENUM_FROM_STRING.substitute(
+            name=name,
+            dispatch=emit_string_switch('value', {
+                value: templates.ENUM_FROM_STRING_MATCH.substitute(
+                    name=name, constant=constant,
+                )
+                for value, constant in constants.items()
+            }),
+        ))
+        if self.options.json:
+            context.declarations.append(
+                json_templates.ENUM_DECLARATIONS.substitute(name=name)
+            )
+            context.definitions.append(
+                json_templates.ENUM_JSON.substitute(name=name)
+            )
+        if self.options.binary:
+            context.declarations.append(
+                binary_templates.ENUM_DECLARATIONS.substitute(name=name)
+            )
+            context.definitions.append(binary_templates.ENUM_BINARY.substitute(
+                name=name, count=len(constants),
+            ))
+
+    def __emit_array(
+        self, item: ModelArray, name: str, context: _EmitContext
+    ) -> None:
+        container = item.get_container(self.options.containers)
+        type_pattern, header = CONTAINER_TYPES[container]
+        if header is None or container == ModelArray.Container.UnorderedSet:
+            context.uses_containers = True
+        if header is not None:
+            context.includes.add(header)
+        CppEmitter.__emit_alias(
+            name,
+            type_pattern.format(
+                item=get_type_name(item.items_type, context.names),
+                capacity=item.get_inline_capacity(),
+            ),
+            context,
+        )
+
+    def __emit_object(
+        self, item: ModelObject, name: str, context: _EmitContext
+    ) -> None:
+        required = set(item.required)
+        member_names = dict(
+            zip(item.properties, get_member_names(item.properties))
+        )
+        member_order = list(item.properties)
+        is_reordered = False
+        if self.options.reorder_members:
+            layout = context.layouts.get_struct_layout(item, name)
+            context.struct_layouts.append(layout)
+            if layout.member_order != member_order:
+                is_reordered = True
+                member_order = layout.member_order
+                context.declarations.append(templates.COMMENT_LINE.substitute(
+                    indent='', line='members are ordered by alignment',
+                ))
+
+        member_types = {}
+        for property_name in item.properties:
+            type_name = get_type_name(
+                item.properties[property_name], context.names
+            )
+            if type_name in member_names.values():
+                # a member named like its type hides the type in the struct
+                type_name = self.__get_qualified_name(type_name)
+            if property_name not in required:
+                context.includes.add('optional')
+                type_name = 'std::optional<{}>'.format(type_name)
+            member_types[property_name] = type_name
+        members = [
+            templates.MEMBER.substitute(
+                type=member_types[property_name],
+                name=member_names[property_name],
+            )
+            for property_name in member_order
+        ]
+        if is_reordered:
+            # positional initialization would bind to other members
+            members.insert(0, CppEmitter.__emit_constructor(
+                name, member_types, member_names, member_order, context
+            ))
+
+        context.declarations.append(templates.STRUCT.substitute(
+            name=name,
+            members=''.join(members),
+        ))
+        orderable = context.set_objects.get(id(item))
+        if orderable is None and context.set_shapes:
+            orderable = context.set_shapes.get(get_shape(item))
+        if orderable is not None:
+            self.__emit_object_equality(item, name, orderable, context)
+        if self.options.json:
+            self.__emit_object_json(item, name, context)
+        if self.options.binary:
+            CppEmitter.__emit_object_binary(item, name, context)
+
+    @staticmethod
+    def __emit_constructor(
+        name: str,
+        member_types: Dict[str, str],
+        member_names: Dict[str, str],
+        member_order: List[str],
+        context: _EmitContext,
+    ) -> str:
+        """
+        defines a constructor taking the members in the schema order,
+        returns its declarations
+        """
+
+        context.includes.add('utility')
+
+        def get_parameters(indent: str) -> str:
+            return ',\n'.join(
+                templates.PARAMETER.substitute(
+                    indent=indent,
+                    type=member_types[property_name],
+                    name=member_names[property_name],
+                )
+                for property_name in member_types
+            )
+
+        context.definitions.append(templates.CONSTRUCTOR.substitute(
+            name=name,
+            parameters=get_parameters(' ' * 4),
+            initializers=',\n      '.join(
+                templates.MEMBER_INITIALIZER.substitute(
+                    name=member_names[property_name]
+                )
+                for property_name in member_order
+            ),
+        ))
+        return templates.CONSTRUCTOR_DECLARATIONS.substitute(
+            name=name, parameters=get_parameters(' ' * 8),
+        )
+
+    def __emit_object_equality(
+        self,
+        item: ModelObject,
+        name: str,
+        orderable: bool,
+        context: _EmitContext,
+    ) -> None:
+        context.includes.update(('cstddef', 'tuple'))
+        context.uses_containers = True
+        member_names = get_member_names(item.properties)
+        values = dict(
+            name=name,
+            lhs_members=', '.join('lhs.' + member for member in member_names),
+            rhs_members=', '.join('rhs.' + member for member in member_names),
+        )
+
+        context.declarations.append(
+            container_templates.OBJECT_DECLARATIONS.substitute(name=name)
+        )
+        context.definitions.append(
+            container_templates.OBJECT_EQUALITY.substitute(
+                member_count=len(member_names),
+                hashes=''.join(
+                    container_templates.MEMBER_HASH.substitute(member=member)
+                    for member in member_names
+                ),
+                **values,
+            )
+        )
+        # std::set and FlatSet order their items
+        if orderable:
+            context.declarations.append(
+                container_templates.OBJECT_LESS_DECLARATION.substitute(
+                    name=name
+                )
+            )
+            context.definitions.append(
+                container_templates.OBJECT_LESS.substitute(**values)
+            )
+
+        qualified_prefix = '::'
+        if self.options.namespace:
+            qualified_prefix = '::{}::'.format(self.options.namespace)
+        context.std_hashes.append(container_templates.STD_HASH.substitute(
+            qualified_name=qualified_prefix + name,
+            qualified_prefix=qualified_prefix,
+        ))
+
+    def __emit_object_json(
+        self, item: ModelObject, name: str, context: _EmitContext
+    ) -> None:
+        context.includes.update(('string', 'string_view'))
+        required_indexes = {
+            property_name: index
+            for index, property_name in enumerate(item.required)
+        }
+        writes = []
+        reads = {}
+        for property_name, member_name in zip(
+            item.properties, get_member_names(item.properties)
+        ):
+            # "name": with JSON escapes, as a C++ literal
+            key = to_string_literal(
+                json.dumps(property_name, ensure_ascii=False) + ':'
+            )
+            index = required_indexes.get(property_name)
+            template = (
+                json_templates.OPTIONAL_MEMBER_WRITE if index is None
+                else json_templates.REQUIRED_MEMBER_WRITE
+            )
+            writes.append(template.substitute(key=key, member=member_name))
+            found_set = (
+                '' if index is None else 'found.set({});\n'.format(index)
+            )
+            capacity = self.__get_reserve(item.properties[property_name])
+            if capacity is None:
+                reads[property_name] = json_templates.MEMBER_READ.substitute(
+                    member=member_name, found_set=found_set,
+                )
+            else:
+                reads[property_name] = (
+                    json_templates.RESERVED_MEMBER_READ.substitute(
+                        member=member_name,
+                        capacity=capacity,
+                        found_set=found_set,
+                    )
+                )
+
+        if required_indexes:
+            context.includes.add('bitset')
+            found_init = '    std::bitset<{}> found;\n'.format(
+                len(required_indexes)
+            )
+            found_check = 'found.all()'
+        else:
+            found_init = ''
+            found_check = 'true'
+
+        context.declarations.append(
+            json_templates.OBJECT_DECLARATIONS.substitute(name=name)
+        )
+        context.definitions.append(json_templates.OBJECT_WRITE.substitute(
+            name=name, members=''.join(writes),
+        ))
+        context.definitions.append(json_templates.OBJECT_READ.substitute(
+            name=name,
+            found_init=found_init,
+            dispatch=emit_string_switch('key', reads, ' ' * 12),
+            found_check=found_check,
+        ))
+        context.definitions.append(
+            json_templates.OBJECT_CONVERSIONS.substitute(name=name)
+        )
+
+    def __get_reserve(self, item_ref: ItemRef) -> Optional[int]:
+        """
+        returns the number of items to preallocate for the member,
+        binary input carries the exact count and needs no hint
+        """
+
+        target = item_ref.get_target()
+        if target.get_type() != ModelItemType.Array or not target.reserve:
+            return None
+        if target.get_container(
+            self.options.containers
+        ) == ModelArray.Container.Set:
+            return None
+        return target.reserve
+
+    @staticmethod
+    def __emit_object_binary(
+        item: ModelObject, name: str, context: _EmitContext
+    ) -> None:
+        context.includes.update(('cstdint', 'string', 'string_view'))
+        required = set(item.required)
+        bit_count = 0
+        bit_sets = []
+        bit_decodes = []
+        encodes = []
+        decodes = []
+        for (property_name, item_ref), member_name in zip(
+            item.properties.items(), get_member_names(item.properties)
+        ):
+            is_bool = item_ref.get_target().get_type() == ModelItemType.Bool
+            is_required = property_name in required
+            if is_required and not is_bool:
+                encodes.append(
+                    binary_templates.REQUIRED_MEMBER_ENCODE.substitute(
+                        member=member_name
+                    )
+                )
+                decodes.append(
+                    binary_templates.REQUIRED_MEMBER_DECODE.substitute(
+                        member=member_name
+                    )
+                )
+                continue
+
+            # a bool value or a presence flag
+            bit = get_bit(bit_count, member=member_name)
+            bit_count += 1
+            if is_required:
+                bit_sets.append(binary_templates.BIT_SET.substitute(**bit))
+                bit_decodes.append(
+                    binary_templates.REQUIRED_BOOL_DECODE.substitute(**bit)
+                )
+            elif is_bool:
+                value_bit = get_bit(bit_count)
+                bit_count += 1
+                bit.update(
+                    value_byte=value_bit['byte'], value_mask=value_bit['mask']
+                )
+                bit_sets.append(
+                    binary_templates.OPTIONAL_BOOL_BITS_SET.substitute(**bit)
+                )
+                bit_decodes.append(
+                    binary_templates.OPTIONAL_BOOL_DECODE.substitute(**bit)
+                )
+            else:
+                bit_sets.append(binary_templates.BIT_SET.substitute(**bit))
+                encodes.append(
+                    binary_templates.OPTIONAL_MEMBER_ENCODE.substitute(**bit)
+                )
+                decodes.append(
+                    binary_templates.OPTIONAL_MEMBER_DECODE.substitute(**bit)
+                )
+
+        bits_encode = ''
+        bits_decode = ''
+        if bit_count:
+            bits_size = (bit_count + 7) // 8
+            bits_encode = binary_templates.BITS_ENCODE.substitute(
+                size=bits_size, bits=''.join(bit_sets),
+            )
+            bits_decode = binary_templates.BITS_DECODE.substitute(
+                size=bits_size
+            ) + ''.join(bit_decodes)
+
+        context.declarations.append(
+            binary_templates.OBJECT_DECLARATIONS.substitute(name=name)
+        )
+        context.definitions.append(binary_templates.OBJECT_ENCODE.substitute(
+            name=name, bits_encode=bits_encode, members=''.join(encodes),
+        ))
+        context.definitions.append(binary_templates.OBJECT_DECODE.substitute(
+            name=name, bits_decode=bits_decode, members=''.join(decodes),
+        ))
+        context.definitions.append(
+            binary_templates.OBJECT_CONVERSIONS.substitute(name=name)
+        )
+
+    @staticmethod
+    def __emit_alias(
+        name: str, type_name: str, context: _EmitContext
+    ) -> None:
+        context.declarations.append(templates.ALIAS.substitute(
+            name=name,
+            type=type_name,
+        ))
+
+    @staticmethod
+    def __emit_description(
+        description: str, indent: str, context: _EmitContext
+    ) -> None:
+        if not description:
+            return
+        context.declarations.extend(
+            templates.COMMENT_LINE.substitute(indent=indent, line=line)
+            for line in description.splitlines()
+        )
+
+
+def to_container(value, array_type) -> ModelArray.Container:
+    """
+    value: ModelArray.Container or its value, raises ValueError
+    if it is unknown or does not fit the array type
+    """
+
+    container = ModelArray.Container(value)
+    if container not in ModelArray.CONTAINERS[array_type]:
+        raise ValueError('container {} does not fit {} {}'.format(
+            container.value, Keys.ARR_TYPE, array_type.value
+        ))
+    return container
+
+
+def get_type_name(item_ref: ItemRef, names: Dict[int, str]) -> str:
+    """
+    names: C++ names of the emitted nested items by id()
+    """
+
+    if item_ref.is_ref():
+        return to_identifier(item_ref.get_ref())
+    return names[id(item_ref.get_item())]
+
+
+def get_bit(index: int, **values) -> dict:
+    """
+    returns the byte and the mask of the bit in a bitset
+    as template values, together with the given ones
+    """
+
+    values.update(byte=index // 8, mask=hex(1 << index % 8))
+    return values
+
+
+def get_member_names(properties: Dict[str, ItemRef]) -> List[str]:
+    """
+    returns unique C++ member names for the properties, keeping order
+    """
+
+    names = []
+    used = set()
+    for property_name in properties:
+        unique_name = get_unique_name(to_identifier(property_name), used)
+        used.add(unique_name)
+        names.append(unique_name)
+    return names
+
+
+def get_unique_name(name: str, used: Set[str]) -> str:
+    unique_name = name
+    index = 1
+    while unique_name in used:
+        unique_name = '{}{}'.format(name, index)
+        index += 1
+    return unique_name
@@ -0,0 +1,98 @@
+"""
+Generation of C++ code matching a string against a fixed set of values
+without a chain of comparisons: a switch on the length, then nested
+switches on the most selective characters, then a single comparison.
+"""
+
+from typing import Dict, List, Tuple
+
+from codegen.emitter.names import to_string_literal
+
+
+INDENT = '    '
+
+# (UTF-8 value, statements run on match)
+_Case = Tuple[bytes, str]
+
+
+def emit_string_switch(
+    variable: str, cases: Dict[str, str], indent: str = INDENT
+) -> str:
+    """
+    returns code matching the std::string_view variable against
+    the keys of cases; the statements of the matched key are run and
+    must leave the switch (return, continue or goto), otherwise
+    the control falls through to the code following the switch
+    """
+
+    if not cases:
+        return ''
+    by_length: Dict[int, List[_Case]] = {}
+    for value, statements in cases.items():
+        encoded = value.encode('utf-8')
+        by_length.setdefault(len(encoded), []).append((encoded, statements))
+
+    lines = ['{}switch ({}.size()) {{'.format(indent, variable)]
+    for length, length_cases in sorted(by_length.items()):
+        lines.append('{}    case {}: {{'.format(indent, length))
+        _emit_char_switch(
+            variable, length_cases, indent + INDENT * 2, lines
+        )
+        lines.append('{}        break;'.format(indent))
+        lines.append('{}    }}'.format(indent))
+    lines.append('{}}}'.format(indent))
+    return '\n'.join(lines) + '\n'
+
+
+def _emit_char_switch(
+    variable: str, cases: List[_Case], indent: str, lines: List[str]
+) -> None:
+    if len(cases) == 1:
+        value, statements = cases[0]
+        lines.append('{}if ({} == {}) {{'.format(
+            indent, variable, to_string_literal(value.decode('utf-8'))
+        ))
+        lines.extend(
+            '{}{}{}'.format(indent, INDENT, line)
+            for line in statements.splitlines()
+        )
+        lines.append('{}}}'.format(indent))
+        return
+
+    position = _get_most_selective_position(cases)
+    by_char: Dict[int, List[_Case]] = {}
+    for case in cases:
+        by_char.setdefault(case[0][position], []).append(case)
+
+    lines.append('{}switch (static_cast<unsigned char>({}[{}])) {{'.format(
+        indent, variable, position
+    ))
+    for char, char_cases in sorted(by_char.items()):
+        lines.append('{}    case {}: {{{}'.format(
+            indent, char, _get_char_comment(char)
+        ))
+        _emit_char_switch(variable, char_cases, indent + INDENT * 2, lines)
+        lines.append('{}        break;'.format(indent))
+        lines.append('{}    }}'.format(indent))
+    lines.append('{}}}'.format(indent))
+
+
+def _get_most_selective_position(cases: List[_Case]) -> int:
+    """
+    returns the position at which the values have most distinct
+    characters, the values are distinct and have equal lengths
+    """
+
+    length = len(cases[0][0])
+    return max(
+        range(length),
+        key=lambda position: (
+            len({value[position] for value, _ in cases}), -position
+        ),
+    )
+
+
+def _get_char_comment(char: int) -> str:
+    if 0x20 < char < 0x7f and chr(char) not in '\\':
+        return "  // '{}'".format(chr(char))
+    return ''
@@ -0,0 +1,650 @@
+"""
+C++ templates of the generated JSON (de)serializers
+"""
+
+from codegen.emitter.templates import Template
+
+
+# header-only support code shared by all the generated headers;
+# the tokenizer reads straight from the input without building a DOM
+RUNTIME = Template('''\
+#ifndef CPP_CODE_GEN_JSON_RUNTIME_V1
+#define CPP_CODE_GEN_JSON_RUNTIME_V1
+
+#include <charconv>
+#include <cmath>
+#include <cstddef>
+#include <cstdint>
+#include <cstring>
+#include <limits>
+#include <optional>
+#include <string>
+#include <string_view>
+#include <system_error>
+#include <type_traits>
+#include <utility>
+
+namespace codegen_json {
+
+class Writer {
+public:
+    explicit Writer(std::string& out) : out_(out) {}
+
+    void Raw(char c) { out_.push_back(c); }
+    void Raw(std::string_view text) { out_.append(text); }
+
+    void String(std::string_view value) {
+        out_.push_back('"');
+        const char* begin = value.data();
+        const char* end = begin + value.size();
+        const char* run = begin;
+        for (const char* p = begin; p != end; ++p) {
+            unsigned char c = static_cast<unsigned char>(*p);
+            if (c >= 0x20 && c != '"' && c != '\\\\') {
+                continue;
+            }
+            out_.append(run, p);
+            run = p + 1;
+            switch (c) {
+                case '"': out_.append("\\\\\\""); break;
+                case '\\\\': out_.append("\\\\\\\\"); break;
+                case '\\n': out_.append("\\\\n"); break;
+                case '\\r': out_.append("\\\\r"); break;
+                case '\\t': out_.append("\\\\t"); break;
+                default: {
+                    static const char kHex[] = "0123456789abcdef";
+                    char escape[] = {
+                        '\\\\', 'u', '0', '0', kHex[c >> 4], kHex[c & 15]
+                    };
+                    out_.append(escape, sizeof(escape));
+                }
+            }
+        }
+        out_.append(run, end);
+        out_.push_back('"');
+    }
+
+    template <typename T>
+    void Number(T value) {
+        if constexpr (std::is_floating_point_v<T>) {
+            if (!std::isfinite(value)) {
+                out_.append("null");
+                return;
+            }
+        }
+        char buffer[32];
+        auto result = std::to_chars(buffer, buffer + sizeof(buffer), value);
+        out_.append(buffer, result.ptr);
+    }
+
+private:
+    std::string& out_;
+};
+
+class Reader {
+public:
+    explicit Reader(std::string_view input)
+        : p_(input.data()), end_(input.data() + input.size()) {}
+
+    bool Consume(char c) {
+        SkipWhitespace();
+        if (p_ != end_ && *p_ == c) {
+            ++p_;
+            return true;
+        }
+        return false;
+    }
+
+    bool Literal(std::string_view text) {
+        SkipWhitespace();
+        if (static_cast<std::size_t>(end_ - p_) < text.size() ||
+            std::memcmp(p_, text.data(), text.size()) != 0) {
+            return false;
+        }
+        p_ += text.size();
+        return true;
+    }
+
+    bool AtEnd() {
+        SkipWhitespace();
+        return p_ == end_;
+    }
+
+    // the value points into the input unless the string has escapes,
+    // then it is decoded into the scratch buffer
+    bool String(std::string_view& value, std::string& scratch) {
+        if (!Consume('"')) {
+            return false;
+        }
+        const char* begin = p_;
+        while (p_ != end_ && *p_ != '"' && *p_ != '\\\\') {
+            if (static_cast<unsigned char>(*p_) < 0x20) {
+                return false;
+            }
+            ++p_;
+        }
+        if (p_ == end_) {
+            return false;
+        }
+        if (*p_ == '"') {
+            value = std::string_view(begin, p_ - begin);
+            ++p_;
+            return true;
+        }
+        scratch.assign(begin, p_);
+        if (!Unescape(scratch)) {
+            return false;
+        }
+        value = scratch;
+        return true;
+    }
+
+    template <typename T>
+    bool Number(T& value) {
+        SkipWhitespace();
+        if constexpr (std::is_floating_point_v<T>) {
+            if (Literal("null")) {
+                value = std::numeric_limits<T>::quiet_NaN();
+                return true;
+            }
+        }
+        // from_chars also takes "inf", "nan" and hex floats,
+        // so the token is checked against the JSON grammar first
+        const char* end = ScanNumber();
+        if (end == nullptr) {
+            return false;
+        }
+        auto result = std::from_chars(p_, end, value);
+        if (result.ec != std::errc() || result.ptr != end) {
+            return false;
+        }
+        p_ = end;
+        return true;
+    }
+
+    // skips a value of any type without decoding it
+    bool SkipValue() {
+        // the containers the value is nested in, '{' or '['
+        std::string open;
+        for (;;) {
+            SkipWhitespace();
+            if (p_ == end_) {
+                return false;
+            }
+            if (*p_ == '{' || *p_ == '[') {
+                char c = *p_++;
+                if (!Consume(c == '{' ? '}' : ']')) {
+                    open.push_back(c);
+                    if (c == '{' && !SkipKey()) {
+                        return false;
+                    }
+                    continue;
+                }
+            } else if (*p_ == '"') {
+                if (!SkipString()) {
+                    return false;
+                }
+            } else if (!SkipScalar()) {
+                return false;
+            }
+            // a value is complete, the next one follows a separator
+            // unless it also completes the enclosing containers
+            for (;;) {
+                if (open.empty()) {
+                    return true;
+                }
+                if (Consume(',')) {
+                    if (open.back() == '{' && !SkipKey()) {
+                        return false;
+                    }
+                    break;
+                }
+                if (!Consume(open.back() == '{' ? '}' : ']')) {
+                    return false;
+                }
+                open.pop_back();
+            }
+        }
+    }
+
+private:
+    void SkipWhitespace() {
+        while (p_ != end_ &&
+               (*p_ == ' ' || *p_ == '\\n' || *p_ == '\\r' || *p_ == '\\t')) {
+            ++p_;
+        }
+    }
+
+    bool SkipString() {
+        ++p_;
+        while (p_ != end_) {
+            char c = *p_++;
+            if (c == '"') {
+                return true;
+            }
+            if (c == '\\\\') {
+                if (p_ == end_) {
+                    return false;
+                }
+                ++p_;
+            }
+        }
+        return false;
+    }
+
+    bool SkipKey() {
+        SkipWhitespace();
+        return p_ != end_ && *p_ == '"' && SkipString() && Consume(':');
+    }
+
+    bool SkipScalar() {
+        if (Literal("true") || Literal("false") || Literal("null")) {
+            return true;
+        }
+        const char* end = ScanNumber();
+        if (end == nullptr) {
+            return false;
+        }
+        p_ = end;
+        return true;
+    }
+
+    static bool IsDigit(char c) { return c >= '0' && c <= '9'; }
+
+    // returns the end of the number at the cursor, or nullptr
+    const char* ScanNumber() const {
+        const char* p = p_;
+        if (p != end_ && *p == '-') {
+            ++p;
+        }
+        if (p == end_ || !IsDigit(*p)) {
+            return nullptr;
+        }
+        if (*p++ != '0') {
+            while (p != end_ && IsDigit(*p)) {
+                ++p;
+            }
+        }
+        if (p != end_ && *p == '.') {
+            if (++p == end_ || !IsDigit(*p)) {
+                return nullptr;
+            }
+            while (p != end_ && IsDigit(*p)) {
+                ++p;
+            }
+        }
+        if (p != end_ && (*p == 'e' || *p == 'E')) {
+            if (++p != end_ && (*p == '+' || *p == '-')) {
+                ++p;
+            }
+            if (p == end_ || !IsDigit(*p)) {
+                return nullptr;
+            }
+            while (p != end_ && IsDigit(*p)) {
+                ++p;
+            }
+        }
+        return p;
+    }
+
+    bool Unescape(std::string& out) {
+        while (p_ != end_) {
+            char c = *p_++;
+            if (c == '"') {
+                return true;
+            }
+            if (static_cast<unsigned char>(c) < 0x20) {
+                return false;
+            }
+            if (c != '\\\\') {
+                out.push_back(c);
+                continue;
+            }
+            if (p_ == end_) {
+                return false;
+            }
+            switch (*p_++) {
+                case '"': out.push_back('"'); break;
+                case '\\\\': out.push_back('\\\\'); break;
+                case '/': out.push_back('/'); break;
+                case 'b': out.push_back('\\b'); break;
+                case 'f': out.push_back('\\f'); break;
+                case 'n': out.push_back('\\n'); break;
+                case 'r': out.push_back('\\r'); break;
+                case 't': out.push_back('\\t'); break;
+                case 'u': {
+                    std::uint32_t code = 0;
+                    if (!Hex4(code)) {
+                        return false;
+                    }
+                    if (code >= 0xD800 && code < 0xDC00) {
+                        std::uint32_t low = 0;
+                        if (!Literal("\\\\u") || !Hex4(low) ||
+                            low < 0xDC00 || low >= 0xE000) {
+                            return false;
+                        }
+                        code = 0x10000 + ((code - 0xD800) << 10) +
+                               (low - 0xDC00);
+                    } else if (code >= 0xDC00 && code < 0xE000) {
+                        return false;
+                    }
+                    AppendUtf8(code, out);
+                    break;
+                }
+                default:
+                    return false;
+            }
+        }
+        return false;
+    }
+
+    bool Hex4(std::uint32_t& code) {
+        if (end_ - p_ < 4) {
+            return false;
+        }
+        for (int i = 0; i < 4; ++i) {
+            char c = *p_++;
+            code <<= 4;
+            if (c >= '0' && c <= '9') {
+                code |= c - '0';
+            } else if (c >= 'a' && c <= 'f') {
+                code |= c - 'a' + 10;
+            } else if (c >= 'A' && c <= 'F') {
+                code |= c - 'A' + 10;
+            } else {
+                return false;
+            }
+        }
+        return true;
+    }
+
+    static void AppendUtf8(std::uint32_t code, std::string& out) {
+        if (code < 0x80) {
+            out.push_back(static_cast<char>(code));
+        } else if (code < 0x800) {
+            out.push_back(static_cast<char>(0xC0 | (code >> 6)));
+            out.push_back(static_cast<char>(0x80 | (code & 0x3F)));
+        } else if (code < 0x10000) {
+            out.push_back(static_cast<char>(0xE0 | (code >> 12)));
+            out.push_back(static_cast<char>(0x80 | ((code >> 6) & 0x3F)));
+            out.push_back(static_cast<char>(0x80 | (code & 0x3F)));
+        } else {
+            out.push_back(static_cast<char>(0xF0 | (code >> 18)));
+            out.push_back(static_cast<char>(0x80 | ((code >> 12) & 0x3F)));
+            out.push_back(static_cast<char>(0x80 | ((code >> 6) & 0x3F)));
+            out.push_back(static_cast<char>(0x80 | (code & 0x3F)));
+        }
+    }
+
+    const char* p_;
+    const char* end_;
+};
+
+template <typename T, typename = void>
+struct IsRange : std::false_type {};
+
+template <typename T>
+struct IsRange<T, std::void_t<
+    typename T::value_type, decltype(std::declval<const T&>().begin())>>
+    : std::bool_constant<!std::is_convertible_v<const T&, std::string_view>> {
+};
+
+template <typename T, typename = void>
+struct HasEmplaceBack : std::false_type {};
+
+template <typename T>
+struct HasEmplaceBack<T, std::void_t<
+    decltype(std::declval<T&>().emplace_back())>> : std::true_type {};
+
+// sets get their items in order, the hint makes the insertion cheap
+template <typename T, typename Item>
+void AddItem(T& value, Item&& item) {
+    if constexpr (HasEmplaceBack<T>::value) {
+        value.push_back(std::forward<Item>(item));
+    } else {
+        value.insert(value.end(), std::forward<Item>(item));
+    }
+}
+
+inline void WriteJson(Writer& writer, bool value) {
+    writer.Raw(value ? std::string_view("true") : std::string_view("false"));
+}
+
+template <typename T>
+std::enable_if_t<std::is_arithmetic_v<T> && !std::is_same_v<T, bool>>
+WriteJson(Writer& writer, T value) {
+    writer.Number(value);
+}
+
+inline void WriteJson(Writer& writer, const std::string& value) {
+    writer.String(value);
+}
+
+template <typename T>
+void Write(Writer& writer, const T& value);
+
+// arrays and sets of any container type
+template <typename T>
+std::enable_if_t<IsRange<T>::value> WriteJson(
+    Writer& writer, const T& value) {
+    writer.Raw('[');
+    bool first = true;
+    for (const auto& item : value) {
+        if (!first) {
+            writer.Raw(',');
+        }
+        first = false;
+        Write(writer, item);
+    }
+    writer.Raw(']');
+}
+
+inline bool ReadJson(Reader& reader, bool& value) {
+    if (reader.Literal("true")) {
+        value = true;
+        return true;
+    }
+    if (reader.Literal("false")) {
+        value = false;
+        return true;
+    }
+    return false;
+}
+
+template <typename T>
+std::enable_if_t<std::is_arithmetic_v<T> && !std::is_same_v<T, bool>, bool>
+ReadJson(Reader& reader, T& value) {
+    return reader.Number(value);
+}
+
+inline bool ReadJson(Reader& reader, std::string& value) {
+    std::string_view view;
+    if (!reader.String(view, value)) {
+        return false;
+    }
+    if (view.data() != value.data()) {
+        value.assign(view);
+    }
+    return true;
+}
+
+template <typename T>
+bool Read(Reader& reader, T& value);
+
+template <typename T>
+std::enable_if_t<IsRange<T>::value, bool> ReadJson(Reader& reader, T& value) {
+    using Item = typename T::value_type;
+    value.clear();
+    if (!reader.Consume('[')) {
+        return false;
+    }
+    if (reader.Consume(']')) {
+        return true;
+    }
+    do {
+        // std::vector<bool> has no references to its items
+        if constexpr (HasEmplaceBack<T>::value &&
+                      !std::is_same_v<Item, bool>) {
+            if (!Read(reader, value.emplace_back())) {
+                return false;
+            }
+        } else {
+            Item item{};
+            if (!Read(reader, item)) {
+                return false;
+            }
+            AddItem(value, std::move(item));
+        }
+    } while (reader.Consume(','));
+    return reader.Consume(']');
+}
+
+template <typename T>
+bool ReadJson(Reader& reader, std::optional<T>& value) {
+    if (reader.Literal("null")) {
+        value.reset();
+        return true;
+    }
+    return Read(reader, value.emplace());
+}
+
+// preallocates the items expected by the schema
+template <typename T>
+bool ReadReserved(Reader& reader, T& value, std::size_t capacity) {
+    value.reserve(capacity);
+    return Read(reader, value);
+}
+
+template <typename T>
+bool ReadReserved(
+    Reader& reader, std::optional<T>& value, std::size_t capacity) {
+    if (reader.Literal("null")) {
+        value.reset();
+        return true;
+    }
+    return ReadReserved(reader, value.emplace(), capacity);
+}
+
+// unqualified calls find the generated overloads by ADL
+template <typename T>
+void Write(Writer& writer, const T& value) {
+    WriteJson(writer, value);
+}
+
+template <typename T>
+bool Read(Reader& reader, T& value) {
+    return ReadJson(reader, value);
+}
+
+}  // namespace codegen_json
+
+#endif  // CPP_CODE_GEN_JSON_RUNTIME_V1
+
+''')
+
+OBJECT_DECLARATIONS = Template('''\
+void WriteJson(codegen_json::Writer& writer, const ${name}& value);
+bool ReadJson(codegen_json::Reader& reader, ${name}& result);
+std::string ToJson(const ${name}& value);
+bool FromJson(std::string_view json, ${name}& result);
+
+''')
+
+ENUM_DECLARATIONS = Template('''\
+void WriteJson(codegen_json::Writer& writer, ${name} value);
+bool ReadJson(codegen_json::Reader& reader, ${name}& result);
+
+''')
+
+OBJECT_WRITE = Template('''\
+void WriteJson(codegen_json::Writer& writer, const ${name}& value) {
+    char separator = '{';
+${members}    if (separator == '{') {
+        writer.Raw('{');
+    }
+    writer.Raw('}');
+}
+
+''')
+
+REQUIRED_MEMBER_WRITE = Template('''\
+    writer.Raw(separator);
+    separator = ',';
+    writer.Raw(${key});
+    codegen_json::Write(writer, value.${member});
+''')
+
+OPTIONAL_MEMBER_WRITE = Template('''\
+    if (value.${member}) {
+        writer.Raw(separator);
+        separator = ',';
+        writer.Raw(${key});
+        codegen_json::Write(writer, *value.${member});
+    }
+''')
+
+OBJECT_READ = Template('''\
+bool ReadJson(codegen_json::Reader& reader, ${name}& result) {
+    if (!reader.Consume('{')) {
+        return false;
+    }
+    result = ${name}{};
+${found_init}    if (!reader.Consume('}')) {
+        std::string scratch;
+        do {
+            std::string_view key;
+            if (!reader.String(key, scratch) || !reader.Consume(':')) {
+                return false;
+            }
+${dispatch}            if (!reader.SkipValue()) {
+                return false;
+            }
+        } while (reader.Consume(','));
+        if (!reader.Consume('}')) {
+            return false;
+        }
+    }
+    return ${found_check};
+}
+
+''')
+
+MEMBER_READ = Template('''\
+if (!codegen_json::Read(reader, result.${member})) {
+    return false;
+}
+${found_set}continue;''')
+
+RESERVED_MEMBER_READ = Template('''\
+if (!codegen_json::ReadReserved(reader, result.${member}, ${capacity})) {
+    return false;
+}
+${found_set}continue;''')
+
+OBJECT_CONVERSIONS = Template('''\
+std::string ToJson(const ${name}& value) {
+    std::string json;
+    codegen_json::Writer writer(json);
+    WriteJson(writer, value);
+    return json;
+}
+
+bool FromJson(std::string_view json, ${name}& result) {
+    codegen_json::Reader reader(json);
+    return ReadJson(reader, result) && reader.AtEnd();
+}
+
+''')
+
+ENUM_JSON = Template('''\
+void WriteJson(codegen_json::Writer& writer, ${name} value) {
+    writer.String(ToString(value));
+}
+
+bool ReadJson(codegen_json::Reader& reader, ${name}& result) {
+    std::string scratch;
+    std::string_view value;
+    return reader.String(value, scratch) && FromString(value, result);
+}
+
+''')
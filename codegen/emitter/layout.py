@@ -0,0 +1,205 @@
+"""
+Sizes of the generated structs and the member order minimising
+their padding. Sizes are estimated for libstdc++ on 64-bit targets
+(x86-64, AArch64); the order by alignment is the best one on
+any target.
+"""
+
+from typing import Dict, List
+
+from codegen.parser.models import (
+    ItemRef,
+    ModelArray,
+    ModelInt,
+    ModelItem,
+    ModelItemType,
+    ModelNumber,
+    ModelObject,
+)
+
+
+INT_LAYOUTS = {
+    ModelInt.IntType.Int32: (4, 4),
+    ModelInt.IntType.Int64: (8, 8),
+    ModelInt.IntType.Uint32: (4, 4),
+    ModelInt.IntType.Uint64: (8, 8),
+}
+
+NUMBER_LAYOUTS = {
+    ModelNumber.NumberType.Float: (4, 4),
+    ModelNumber.NumberType.Double: (8, 8),
+}
+
+CONTAINER_LAYOUTS = {
+    ModelArray.Container.Vector: (24, 8),
+    ModelArray.Container.Set: (48, 8),
+    ModelArray.Container.FlatSet: (24, 8),  # a std::vector
+    ModelArray.Container.UnorderedSet: (56, 8),
+}
+
+# std::vector<bool> keeps bit iterators instead of pointers
+BOOL_VECTOR_LAYOUT = (40, 8)
+BOOL_VECTOR_CONTAINERS = frozenset([
+    ModelArray.Container.Vector,
+    ModelArray.Container.FlatSet,  # a std::vector
+])
+
+# the pointer, the size and the capacity after the inline items
+SMALL_VECTOR_HEADER_LAYOUT = (24, 8)
+
+BOOL_LAYOUT = (1, 1)
+STRING_LAYOUT = (32, 8)
+ENUM_LAYOUT = (4, 4)
+
+
+class StructLayout:
+    """
+    sizes of a struct with members in the schema order and
+    in the order by alignment
+    """
+
+    __slots__ = (
+        'name', 'declared_size', 'packed_size', 'alignment', 'member_order'
+    )
+
+    def __init__(
+        self,
+        name: str,
+        declared_size: int,
+        packed_size: int,
+        alignment: int,
+        member_order: List[str],
+    ) -> None:
+        """
+        member_order: property names ordered by alignment
+        """
+
+        self.name = name
+        self.declared_size = declared_size
+        self.packed_size = packed_size
+        self.alignment = alignment
+        self.member_order = member_order
+
+    def get_saved_bytes(self) -> int:
+        return self.declared_size - self.packed_size
+
+
+class LayoutCalculator:
+    """
+    Computes (size, alignment) of the C++ types of linked items,
+    structs are laid out once and remembered
+    """
+
+    def __init__(
+        self,
+        containers: Dict[ModelArray.ArrayType, ModelArray.Container] = None,
+    ) -> None:
+        """
+        containers: containers of the arrays and sets by array type,
+        used when the schema does not choose one
+        """
+
+        self.__containers = containers
+        self.__struct_layouts: Dict[int, StructLayout] = {}
+
+    def get_layout(self, item: ModelItem, packed: bool) -> tuple:
+        """
+        returns (size, alignment) of the C++ type of the item,
+        packed: members of the structs are ordered by alignment
+        """
+
+        item_type = item.get_type()
+        if item_type == ModelItemType.Int:
+            return INT_LAYOUTS[item.int_type]
+        if item_type == ModelItemType.Number:
+            return NUMBER_LAYOUTS[item.number_type]
+        if item_type == ModelItemType.Bool:
+            return BOOL_LAYOUT
+        if item_type == ModelItemType.String:
+            return STRING_LAYOUT if item.enum is None else ENUM_LAYOUT
+        if item_type == ModelItemType.Array:
+            return self.__get_array_layout(item, packed)
+
+        struct_layout = self.get_struct_layout(item, item.name)
+        size = (
+            struct_layout.packed_size if packed
+            else struct_layout.declared_size
+        )
+        return size, struct_layout.alignment
+
+    def __get_array_layout(self, item: ModelArray, packed: bool) -> tuple:
+        container = item.get_container(self.__containers)
+        items = item.items_type.get_target()
+        if container in BOOL_VECTOR_CONTAINERS and (
+            items.get_type() == ModelItemType.Bool
+        ):
+            return BOOL_VECTOR_LAYOUT
+        if container != ModelArray.Container.SmallVector:
+            return CONTAINER_LAYOUTS[container]
+
+        item_size, item_alignment = self.get_layout(items, packed)
+        inline_size = item.get_inline_capacity() * item_size
+        return get_struct_size([
+            (inline_size, item_alignment), SMALL_VECTOR_HEADER_LAYOUT
+        ]), max(item_alignment, SMALL_VECTOR_HEADER_LAYOUT[1])
+
+    def get_struct_layout(
+        self, item: ModelObject, name: str
+    ) -> StructLayout:
+        struct_layout = self.__struct_layouts.get(id(item))
+        if struct_layout is not None:
+            struct_layout.name = name
+            return struct_layout
+
+        declared = self.__get_member_layouts(item, packed=False)
+        packed = self.__get_member_layouts(item, packed=True)
+        # the sort is stable, equally aligned members keep their order
+        member_order = sorted(
+            packed, key=lambda property_name: -packed[property_name][1]
+        )
+        struct_layout = self.__struct_layouts[id(item)] = StructLayout(
+            name,
+            get_struct_size(declared.values()),
+            get_struct_size(map(packed.get, member_order)),
+            max((layout[1] for layout in packed.values()), default=1),
+            member_order,
+        )
+        return struct_layout
+
+    def __get_member_layouts(
+        self, item: ModelObject, packed: bool
+    ) -> Dict[str, tuple]:
+        required = set(item.required)
+        return {
+            property_name: self.__get_member_layout(
+                item_ref, property_name in required, packed
+            )
+            for property_name, item_ref in item.properties.items()
+        }
+
+    def __get_member_layout(
+        self, item_ref: ItemRef, required: bool, packed: bool
+    ) -> tuple:
+        size, alignment = self.get_layout(item_ref.get_target(), packed)
+        if required:
+            return size, alignment
+        # std::optional adds a flag after the value
+        return align(size + 1, alignment), alignment
+
+
+def get_struct_size(member_layouts) -> int:
+    """
+    member_layouts: (size, alignment) of the members in their order
+    """
+
+    offset = 0
+    struct_alignment = 1
+    for size, alignment in member_layouts:
+        offset = align(offset, alignment) + size
+        struct_alignment = max(struct_alignment, alignment)
+    # an empty struct still takes a byte
+    return align(max(offset, 1), struct_alignment)
+
+
+def align(offset: int, alignment: int) -> int:
+    return (offset + alignment - 1) // alignment * alignment
@@ -0,0 +1,74 @@
+import re
+from typing import Dict
+
+
+CPP_KEYWORDS = frozenset([
+    'alignas', 'alignof', 'and', 'and_eq', 'asm', 'auto', 'bitand',
+    'bitor', 'bool', 'break', 'case', 'catch', 'char', 'char8_t',
+    'char16_t', 'char32_t', 'class', 'compl', 'concept', 'const',
+    'consteval', 'constexpr', 'constinit', 'const_cast', 'continue',
+    'co_await', 'co_return', 'co_yield', 'decltype', 'default', 'delete',
+    'do', 'double', 'dynamic_cast', 'else', 'enum', 'explicit', 'export',
+    'extern', 'false', 'float', 'for', 'friend', 'goto', 'if', 'inline',
+    'int', 'long', 'mutable', 'namespace', 'new', 'noexcept', 'not',
+    'not_eq', 'nullptr', 'operator', 'or', 'or_eq', 'private',
+    'protected', 'public', 'register', 'reinterpret_cast', 'requires',
+    'return', 'short', 'signed', 'sizeof', 'static', 'static_assert',
+    'static_cast', 'struct', 'switch', 'template', 'this',
+    'thread_local', 'throw', 'true', 'try', 'typedef', 'typeid',
+    'typename', 'union', 'unsigned', 'using', 'virtual', 'void',
+    'volatile', 'wchar_t', 'while', 'xor', 'xor_eq',
+])
+
+_INVALID_CHARS = re.compile(r'[^0-9a-zA-Z_]+')
+_WORDS = re.compile(r'[0-9a-zA-Z]+')
+
+
+def to_identifier(name: str) -> str:
+    """
+    turns an arbitrary schema name into a valid C++ identifier
+    """
+
+    identifier = _INVALID_CHARS.sub('_', str(name)) or '_'
+    if identifier[0].isdigit():
+        identifier = '_' + identifier
+    if identifier in CPP_KEYWORDS:
+        identifier += '_'
+    return identifier
+
+
+def to_camel_case(name: str) -> str:
+    words = _WORDS.findall(str(name))
+    return ''.join(word[0].upper() + word[1:] for word in words)
+
+
+def to_enum_constants(values) -> Dict[str, str]:
+    """
+    maps enum values to unique constant names like kInProgress
+    """
+
+    constants = {}
+    used = set()
+    for value in values:
+        constant = 'k' + (to_camel_case(value) or 'Value')
+        unique_constant = constant
+        index = 1
+        while unique_constant in used:
+            unique_constant = '{}{}'.format(constant, index)
+            index += 1
+        used.add(unique_constant)
+        constants[value] = unique_constant
+    return constants
+
+
+_ESCAPES = {'\\': '\\\\', '"': '\\"', '\n': '\\n', '\t': '\\t'}
+_SPECIAL_CHARS = re.compile(r'[\\"\x00-\x1f\x7f]')
+
+
+def _escape(match) -> str:
+    char = match.group()
+    return _ESCAPES.get(char) or '\\{:03o}'.format(ord(char))
+
+
+def to_string_literal(value: str) -> str:
+    return '"{}"'.format(_SPECIAL_CHARS.sub(_escape, value))
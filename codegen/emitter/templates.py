@@ -0,0 +1,114 @@
+"""
+C++ templates, compiled once per process
+"""
+
+import re
+
+
+class Template:
+    """
+    ${name} placeholders are compiled once into a str.format() pattern,
+    so substitution is a single call into C
+    """
+
+    __PLACEHOLDER = re.compile(r'\$\{(\w+)\}')
+
+    def __init__(self, template: str) -> None:
+        parts = Template.__PLACEHOLDER.split(template)
+        # literal text and placeholder names alternate
+        self.__pattern = ''.join(
+            '{' + part + '}' if index % 2
+            else part.replace('{', '{{').replace('}', '}}')
+            for index, part in enumerate(parts)
+        )
+
+    def substitute(self, **values) -> str:
+        return self.__pattern.format_map(values)
+
+
+HEADER_FILE = Template('''\
+// Generated by cpp-code-gen ${version}. Do not edit.
+#pragma once
+
+${includes}
+${prelude}${namespace_begin}${declarations}${namespace_end}${epilogue}''')
+
+SOURCE_FILE = Template('''\
+// Generated by cpp-code-gen ${version}. Do not edit.
+#include "${header_name}"
+
+${namespace_begin}${definitions}${namespace_end}''')
+
+INCLUDE = Template('#include <${header}>\n')
+
+NAMESPACE_BEGIN = Template('namespace ${namespace} {\n\n')
+
+NAMESPACE_END = Template('}  // namespace ${namespace}\n')
+
+COMMENT_LINE = Template('${indent}// ${line}\n')
+
+ALIAS = Template('using ${name} = ${type};\n\n')
+
+STRUCT = Template('''\
+struct ${name} {
+${members}};
+
+''')
+
+MEMBER = Template('    ${type} ${name};\n')
+
+# reordered structs keep construction in the schema order
+CONSTRUCTOR_DECLARATIONS = Template('''\
+    ${name}() = default;
+    ${name}(
+${parameters});
+
+''')
+
+CONSTRUCTOR = Template('''\
+${name}::${name}(
+${parameters})
+    : ${initializers} {}
+
+''')
+
+PARAMETER = Template('${indent}${type} ${name}')
+
+MEMBER_INITIALIZER = Template('${name}(std::move(${name}))')
+
+ENUM = Template('''\
+enum class ${name} {
+${constants}};
+
+std::string_view ToString(${name} value);
+bool FromString(std::string_view value, ${name}& result);
+
+''')
+
+ENUM_CONSTANT = Template('    ${constant},\n')
+
+ENUM_TO_STRING = Template('''\
+std::string_view ToString(${name} value) {
+    switch (value) {
+${cases}    }
+    return {};
+}
+
+''')
+
+ENUM_TO_STRING_CASE = Template('''\
+        case ${name}::${constant}:
+            return ${literal};
+''')
+
+# values are matched by their length and characters (see dispatch)
+ENUM_FROM_STRING = Template('''\
+bool FromString(std::string_view value, ${name}& result) {
+${dispatch}    return false;
+}
+
+''')
+
+ENUM_FROM_STRING_MATCH = Template('''\
+result = ${name}::${constant};
+return true;''')
@@ -0,0 +1,41 @@
+"""
+Logging of the generator
+
+Every module logs to a child of the 'codegen' logger. Per-item records
+are emitted at DEBUG level only and are guarded with isEnabledFor(), so
+with the default WARNING level the parse loop does no formatting at all.
+"""
+
+import logging
+
+
+LOGGER_NAME = 'codegen'
+LOG_FORMAT = '%(levelname)s %(name)s: %(message)s'
+
+_handler = None
+
+
+def configure(level: int) -> None:
+    """
+    reports records of the codegen loggers at the given level
+    and above to stderr
+    """
+
+    global _handler
+
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(level)
+    # the handler is replaced to follow the current sys.stderr
+    if _handler is not None:
+        logger.removeHandler(_handler)
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    logger.addHandler(_handler)
+
+
+def get_configured_level() -> int:
+    """
+    returns the level set by configure() or logging.NOTSET
+    """
+
+    return logging.getLogger(LOGGER_NAME).level
@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import tempfile
+from functools import lru_cache
+from typing import Dict
+
+import codegen.stats as stats
+
+
+class OutputWriter:
+    """
+    Writes generated files only when their content changes, so mtimes
+    of unchanged files are preserved and C++ builds are not triggered.
+    Changed files are replaced atomically.
+    An optional manifest of previously written hashes lets unchanged
+    files be skipped by stat() alone, without reading them back.
+    In dry_run mode changed files are only counted, nothing is written.
+    """
+
+    def __init__(
+        self, manifest_path: str = None, dry_run: bool = False
+    ) -> None:
+        self.manifest_path = manifest_path
+        self.dry_run = dry_run
+        self.written = 0
+        self.skipped = 0
+        self.bytes_written = 0
+        self.__manifest: Dict[str, dict] = {}
+        self.__manifest_changed = False
+        if manifest_path:
+            self.__manifest = OutputWriter.__load_manifest(manifest_path)
+
+    def write(self, path: str, content: str) -> bool:
+        """
+        returns False if the file already has the same content
+        """
+
+        data = content.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        if self.__is_unchanged(path, data, digest):
+            self.skipped += 1
+            stats.count(stats.FILES_SKIPPED)
+            return False
+
+        self.written += 1
+        self.bytes_written += len(data)
+        stats.count(stats.FILES_WRITTEN)
+        stats.count(stats.BYTES_WRITTEN, len(data))
+        if self.dry_run:
+            return True
+        _write_atomically(path, data)
+        if self.manifest_path:
+            self.__remember(path, digest)
+        return True
+
+    def save_manifest(self) -> None:
+        if (
+            not self.manifest_path
+            or not self.__manifest_changed
+            or self.dry_run
+        ):
+            return
+        data = json.dumps(self.__manifest, indent=1, sort_keys=True)
+        _write_atomically(self.manifest_path, data.encode('utf-8'))
+        self.__manifest_changed = False
+
+    def __is_unchanged(self, path: str, data: bytes, digest: str) -> bool:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return False
+        if stat.st_size != len(data):
+            return False
+
+        entry = self.__manifest.get(os.path.abspath(path))
+        if entry is not None and entry['mtime_ns'] == stat.st_mtime_ns:
+            return entry['sha256'] == digest
+
+        with open(path, 'rb') as file:
+            is_unchanged = file.read() == data
+        if is_unchanged and self.manifest_path:
+            self.__remember(path, digest)
+        return is_unchanged
+
+    def __remember(self, path: str, digest: str) -> None:
+        self.__manifest[os.path.abspath(path)] = {
+            'sha256': digest,
+            'mtime_ns': os.stat(path).st_mtime_ns,
+        }
+        self.__manifest_changed = True
+
+    @staticmethod
+    def __load_manifest(manifest_path: str) -> Dict[str, dict]:
+        try:
+            with open(manifest_path, 'r') as file:
+                manifest = json.load(file)
+        except (FileNotFoundError, ValueError):
+            return {}
+        return manifest if isinstance(manifest, dict) else {}
+
+
+@lru_cache(maxsize=None)
+def _get_file_mode() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def _write_atomically(path: str, data: bytes) -> None:
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix='.' + os.path.basename(path), suffix='.tmp'
+    )
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+        os.chmod(tmp_path, _get_file_mode())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
@@ -0,0 +1,111 @@
+from typing import Dict, Iterator, List, Tuple
+
+import codegen.parser.utils as utils
+import codegen.stats as stats
+from codegen.parser.models import ItemRef, ModelItem
+
+
+class Linker:
+    """
+    Resolves '#' references of the parsed items against the items
+    index and computes the order of items in which every item
+    follows all the items it depends on.
+    """
+
+    def __init__(self, model_items: Dict[str, ModelItem]) -> None:
+        self.__model_items = model_items
+
+    def get_item(self, name: str) -> ModelItem:
+        return self.__model_items.get(name)
+
+    def link(self) -> List[ModelItem]:
+        """
+        resolves all the references and returns the items
+        in the dependency order.
+        All the dangling references are reported together.
+        """
+
+        with stats.span('link'):
+            self.resolve()
+            return self.get_dependency_order()
+
+    def resolve(self) -> None:
+        dangling_refs = []
+        for item in self.__model_items.values():
+            for item_ref in iter_item_refs(item):
+                if not item_ref.is_ref():
+                    continue
+                target = self.__model_items.get(item_ref.get_ref())
+                if target is None:
+                    dangling_refs.append((item.name, item_ref.get_ref()))
+                item_ref.resolve(target)
+
+        if dangling_refs:
+            raise utils.ParsingErrors([
+                utils.ErrorRecord(
+                    definition=name,
+                    message='unknown item \'{}\''.format(ref),
+                )
+                for name, ref in dangling_refs
+            ])
+
+    def get_dependency_order(self) -> List[ModelItem]:
+        """
+        returns items topologically sorted by their references,
+        keeping the definition order wherever possible
+        """
+
+        not_visited, in_progress, visited = 0, 1, 2
+        states = dict.fromkeys(self.__model_items, not_visited)
+        order = []
+
+        for root_name in self.__model_items:
+            if states[root_name] == visited:
+                continue
+
+            # iterative DFS, the stack holds (name, pending dependencies)
+            states[root_name] = in_progress
+            stack: List[Tuple[str, Iterator[str]]] = [
+                (root_name, self.__iter_dependencies(root_name))
+            ]
+            while stack:
+                name, dependencies = stack[-1]
+                dependency = next(dependencies, None)
+                if dependency is None:
+                    stack.pop()
+                    states[name] = visited
+                    order.append(self.__model_items[name])
+                    continue
+
+                state = states.get(dependency, visited)
+                if state == not_visited:
+                    states[dependency] = in_progress
+                    stack.append(
+                        (dependency, self.__iter_dependencies(dependency))
+                    )
+                elif state == in_progress:
+                    cycle = [entry[0] for entry in stack]
+                    cycle = cycle[cycle.index(dependency):] + [dependency]
+                    raise utils.ParsingError(
+                        'circular reference: {}'.format(' -> '.join(cycle))
+                    )
+
+        return order
+
+    def __iter_dependencies(self, name: str) -> Iterator[str]:
+        return iter(self.__model_items[name].get_references())
+
+
+def iter_item_refs(item: ModelItem) -> Iterator[ItemRef]:
+    """
+    yields refs of the item and all of its nested items
+    """
+
+    pending_refs = list(reversed(item.get_item_refs()))
+    while pending_refs:
+        item_ref = pending_refs.pop()
+        yield item_ref
+        if item_ref.is_item():
+            pending_refs.extend(
+                reversed(item_ref.get_item().get_item_refs())
+            )
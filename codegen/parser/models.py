@@ -1,5 +1,7 @@
+import sys
 from enum import Enum
-from typing import List
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple
 
 import codegen.parser.utils as utils
 
@@ -11,6 +13,9 @@ class Keys:
     ENUM = 'enum'
     ARR_TYPE = 'array_type'
     ITEMS = 'items'
+    CONTAINER = 'container'
+    INLINE_CAPACITY = 'inline_capacity'
+    RESERVE = 'reserve'
     PROPERTIES = 'properties'
     REQUIRED = 'required'
 
@@ -26,6 +31,10 @@ class ModelItemType(Enum):
 
 
 def get_item_type(item: dict, item_name: str) -> ModelItemType:
+    if not isinstance(item, dict):
+        raise utils.ParsingError(
+            'item {} must be a dictionary, got {!r}'.format(item_name, item)
+        )
     if Keys.TYPE not in item:
         raise utils.ParsingError(
             'field \'type\' is required for item {}'.format(item_name)
@@ -38,16 +47,74 @@ def get_item_type(item: dict, item_name: str) -> ModelItemType:
     )
 
 
-class ModelItem:
-    def __init__(self, name: str, allowed_fields: list = []) -> None:
+@lru_cache(maxsize=None)
+def _get_slots(cls) -> Tuple[str, ...]:
+    """
+    returns all the slots of the class including the inherited ones
+    """
+    return tuple(
+        _mangle(klass, slot)
+        for klass in reversed(cls.__mro__)
+        for slot in klass.__dict__.get('__slots__', ())
+    )
+
+
+def _mangle(cls, attribute: str) -> str:
+    if attribute.startswith('__') and not attribute.endswith('__'):
+        return '_{}{}'.format(cls.__name__.lstrip('_'), attribute)
+    return attribute
+
+
+class _SlotsModel:
+    """
+    Compact base for model objects: no per-instance __dict__,
+    equality and repr are built from the slots
+    """
+
+    __slots__ = ()
+
+    def __eq__(self, other) -> bool:
+        if type(self) is not type(other):
+            return NotImplemented
+        return all(
+            getattr(self, slot) == getattr(other, slot)
+            for slot in _get_slots(type(self))
+        )
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return '{}({})'.format(
+            type(self).__name__,
+            ', '.join(
+                '{}={!r}'.format(slot.split('__')[-1], getattr(self, slot))
+                for slot in _get_slots(type(self))
+            ),
+        )
+
+
+class ModelItem(_SlotsModel):
+    __slots__ = ('id', 'name', 'description')
+
+    # fields allowed in the item_dict, shared by all the instances
+    ALLOWED_FIELDS: FrozenSet[str] = frozenset([
+        Keys.TYPE,
+        Keys.DESCRIPTION,
+    ])
+
+    def __init__(self, name: str) -> None:
         self.id = ''  # TODO generate some rand value
-        self.name: str = name
+        # YAML keys may be e.g. numbers
+        self.name: str = sys.intern(str(name))
         self.description: str = ''
-        self.__allowed_fields: List[str] = allowed_fields + [
-            Keys.TYPE, Keys.DESCRIPTION
-        ]
 
-    def parse(self, item_dict: dict) -> None:
+    def parse(
+        self, item_dict: dict, nested_items: 'NestedItems' = None
+    ) -> None:
+        """
+        nested_items: shares structurally identical inline items
+        """
+
         self.__check_allowed_fields(item_dict)
         if Keys.DESCRIPTION in item_dict:
             description = item_dict[Keys.DESCRIPTION]
@@ -59,35 +126,84 @@ class ModelItem:
             self.description = description
 
     def __check_allowed_fields(self, item_dict: dict) -> None:
+        if self.ALLOWED_FIELDS.issuperset(item_dict):
+            return
         for item in item_dict:
-            if item not in self.__allowed_fields:
+            if item not in self.ALLOWED_FIELDS:
                 raise utils.ParsingError(
                     msg='unknown field \'{}\''.format(item),
                     context=self.name,
                 )
 
+    def get_item_refs(self) -> List['ItemRef']:
+        """
+        returns refs to the nested and referenced items
+        this item directly consists of
+        """
+        return []
+
+    def get_nested_items(self) -> List[Tuple[str, 'ModelItem']]:
+        """
+        returns inline items this item directly consists of
+        together with the names of their fields
+        """
+        return []
+
+    def get_references(self) -> List[str]:
+        """
+        returns names of the items referenced by this item
+        and its nested items
+        """
+        references = []
+        for item_ref in self.get_item_refs():
+            if item_ref.is_ref():
+                references.append(item_ref.get_ref())
+            elif item_ref.is_item():
+                references.extend(item_ref.get_item().get_references())
+        return references
+
     @staticmethod
     def get_type() -> ModelItemType:
         return ModelItemType.Item
 
 
-class ItemRef:
+# item classes by their types, filled in with register_item_type
+ITEM_TYPES: Dict[ModelItemType, type] = {}
+
+
+def register_item_type(item_class: type) -> type:
+    ITEM_TYPES[item_class.get_type()] = item_class
+    return item_class
+
+
+class ItemRef(_SlotsModel):
     """
     ItemRef may be a nested ModelItem or
     a reference to other type
     """
 
+    __slots__ = ('__ref', '__item', '__target')
+
     def __init__(self) -> None:
         self.__ref: str = None
         self.__item: ModelItem = None
+        self.__target: ModelItem = None
 
     def set_ref(self, ref: str) -> None:
-        self.__ref = ref
+        self.__ref = sys.intern(ref)
         self.__item = None
+        self.__target = None
 
     def set_item(self, item: ModelItem) -> None:
         self.__item = item
         self.__ref = None
+        self.__target = None
+
+    def resolve(self, target: ModelItem) -> None:
+        """
+        binds a reference to the item it refers to
+        """
+        self.__target = target
 
     def get_item(self) -> ModelItem:
         return self.__item
@@ -95,6 +211,21 @@ class ItemRef:
     def get_ref(self) -> str:
         return self.__ref
 
+    def get_target(self) -> ModelItem:
+        """
+        returns the nested item or the resolved referenced one
+        """
+        return self.__item if self.__item is not None else self.__target
+
+    def is_resolved(self) -> bool:
+        return self.get_target() is not None
+
+    def __eq__(self, other) -> bool:
+        # resolved targets are not compared to avoid deep recursion
+        if not isinstance(other, ItemRef):
+            return NotImplemented
+        return self.__ref == other.__ref and self.__item == other.__item
+
     def is_ref(self) -> bool:
         return self.__ref is not None
 
@@ -102,6 +233,7 @@ class ItemRef:
         return self.__item is not None
 
 
+@register_item_type
 class ModelInt(ModelItem):
     class IntType(Enum):
         Uint32 = 'uint32'
@@ -109,12 +241,18 @@ class ModelInt(ModelItem):
         Int32 = 'int32'
         Int64 = 'int64'
 
+    __slots__ = ('int_type',)
+
+    ALLOWED_FIELDS = ModelItem.ALLOWED_FIELDS | {Keys.FORMAT}
+
     def __init__(self, name: str) -> None:
-        super().__init__(name, allowed_fields=[Keys.FORMAT])
+        super().__init__(name)
         self.int_type = ModelInt.IntType.Int32
 
-    def parse(self, item_dict: dict) -> None:
-        super().parse(item_dict)
+    def parse(
+        self, item_dict: dict, nested_items: 'NestedItems' = None
+    ) -> None:
+        super().parse(item_dict, nested_items)
         if Keys.FORMAT in item_dict:
             int_type_str = item_dict[Keys.FORMAT]
             self.int_type = utils.parse_enum(
@@ -129,17 +267,24 @@ class ModelInt(ModelItem):
         return ModelItemType.Int
 
 
+@register_item_type
 class ModelNumber(ModelItem):
     class NumberType(Enum):
         Float = 'float'
         Double = 'double'
 
+    __slots__ = ('number_type',)
+
+    ALLOWED_FIELDS = ModelItem.ALLOWED_FIELDS | {Keys.FORMAT}
+
     def __init__(self, name: str) -> None:
-        super().__init__(name, allowed_fields=[Keys.FORMAT])
+        super().__init__(name)
         self.number_type = ModelNumber.NumberType.Float
 
-    def parse(self, item_dict: dict) -> None:
-        super().parse(item_dict)
+    def parse(
+        self, item_dict: dict, nested_items: 'NestedItems' = None
+    ) -> None:
+        super().parse(item_dict, nested_items)
         if Keys.FORMAT in item_dict:
             num_type_str = item_dict[Keys.FORMAT]
             self.number_type = utils.parse_enum(
@@ -154,7 +299,10 @@ class ModelNumber(ModelItem):
         return ModelItemType.Number
 
 
+@register_item_type
 class ModelBool(ModelItem):
+    __slots__ = ()
+
     def __init__(self, name: str) -> None:
         super().__init__(name)
 
@@ -163,17 +311,26 @@ class ModelBool(ModelItem):
         return ModelItemType.Bool
 
 
+@register_item_type
 class ModelString(ModelItem):
-    class StringEnum:
+    class StringEnum(_SlotsModel):
+        __slots__ = ('enum_list',)
+
         def __init__(self, enum_list: List[str]) -> None:
-            self.enum_list = enum_list
+            self.enum_list = [sys.intern(value) for value in enum_list]
+
+    __slots__ = ('enum',)
+
+    ALLOWED_FIELDS = ModelItem.ALLOWED_FIELDS | {Keys.ENUM}
 
     def __init__(self, name: str) -> None:
-        super().__init__(name, allowed_fields=[Keys.ENUM])
+        super().__init__(name)
         self.enum: ModelString.StringEnum = None
 
-    def parse(self, item_dict: dict) -> None:
-        super().parse(item_dict)
+    def parse(
+        self, item_dict: dict, nested_items: 'NestedItems' = None
+    ) -> None:
+        super().parse(item_dict, nested_items)
         if Keys.ENUM in item_dict:
             self.__parse_enum(item_dict[Keys.ENUM])
 
@@ -200,22 +357,60 @@ class ModelString(ModelItem):
         return ModelItemType.String
 
 
+@register_item_type
 class ModelArray(ModelItem):
     class ArrayType(Enum):
         Array = 'array'
         Set = 'set'
 
+    class Container(Enum):
+        Vector = 'vector'
+        SmallVector = 'small_vector'
+        Set = 'set'
+        FlatSet = 'flat_set'
+        UnorderedSet = 'unordered_set'
+
+    CONTAINERS = {
+        ArrayType.Array: (Container.Vector, Container.SmallVector),
+        ArrayType.Set: (
+            Container.Set, Container.FlatSet, Container.UnorderedSet
+        ),
+    }
+
+    DEFAULT_CONTAINERS = {
+        ArrayType.Array: Container.Vector,
+        ArrayType.Set: Container.Set,
+    }
+
+    DEFAULT_INLINE_CAPACITY = 4
+
+    __slots__ = (
+        'array_type', 'items_type', 'container', 'inline_capacity', 'reserve'
+    )
+
+    ALLOWED_FIELDS = ModelItem.ALLOWED_FIELDS | {
+        Keys.ARR_TYPE,
+        Keys.ITEMS,
+        Keys.CONTAINER,
+        Keys.INLINE_CAPACITY,
+        Keys.RESERVE,
+    }
+
     def __init__(self, name: str) -> None:
-        super().__init__(name, allowed_fields=[
-            Keys.ARR_TYPE,
-            Keys.ITEMS,
-        ])
+        super().__init__(name)
         self.array_type = ModelArray.ArrayType.Array
         self.items_type: ItemRef = None
-
-    def parse(self, item_dict: dict) -> None:
-        super().parse(item_dict)
-        self.__parse_items(item_dict)
+        # None stands for the default container of the array type
+        self.container: ModelArray.Container = None
+        self.inline_capacity: int = None
+        # number of items to preallocate when decoding
+        self.reserve: int = None
+
+    def parse(
+        self, item_dict: dict, nested_items: 'NestedItems' = None
+    ) -> None:
+        super().parse(item_dict, nested_items)
+        self.__parse_items(item_dict, nested_items)
         if Keys.ARR_TYPE in item_dict:
             arr_type_str = item_dict[Keys.ARR_TYPE]
             self.array_type = utils.parse_enum(
@@ -224,8 +419,78 @@ class ModelArray(ModelItem):
                 enum_name=Keys.ARR_TYPE,
                 owner_name=self.name,
             )
+        self.__parse_container(item_dict)
+
+    def get_container(
+        self, defaults: Dict[ArrayType, Container] = None
+    ) -> Container:
+        """
+        defaults: containers by array type, used when the schema
+        does not choose one
+        """
+
+        if self.container is not None:
+            return self.container
+        return (defaults or ModelArray.DEFAULT_CONTAINERS)[self.array_type]
+
+    def get_inline_capacity(self) -> int:
+        if self.inline_capacity is None:
+            return ModelArray.DEFAULT_INLINE_CAPACITY
+        return self.inline_capacity
+
+    def __parse_container(self, item_dict: dict) -> None:
+        if Keys.CONTAINER in item_dict:
+            self.container = utils.parse_enum(
+                value=item_dict[Keys.CONTAINER],
+                enum=ModelArray.Container,
+                enum_name=Keys.CONTAINER,
+                owner_name=self.name,
+            )
+            if self.container not in ModelArray.CONTAINERS[self.array_type]:
+                raise utils.ParsingError(
+                    msg='container {} does not fit {} {}'.format(
+                        self.container.value,
+                        Keys.ARR_TYPE,
+                        self.array_type.value,
+                    ),
+                    context=self.name,
+                )
+
+        if Keys.INLINE_CAPACITY in item_dict:
+            # arrays without a container may get small vectors globally
+            if self.container not in (
+                None, ModelArray.Container.SmallVector
+            ) or self.array_type != ModelArray.ArrayType.Array:
+                raise utils.ParsingError(
+                    msg='field {} requires container {}'.format(
+                        Keys.INLINE_CAPACITY,
+                        ModelArray.Container.SmallVector.value,
+                    ),
+                    context=self.name,
+                )
+            self.inline_capacity = _parse_count(
+                item_dict[Keys.INLINE_CAPACITY],
+                Keys.INLINE_CAPACITY,
+                self.name,
+                minimum=1,
+            )
 
-    def __parse_items(self, item_dict: dict) -> None:
+        if Keys.RESERVE in item_dict:
+            # sets without a container ignore the hint if left std::set
+            if self.container == ModelArray.Container.Set:
+                raise utils.ParsingError(
+                    msg='field {} is not supported by std::set'.format(
+                        Keys.RESERVE
+                    ),
+                    context=self.name,
+                )
+            self.reserve = _parse_count(
+                item_dict[Keys.RESERVE], Keys.RESERVE, self.name, minimum=0
+            )
+
+    def __parse_items(
+        self, item_dict: dict, nested_items: 'NestedItems'
+    ) -> None:
         if Keys.ITEMS not in item_dict or not item_dict[Keys.ITEMS]:
             raise utils.ParsingError(
                 msg='array requires field {}'.format(Keys.ITEMS),
@@ -233,31 +498,52 @@ class ModelArray(ModelItem):
             )
 
         items_field = item_dict[Keys.ITEMS]
-        self.items_type = parse_ref_or_nested_item(items_field, self.name)
+        self.items_type = parse_ref_or_nested_item(
+            items_field,
+            self.name,
+            utils.get_nested_item_name(self.name, Keys.ITEMS),
+            nested_items,
+        )
+
+    def get_item_refs(self) -> List[ItemRef]:
+        if self.items_type is None:
+            return []
+        return [self.items_type]
+
+    def get_nested_items(self) -> List[Tuple[str, ModelItem]]:
+        if self.items_type is None or not self.items_type.is_item():
+            return []
+        return [(Keys.ITEMS, self.items_type.get_item())]
 
     @staticmethod
     def get_type() -> ModelItemType:
         return ModelItemType.Array
 
 
+@register_item_type
 class ModelObject(ModelItem):
-    def __init__(self, name: str) -> None:
-        super().__init__(
-            name=name,
-            allowed_fields=[
-                Keys.PROPERTIES,
-                Keys.REQUIRED,
-            ],
-        )
-        self.properties: List(ItemRef) = {}
-        self.required: List(str) = []
+    __slots__ = ('properties', 'required')
+
+    ALLOWED_FIELDS = ModelItem.ALLOWED_FIELDS | {
+        Keys.PROPERTIES,
+        Keys.REQUIRED,
+    }
 
-    def parse(self, item_dict: dict) -> None:
-        super().parse(item_dict)
-        self.__parse_properties(item_dict)
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self.properties: Dict[str, ItemRef] = {}
+        self.required: List[str] = []
+
+    def parse(
+        self, item_dict: dict, nested_items: 'NestedItems' = None
+    ) -> None:
+        super().parse(item_dict, nested_items)
+        self.__parse_properties(item_dict, nested_items)
         self.__parse_required(item_dict)
 
-    def __parse_properties(self, item_dict: dict) -> None:
+    def __parse_properties(
+        self, item_dict: dict, nested_items: 'NestedItems'
+    ) -> None:
         if Keys.PROPERTIES not in item_dict:
             raise utils.ParsingError(
                 msg='field \'{}\' is required'.format(Keys.PROPERTIES),
@@ -272,8 +558,13 @@ class ModelObject(ModelItem):
             )
 
         for name, property in props_field.items():
-            ref = parse_ref_or_nested_item(property, self.name)
-            self.properties[name] = ref
+            ref = parse_ref_or_nested_item(
+                property,
+                self.name,
+                utils.get_nested_item_name(self.name, str(name)),
+                nested_items,
+            )
+            self.properties[sys.intern(str(name))] = ref
 
     def __parse_required(self, item_dict: dict) -> None:
         if Keys.REQUIRED not in item_dict:
@@ -293,6 +584,16 @@ class ModelObject(ModelItem):
                 raise utils.ParsingError(msg=error_msg, context=self.name)
             self.required.append(item)
 
+    def get_item_refs(self) -> List[ItemRef]:
+        return list(self.properties.values())
+
+    def get_nested_items(self) -> List[Tuple[str, ModelItem]]:
+        return [
+            (name, item_ref.get_item())
+            for name, item_ref in self.properties.items()
+            if item_ref.is_item()
+        ]
+
     @staticmethod
     def get_type() -> ModelItemType:
         return ModelItemType.Object
@@ -301,26 +602,51 @@ class ModelObject(ModelItem):
 def create_item(
         name: str, type: ModelItemType
 ) -> ModelItem:
-    types_factory_mapping = {
-        ModelInt.get_type():     ModelInt,
-        ModelNumber.get_type():  ModelNumber,
-        ModelBool.get_type():    ModelBool,
-        ModelString.get_type():  ModelString,
-        ModelArray.get_type():   ModelArray,
-        ModelObject.get_type():  ModelObject,
-    }
-
-    if type not in types_factory_mapping:
-        raise RuntimeError('unknown type object {}'.format(type))
-
-    item_factory = types_factory_mapping[type]
+    item_factory = ITEM_TYPES.get(type)
+    if item_factory is None:
+        raise utils.ParsingError(
+            msg='field {} has invalid value \'{}\''.format(
+                Keys.TYPE, type.value
+            ),
+            context=name,
+        )
     return item_factory(name)
 
 
-def parse_ref_or_nested_item(field, parent_name: str) -> ItemRef:
+class NestedItems:
+    """
+    Interning table of inline items: structurally identical inline
+    definitions (e.g. the same shape repeated in many objects) are
+    parsed once and the parsed item is shared by all of its owners.
+    The shared item keeps the name of its first owner.
+    """
+
+    def __init__(self) -> None:
+        self.__items: Dict[str, ModelItem] = {}
+
+    def get_or_parse(self, item_dict: dict, name: str) -> ModelItem:
+        # repr() of parsed YAML is unambiguous and keeps the key order
+        key = repr(item_dict)
+        item = self.__items.get(key)
+        if item is None:
+            item = _parse_nested_item(item_dict, name, self)
+            self.__items[key] = item
+        return item
+
+    def __len__(self) -> int:
+        return len(self.__items)
+
+
+def parse_ref_or_nested_item(
+    field,
+    parent_name: str,
+    item_name: str,
+    nested_items: NestedItems = None,
+) -> ItemRef:
     """
     Checks whether the specified field of the object is a reference
     or a nested object and raises an error if it is something else.
+    Nested objects are named item_name.
     """
 
     is_reference = utils.is_reference(field)
@@ -336,11 +662,85 @@ def parse_ref_or_nested_item(field, parent_name: str) -> ItemRef:
     result = ItemRef()
     if is_reference:
         result.set_ref(utils.get_referenced_item_name(field))
+    elif nested_items is None:
+        result.set_item(_parse_nested_item(field, item_name, None))
     else:
-        name = '{}Items'.format(parent_name)
-        type = get_item_type(item=field, item_name=name)
-        item = create_item(name, type)
-        item.parse(field)
-        result.set_item(item)
+        result.set_item(nested_items.get_or_parse(field, item_name))
 
     return result
+
+
+def _parse_count(
+    value, field_name: str, owner_name: str, minimum: int
+) -> int:
+    # bool is an int too, but not a count
+    if not isinstance(value, int) or isinstance(value, bool) or (
+        value < minimum
+    ):
+        raise utils.ParsingError(
+            msg='field {} must be an integer not less than {}'.format(
+                field_name, minimum
+            ),
+            context=owner_name,
+        )
+    return value
+
+
+def _parse_nested_item(
+    item_dict: dict, name: str, nested_items: Optional[NestedItems]
+) -> ModelItem:
+    type = get_item_type(item=item_dict, item_name=name)
+    item = create_item(name, type)
+    item.parse(item_dict, nested_items)
+    return item
+
+
+@lru_cache(maxsize=None)
+def get_model_layout() -> str:
+    """
+    returns a description of the slots of the model classes,
+    e.g. to tell apart models pickled with a different layout
+    """
+
+    classes = [ItemRef, ModelString.StringEnum]
+    classes.extend(ITEM_TYPES.values())
+    return ';'.join(sorted(
+        '{}({})'.format(cls.__qualname__, ','.join(_get_slots(cls)))
+        for cls in classes
+    ))
+
+
+def get_shape(item: ModelItem) -> tuple:
+    """
+    returns a hashable structural key of the item: items which differ
+    only in their own names and names of their nested items
+    have equal shapes
+    """
+
+    return (type(item),) + tuple(
+        _get_shape_value(getattr(item, slot))
+        for slot in _get_slots(type(item))
+        if slot not in _SHAPE_IGNORED_SLOTS
+    )
+
+
+_SHAPE_IGNORED_SLOTS = frozenset(['id', 'name'])
+
+
+def _get_shape_value(value):
+    if isinstance(value, ItemRef):
+        if value.is_item():
+            return get_shape(value.get_item())
+        return value.get_ref()
+    if isinstance(value, dict):
+        return tuple(
+            (key, _get_shape_value(item)) for key, item in value.items()
+        )
+    if isinstance(value, list):
+        return tuple(_get_shape_value(item) for item in value)
+    if isinstance(value, _SlotsModel):
+        return (type(value),) + tuple(
+            _get_shape_value(getattr(value, slot))
+            for slot in _get_slots(type(value))
+        )
+    return value
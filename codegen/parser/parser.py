@@ -1,21 +1,222 @@
-from typing import Dict
+import hashlib
+import json
+import logging
+import time
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
 
 import codegen.parser.utils as utils
-from codegen.parser.models import *
+import codegen.stats as stats
+from codegen.parser.models import (
+    ModelItem,
+    NestedItems,
+    create_item,
+    get_item_type,
+)
+
+
+# order of keys is significant for fingerprints, e.g. for object properties
+_fingerprint_encoder = json.JSONEncoder(default=repr)
+
+_logger = logging.getLogger(__name__)
 
 
 class Parser:
-    def __init__(self) -> None:
-        self.__model_items: Dict(str, ModelItem) = {}
+    def __init__(self, collect_errors: bool = False) -> None:
+        """
+        collect_errors: keep parsing after a broken definition and
+        raise all the errors at once with utils.ParsingErrors
+        """
+
+        self.collect_errors = collect_errors
+        self.__model_items: Dict[str, ModelItem] = {}
+        # per definition state for incremental re-parsing
+        self.__fingerprints: Dict[str, str] = {}
+        self.__dependencies: Dict[str, Set[str]] = {}
+        self.__dependents: Dict[str, Set[str]] = {}
+
+    def parse(self, yaml_document: dict) -> Dict[str, ModelItem]:
+        return self.parse_definitions(
+            Parser.__get_definitions(yaml_document)
+        )
+
+    def parse_definitions(
+        self, definitions: Iterable[utils.Definition]
+    ) -> Dict[str, ModelItem]:
+        """
+        parses definitions as they arrive,
+        e.g. from yaml_loader.iter_definitions(),
+        and returns all the parsed items by name
+        """
+
+        return Parser.__profile(
+            'parse', self.__parse_definitions, definitions
+        )
+
+    def __parse_definitions(
+        self, definitions: Iterable[utils.Definition]
+    ) -> Dict[str, ModelItem]:
+        errors = []
+        # checked once, the per item path does no logging work by default
+        debug = _logger.isEnabledFor(logging.DEBUG)
+        profile = stats.get_active()
+        nested_items = NestedItems()
+        for definition in definitions:
+            try:
+                item = Parser.__parse_item(
+                    definition.name,
+                    definition.item_dict,
+                    nested_items,
+                    profile,
+                )
+                self.__add_item(item)
+            except utils.ParsingError as e:
+                if not self.collect_errors:
+                    raise
+                errors.append(utils.ErrorRecord.from_error(e, definition))
+                continue
+            fingerprint = Parser.__get_fingerprint(definition.item_dict)
+            self.__track_item(item, fingerprint)
+            if debug:
+                _logger.debug('parsed %r', item)
+
+        if errors:
+            raise utils.ParsingErrors(errors)
+        return self.__model_items
+
+    def update(self, yaml_document: dict) -> Set[str]:
+        return self.update_definitions(
+            Parser.__get_definitions(yaml_document)
+        )
+
+    def update_definitions(
+        self, definitions: Iterable[utils.Definition]
+    ) -> Set[str]:
+        """
+        applies a new revision of the definitions to the already parsed
+        model. Only added and changed definitions are parsed again.
+        Returns the names of the added, changed and removed items
+        together with all of their transitive dependents, i.e. the items
+        which have to be emitted again.
+        The model is left untouched if the new revision fails to parse.
+        """
+
+        return Parser.__profile(
+            'update', self.__update_definitions, definitions
+        )
+
+    @staticmethod
+    def __profile(name: str, method, definitions: Iterable[utils.Definition]):
+        """
+        times the method as the named stage, pulling definitions
+        which are streamed rather than held in a sequence
+        is timed as the 'load' stage instead
+        """
+
+        profile = stats.get_active()
+        if profile is None:
+            return method(definitions)
+        if isinstance(definitions, Sequence):
+            with profile.span(name):
+                return method(definitions)
+
+        definitions = stats.PullTimer(definitions)
+        start = time.perf_counter()
+        try:
+            return method(definitions)
+        finally:
+            seconds = time.perf_counter() - start
+            profile.add_span(name, start, seconds - definitions.seconds)
+            profile.add_time('load', definitions.seconds)
+
+    def __update_definitions(
+        self, definitions: Iterable[utils.Definition]
+    ) -> Set[str]:
+        names: Dict[str, None] = {}
+        profile = stats.get_active()
+        # unchanged items keep their own nested items
+        nested_items = NestedItems()
+        parsed_items: Dict[str, Tuple[ModelItem, str]] = {}
+        errors = []
+        for definition in definitions:
+            item_name = definition.name
+            fingerprint = Parser.__get_fingerprint(definition.item_dict)
+            try:
+                if item_name in names:
+                    raise utils.ParsingError(
+                        '{} is defined more than once'.format(item_name)
+                    )
+                names[item_name] = None
+                if self.__fingerprints.get(item_name) == fingerprint:
+                    continue
+                item = Parser.__parse_item(
+                    item_name, definition.item_dict, nested_items, profile
+                )
+            except utils.ParsingError as e:
+                if not self.collect_errors:
+                    raise
+                errors.append(utils.ErrorRecord.from_error(e, definition))
+                continue
+            parsed_items[item_name] = (item, fingerprint)
+
+        if errors:
+            raise utils.ParsingErrors(errors)
+
+        removed_names = set(self.__model_items).difference(names)
+        changed_names = removed_names.union(parsed_items)
+        if not changed_names:
+            return set()
+
+        for name in changed_names:
+            self.__untrack_item(name)
+        debug = _logger.isEnabledFor(logging.DEBUG)
+        for item, fingerprint in parsed_items.values():
+            self.__track_item(item, fingerprint)
+            if debug:
+                _logger.debug('parsed %r', item)
+
+        # keep items in the order of definitions
+        model_items = self.__model_items
+        for name in removed_names:
+            del model_items[name]
+        model_items.update(
+            (name, item) for name, (item, _) in parsed_items.items()
+        )
+        self.__model_items = {name: model_items[name] for name in names}
+
+        return self.__get_affected_names(changed_names)
+
+    def get_items(self) -> Dict[str, ModelItem]:
+        return self.__model_items
+
+    def copy(self) -> 'Parser':
+        """
+        returns a parser with its own incremental state,
+        the parsed items are shared
+        """
+
+        parser = Parser(self.collect_errors)
+        parser.__model_items = dict(self.__model_items)
+        parser.__fingerprints = dict(self.__fingerprints)
+        parser.__dependencies = dict(self.__dependencies)
+        parser.__dependents = {
+            name: set(dependents)
+            for name, dependents in self.__dependents.items()
+        }
+        return parser
 
-    def parse(self, yaml_document: dict):
-        definitions = self.__get_definitions_block(yaml_document)
+    def get_dependents(self, name: str) -> Set[str]:
+        return set(self.__dependents.get(name, ()))
 
-        for item_name in definitions:
-            item_dict = definitions[item_name]
-            item = Parser.__parse_item(item_name, item_dict)
-            self.__add_item(item)
-            Parser.__debug_print_item_info(item)
+    def __get_affected_names(self, changed_names: Set[str]) -> Set[str]:
+        affected_names = set(changed_names)
+        pending_names = list(changed_names)
+        while pending_names:
+            name = pending_names.pop()
+            for dependent in self.__dependents.get(name, ()):
+                if dependent not in affected_names:
+                    affected_names.add(dependent)
+                    pending_names.append(dependent)
+        return affected_names
 
     def __add_item(self, item: ModelItem):
         if item.name in self.__model_items:
@@ -24,23 +225,69 @@ class Parser:
             )
         self.__model_items[item.name] = item
 
+    def __track_item(self, item: ModelItem, fingerprint: str) -> None:
+        dependencies = set(item.get_references())
+        self.__fingerprints[item.name] = fingerprint
+        self.__dependencies[item.name] = dependencies
+        for dependency in dependencies:
+            self.__dependents.setdefault(dependency, set()).add(item.name)
+
+    def __untrack_item(self, name: str) -> None:
+        self.__fingerprints.pop(name, None)
+        for dependency in self.__dependencies.pop(name, ()):
+            dependents = self.__dependents[dependency]
+            dependents.discard(name)
+            if not dependents:
+                del self.__dependents[dependency]
+
     @staticmethod
-    def __parse_item(name: str, item_dict: dict) -> ModelItem:
+    def __parse_item(
+        name: str,
+        item_dict: dict,
+        nested_items: NestedItems,
+        profile: stats.Profile = None,
+    ) -> ModelItem:
+        if profile is None:
+            type = get_item_type(item_dict, name)
+            item = create_item(name, type)
+            item.parse(item_dict, nested_items)
+            return item
+
+        start = time.perf_counter()
         type = get_item_type(item_dict, name)
         item = create_item(name, type)
-        item.parse(item_dict)
+        item.parse(item_dict, nested_items)
+        profile.add_time(
+            stats.PARSE_ITEM_PREFIX + type.value,
+            time.perf_counter() - start,
+        )
+        profile.count(stats.ITEMS_PREFIX + type.value)
         return item
 
     @staticmethod
-    def __get_definitions_block(yaml_document: dict) -> dict:
+    def __get_fingerprint(item_dict: dict) -> str:
+        try:
+            serialized = _fingerprint_encoder.encode(item_dict)
+        except TypeError:
+            serialized = repr(item_dict)
+        return hashlib.blake2b(
+            serialized.encode(), digest_size=16
+        ).hexdigest()
+
+    @staticmethod
+    def __get_definitions(yaml_document: dict) -> List[utils.Definition]:
         definitions_block_name = 'definitions'
         if definitions_block_name not in yaml_document:
             raise utils.ParsingError(
                     'cannot find \'definitions\' block '
                     'in the root of the document'
                 )
-        return yaml_document[definitions_block_name]
-
-    @staticmethod
-    def __debug_print_item_info(item: ModelItem):
-        print(item.__dict__)
+        definitions = yaml_document[definitions_block_name]
+        if not isinstance(definitions, dict):
+            raise utils.ParsingError(
+                '\'definitions\' block must be a dictionary'
+            )
+        return [
+            utils.Definition(name, item_dict)
+            for name, item_dict in definitions.items()
+        ]
@@ -1,21 +1,115 @@
+import json
+import re
 from enum import Enum
+from typing import List, NamedTuple, Optional
 
 
 REFERENCE_PREFIX = '#'
 
+_WORDS = re.compile(r'[0-9a-zA-Z]+')
+
+
+class Definition(NamedTuple):
+    """
+    a single entry of the 'definitions' block,
+    line and column (1-based) are known for definitions read from files
+    """
+
+    name: str
+    item_dict: dict
+    line: Optional[int] = None
+    column: Optional[int] = None
+
 
 class ParsingError(RuntimeError):
     def __init__(self, msg: str, context: str = '') -> None:
+        self.msg = msg
+        self.context = context
         msg = '{}: {}'.format(context, msg) if context else msg
         super().__init__(msg)
 
 
+class ErrorRecord(NamedTuple):
+    definition: str
+    message: str
+    line: Optional[int] = None
+    column: Optional[int] = None
+
+    @staticmethod
+    def from_error(
+        error: ParsingError, definition: Definition
+    ) -> 'ErrorRecord':
+        if error.context == definition.name:
+            message = error.msg
+        else:
+            message = str(error)
+        return ErrorRecord(
+            definition=definition.name,
+            message=message,
+            line=definition.line,
+            column=definition.column,
+        )
+
+    def __str__(self) -> str:
+        if self.line is None:
+            return '{}: {}'.format(self.definition, self.message)
+        return '{}:{}: {}: {}'.format(
+            self.line, self.column, self.definition, self.message
+        )
+
+
+class ParsingErrors(ParsingError):
+    """
+    all the errors found in a schema, raised once the whole schema
+    is processed when errors are collected instead of failing on the
+    first one
+    """
+
+    FORMATS = ('text', 'json')
+
+    def __init__(self, errors: List[ErrorRecord]) -> None:
+        self.errors = errors
+        super().__init__(
+            '{} error(s) found:\n{}'.format(len(errors), self.to_text())
+        )
+
+    def to_text(self) -> str:
+        return '\n'.join(str(error) for error in self.errors)
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {'errors': [error._asdict() for error in self.errors]},
+            indent=2,
+        )
+
+    def format(self, format: str = 'text') -> str:
+        if format == 'json':
+            return self.to_json()
+        if format == 'text':
+            return self.to_text()
+        raise ValueError('unknown errors format \'{}\''.format(format))
+
+
+# value -> member lookup tables, built once per enum class
+_enum_lookups = {}
+
+
+def get_enum_lookup(enum) -> dict:
+    lookup = _enum_lookups.get(enum)
+    if lookup is None:
+        lookup = {enum_item.value: enum_item for enum_item in enum}
+        _enum_lookups[enum] = lookup
+    return lookup
+
+
 def parse_enum(
     value: str, enum, enum_name: str, owner_name: str = ''
 ) -> Enum:
-    for enum_item in enum:
-        if value == enum_item.value:
-            return enum_item
+    try:
+        return get_enum_lookup(enum)[value]
+    except (KeyError, TypeError):
+        # TypeError stands for unhashable values
+        pass
 
     raise ParsingError(
         msg='field {} has invalid value \'{}\''.format(
@@ -31,3 +125,13 @@ def is_reference(ref) -> bool:
 
 def get_referenced_item_name(ref: str) -> str:
     return ref.removeprefix(REFERENCE_PREFIX)
+
+
+def get_nested_item_name(parent_name: str, field_name: str) -> str:
+    """
+    names an inline item after its owner and field,
+    e.g. User + home_address -> UserHomeAddress
+    """
+
+    words = _WORDS.findall(field_name)
+    return parent_name + ''.join(word[0].upper() + word[1:] for word in words)
@@ -0,0 +1,239 @@
+"""
+Long-lived generation server
+
+    python main.py --serve /tmp/codegen.sock --jobs 8
+    python main.py schemas/ -o generated --connect /tmp/codegen.sock
+
+The interpreter, the imported modules and a pool of worker processes
+stay warm between requests, so small schemas do not pay the startup
+cost. Requests and responses are JSON objects, one per line, over
+a Unix domain socket (see codegen.client):
+
+    {"command": "generate", "source_paths": [...], "output_dir": "...",
+     "cache_dir": null, "dry_run": false,
+     "json": false, "binary": false, "reorder_members": false,
+     "array_container": "vector", "set_container": "set"}
+    {"command": "ping"}
+    {"command": "shutdown"}
+"""
+
+import asyncio
+import json
+import logging
+import os
+import signal
+import socket
+import threading
+from concurrent.futures import Executor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional, Set
+
+import codegen
+from codegen.batch import BatchError, create_executor, generate_batch
+from codegen.emitter.cpp import EmitterOptions
+
+
+_logger = logging.getLogger(__name__)
+
+
+class GenerationServer:
+    def __init__(self, socket_path: str, jobs: Optional[int] = None) -> None:
+        """
+        jobs: number of worker processes (default: number of CPUs)
+        """
+
+        self.socket_path = socket_path
+        self.jobs = jobs
+        # set once the socket accepts connections
+        self.ready = threading.Event()
+        self.__executor: Optional[Executor] = None
+        self.__executor_lock = threading.Lock()
+        self.__stopped: Optional[asyncio.Event] = None
+        self.__connections: Set[asyncio.Task] = set()
+        # connections waiting for the next request
+        self.__idle: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+
+    def run(self) -> None:
+        """
+        serves until a shutdown request, SIGTERM or SIGINT
+        """
+
+        try:
+            asyncio.run(self.serve(handle_signals=True))
+        except KeyboardInterrupt:
+            pass
+
+    async def serve(self, handle_signals: bool = False) -> None:
+        _remove_stale_socket(self.socket_path)
+        self.__stopped = asyncio.Event()
+        if handle_signals:
+            asyncio.get_running_loop().add_signal_handler(
+                signal.SIGTERM, self.__stopped.set
+            )
+
+        self.__executor = create_executor(self.jobs)
+        try:
+            server = await asyncio.start_unix_server(
+                self.__handle_connection, sock=_bind_socket(self.socket_path)
+            )
+            _logger.info('listening on %s', self.socket_path)
+            self.ready.set()
+            try:
+                async with server:
+                    await self.__stopped.wait()
+                await self.__close_connections()
+            finally:
+                _remove_socket(self.socket_path)
+        finally:
+            self.ready.clear()
+            self.__executor.shutdown()
+            self.__executor = None
+
+    async def __handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        task = asyncio.current_task()
+        self.__connections.add(task)
+        try:
+            while not self.__stopped.is_set():
+                self.__idle[task] = writer
+                line = await reader.readline()
+                del self.__idle[task]
+                if not line:
+                    break
+                response = await self.__handle_request(line)
+                writer.write(json.dumps(response).encode('utf-8') + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.__idle.pop(task, None)
+            self.__connections.discard(task)
+            writer.close()
+
+    async def __close_connections(self) -> None:
+        # busy connections finish their current request first
+        for writer in self.__idle.values():
+            writer.close()
+        await asyncio.gather(*self.__connections, return_exceptions=True)
+
+    async def __handle_request(self, line: bytes) -> dict:
+        try:
+            request = json.loads(line)
+            command = request['command']
+        except (ValueError, TypeError, KeyError):
+            return _error('malformed request')
+
+        if command == 'ping':
+            return {'ok': True, 'version': codegen.__version__}
+        if command == 'shutdown':
+            self.__stopped.set()
+            return {'ok': True}
+        if command == 'generate':
+            # generate_batch() blocks until the workers are done
+            return await asyncio.get_running_loop().run_in_executor(
+                None, self.__generate, request
+            )
+        return _error('unknown command {!r}'.format(command))
+
+    def __generate(self, request: dict) -> dict:
+        executor = self.__executor
+        try:
+            results = generate_batch(
+                request['source_paths'],
+                request['output_dir'],
+                cache_dir=request.get('cache_dir'),
+                dry_run=bool(request.get('dry_run')),
+                executor=executor,
+                emitter_options=EmitterOptions(
+                    json=bool(request.get('json')),
+                    binary=bool(request.get('binary')),
+                    reorder_members=bool(request.get('reorder_members')),
+                    array_container=request.get('array_container', 'vector'),
+                    set_container=request.get('set_container', 'set'),
+                ),
+                collect_errors=bool(request.get('collect_errors')),
+                error_format=request.get('error_format', 'text'),
+                source_roots=dict(request.get('source_roots') or {}),
+            )
+        except BatchError as e:
+            results = e.results
+        except (KeyError, TypeError, ValueError) as e:
+            return _error('invalid generate request: {}'.format(e))
+        except BrokenProcessPool as e:
+            # e.g. a worker was killed, later requests get a new pool
+            _logger.error('worker pool is broken: %s', e)
+            with self.__executor_lock:
+                # concurrent requests replace the pool once
+                if self.__executor is executor:
+                    executor.shutdown(wait=False)
+                    self.__executor = create_executor(self.jobs)
+            return _error('worker pool is broken: {}'.format(e))
+        return {
+            'ok': True,
+            'results': [result.to_dict() for result in results],
+        }
+
+
+def _error(message: str) -> dict:
+    return {'ok': False, 'error': message}
+
+
+def _bind_socket(socket_path: str) -> socket.socket:
+    """
+    binds a listening socket only its owner may connect to:
+    clients choose the paths the server reads and writes
+    """
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    temp_path = '{}.{}.tmp'.format(socket_path, os.getpid())
+    _remove_socket(temp_path)
+    try:
+        # the socket file is created with 0600, without a window
+        # in which others could connect
+        umask = os.umask(0o177)
+        try:
+            sock.bind(temp_path)
+        finally:
+            os.umask(umask)
+        sock.listen()
+        # the path only ever names a listening socket, and an existing
+        # one is never replaced
+        try:
+            os.link(temp_path, socket_path)
+        except FileExistsError:
+            raise RuntimeError(
+                'a server is already running on {}'.format(socket_path)
+            )
+    except BaseException:
+        sock.close()
+        raise
+    finally:
+        _remove_socket(temp_path)
+    return sock
+
+
+def _remove_stale_socket(socket_path: str) -> None:
+    if not os.path.exists(socket_path):
+        return
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except ConnectionRefusedError:
+        # nothing listens, the server is gone
+        _remove_socket(socket_path)
+        return
+    except FileNotFoundError:
+        return
+    finally:
+        sock.close()
+    raise RuntimeError(
+        'a server is already running on {}'.format(socket_path)
+    )
+
+
+def _remove_socket(socket_path: str) -> None:
+    try:
+        os.remove(socket_path)
+    except FileNotFoundError:
+        pass
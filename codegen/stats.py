@@ -0,0 +1,205 @@
+"""
+Per-stage timings and counters of the generation
+
+    with stats.profiling() as profile:
+        CodeGenerator().generate_cpp('model.yaml', 'result/model')
+    profile.dump_json('stats.json')
+    profile.dump_chrome_trace('trace.json')  # chrome://tracing, Perfetto
+
+Instrumented code calls the module level span() and count(), which do
+nothing while no profile is active. Hot loops should fetch
+get_active() once and skip the timing work when it returns None.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+# well-known counters
+BYTES_READ = 'bytes_read'
+BYTES_WRITTEN = 'bytes_written'
+FILES_WRITTEN = 'files_written'
+FILES_SKIPPED = 'files_skipped'
+CACHE_HITS = 'cache_hits'
+CACHE_MISSES = 'cache_misses'
+ITEMS_PREFIX = 'items.'
+PARSE_ITEM_PREFIX = 'parse_item.'
+
+_NULL_SPAN = nullcontext()
+
+
+class TraceEvent:
+    __slots__ = ('name', 'start', 'seconds', 'pid', 'tid')
+
+    def __init__(
+        self, name: str, start: float, seconds: float, pid: int, tid: int
+    ) -> None:
+        self.name = name
+        self.start = start
+        self.seconds = seconds
+        self.pid = pid
+        self.tid = tid
+
+
+class Timer:
+    __slots__ = ('calls', 'seconds')
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.seconds = 0.0
+
+
+class Profile:
+    """
+    Collects timers (wall time and number of calls per stage),
+    integer counters and trace events of the spans.
+    Profiles of worker processes may be merged into the parent one.
+    """
+
+    def __init__(self) -> None:
+        self.timers: Dict[str, Timer] = {}
+        self.counters: Dict[str, int] = {}
+        self.events: List[TraceEvent] = []
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(name, start, time.perf_counter() - start)
+
+    def add_span(self, name: str, start: float, seconds: float) -> None:
+        """
+        accumulates time of a stage measured by the caller
+        together with its trace event
+        """
+
+        self.add_time(name, seconds)
+        self.events.append(TraceEvent(
+            name, start, seconds, os.getpid(), threading.get_ident()
+        ))
+
+    def add_time(self, name: str, seconds: float, calls: int = 1) -> None:
+        """
+        accumulates time without a trace event, e.g. for every item
+        """
+
+        timer = self.timers.get(name)
+        if timer is None:
+            timer = self.timers[name] = Timer()
+        timer.calls += calls
+        timer.seconds += seconds
+
+    def count(self, name: str, value: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def merge(self, other: 'Profile') -> None:
+        for name, timer in other.timers.items():
+            self.add_time(name, timer.seconds, timer.calls)
+        for name, value in other.counters.items():
+            self.count(name, value)
+        self.events.extend(other.events)
+
+    def get_cache_hit_rate(self) -> Optional[float]:
+        hits = self.counters.get(CACHE_HITS, 0)
+        lookups = hits + self.counters.get(CACHE_MISSES, 0)
+        return hits / lookups if lookups else None
+
+    def to_dict(self) -> dict:
+        return {
+            'timers': {
+                name: {'calls': timer.calls, 'seconds': timer.seconds}
+                for name, timer in sorted(self.timers.items())
+            },
+            'counters': dict(sorted(self.counters.items())),
+            'cache_hit_rate': self.get_cache_hit_rate(),
+        }
+
+    def to_chrome_trace(self) -> dict:
+        """
+        returns complete ('X') events of the Trace Event Format
+        """
+
+        return {
+            'traceEvents': [
+                {
+                    'name': event.name,
+                    'ph': 'X',
+                    'ts': event.start * 1e6,
+                    'dur': event.seconds * 1e6,
+                    'pid': event.pid,
+                    'tid': event.tid,
+                }
+                for event in sorted(self.events, key=lambda e: e.start)
+            ],
+            'displayTimeUnit': 'ms',
+            'otherData': {'counters': dict(sorted(self.counters.items()))},
+        }
+
+    def dump_json(self, path: str) -> None:
+        with open(path, 'w') as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    def dump_chrome_trace(self, path: str) -> None:
+        with open(path, 'w') as file:
+            json.dump(self.to_chrome_trace(), file)
+
+
+class PullTimer:
+    """
+    Iterates over another iterator and accumulates the time spent
+    pulling its items, e.g. loading definitions streamed from a file
+    """
+
+    def __init__(self, iterable: Iterable) -> None:
+        self.__iterator = iter(iterable)
+        self.seconds = 0.0
+
+    def __iter__(self) -> 'PullTimer':
+        return self
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            return next(self.__iterator)
+        finally:
+            self.seconds += time.perf_counter() - start
+
+
+_active: Optional[Profile] = None
+
+
+def get_active() -> Optional[Profile]:
+    return _active
+
+
+@contextmanager
+def profiling(profile: Profile = None) -> Iterator[Profile]:
+    """
+    makes the profile active in the current process until exit
+    """
+
+    global _active
+
+    previous = _active
+    _active = profile if profile is not None else Profile()
+    try:
+        yield _active
+    finally:
+        _active = previous
+
+
+def span(name: str):
+    if _active is None:
+        return _NULL_SPAN
+    return _active.span(name)
+
+
+def count(name: str, value: int = 1) -> None:
+    if _active is not None:
+        _active.count(name, value)
@@ -0,0 +1,395 @@
+import abc
+import ctypes
+import ctypes.util
+import glob
+import os
+import select
+import struct
+import sys
+import time
+from contextlib import closing
+from typing import Dict, Iterable, List, Optional, Set
+
+import codegen.yaml_loader as yaml_loader
+from codegen.batch import (
+    SCHEMA_EXTENSIONS,
+    collect_source_roots,
+    collect_sources,
+    get_result_path,
+)
+from codegen.codegen import CodeGenerator
+from codegen.parser.parser import Parser
+
+
+DEFAULT_DEBOUNCE_SECONDS = 0.1
+DEFAULT_POLL_INTERVAL_SECONDS = 0.5
+
+
+class Watcher(abc.ABC):
+    """
+    Reports schema files changed under the watched inputs
+    (files, directories and glob patterns). Bursts of changes are
+    debounced: changes are returned once no new ones arrive
+    for `debounce` seconds.
+    """
+
+    def __init__(
+        self,
+        inputs: List[str],
+        debounce: float = DEFAULT_DEBOUNCE_SECONDS,
+    ) -> None:
+        self.inputs = inputs
+        self.debounce = debounce
+        self.__sources = self._get_sources()
+
+    def wait_for_changes(self, timeout: float = None) -> Set[str]:
+        changes = self._read_changes(timeout)
+        if not changes:
+            return changes
+        while True:
+            more_changes = self._read_changes(self.debounce)
+            if not more_changes:
+                break
+            changes |= more_changes
+
+        # keep changes of the matching sources, including removed ones
+        sources = self._get_sources()
+        changes &= sources | self.__sources
+        self.__sources = sources
+        return changes
+
+    def _get_sources(self) -> Set[str]:
+        return {
+            os.path.abspath(path) for path in collect_sources(self.inputs)
+        }
+
+    def close(self) -> None:
+        pass
+
+    @abc.abstractmethod
+    def _read_changes(self, timeout: Optional[float]) -> Set[str]:
+        """
+        waits up to timeout seconds (forever for None)
+        and returns paths of changed schema files
+        """
+
+
+class PollingWatcher(Watcher):
+    """
+    portable watcher comparing file stats every poll_interval seconds
+    """
+
+    def __init__(
+        self,
+        inputs: List[str],
+        debounce: float = DEFAULT_DEBOUNCE_SECONDS,
+        poll_interval: float = DEFAULT_POLL_INTERVAL_SECONDS,
+    ) -> None:
+        super().__init__(inputs, debounce)
+        self.poll_interval = poll_interval
+        self.__stats = self.__scan()
+
+    def _read_changes(self, timeout: Optional[float]) -> Set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            stats = self.__scan()
+            changes = {
+                path for path in stats.keys() | self.__stats.keys()
+                if stats.get(path) != self.__stats.get(path)
+            }
+            self.__stats = stats
+            if changes:
+                return changes
+
+            delay = self.poll_interval
+            if deadline is not None:
+                delay = min(delay, deadline - time.monotonic())
+                if delay <= 0:
+                    return set()
+            time.sleep(delay)
+
+    def __scan(self) -> Dict[str, tuple]:
+        stats = {}
+        for path in self._get_sources():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            stats[path] = (
+                stat.st_mtime_ns, stat.st_size, stat.st_ino
+            )
+        return stats
+
+
+class InotifyWatcher(Watcher):
+    """
+    Linux watcher built on inotify (through ctypes, no dependencies)
+    """
+
+    # IN_CLOSE_WRITE rather than IN_MODIFY: files are read once written
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_ISDIR = 0x40000000
+    WATCH_MASK = (
+        IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    )
+
+    __EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(
+        self,
+        inputs: List[str],
+        debounce: float = DEFAULT_DEBOUNCE_SECONDS,
+    ) -> None:
+        super().__init__(inputs, debounce)
+        self.__libc = InotifyWatcher.__load_libc()
+        self.__fd = self.__libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.__fd < 0:
+            InotifyWatcher.__raise_errno('inotify_init1')
+        self.__watched_dirs: Dict[int, str] = {}
+        try:
+            for directory, recursive in _get_watch_roots(inputs):
+                self.__add_watch(directory, recursive)
+        except BaseException:
+            self.close()
+            raise
+
+    @staticmethod
+    def is_supported() -> bool:
+        return (
+            sys.platform.startswith('linux')
+            and InotifyWatcher.__load_libc() is not None
+        )
+
+    def close(self) -> None:
+        if self.__fd >= 0:
+            os.close(self.__fd)
+            self.__fd = -1
+
+    def _read_changes(self, timeout: Optional[float]) -> Set[str]:
+        readable, _, _ = select.select([self.__fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        data = os.read(self.__fd, 64 * 1024)
+        changes = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, name_size = self.__EVENT_HEADER.unpack_from(
+                data, offset
+            )
+            offset += self.__EVENT_HEADER.size
+            name = data[offset:offset + name_size].rstrip(b'\0')
+            offset += name_size
+
+            if mask & self.IN_Q_OVERFLOW:
+                # events were lost, report every known source
+                changes.update(self._get_sources())
+                continue
+            directory = self.__watched_dirs.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    self.__add_watch(path, recursive=True)
+                    changes.update(
+                        os.path.abspath(source)
+                        for source in collect_sources([path])
+                    )
+                continue
+            if path.endswith(SCHEMA_EXTENSIONS):
+                changes.add(path)
+
+        return changes
+
+    def __add_watch(self, directory: str, recursive: bool) -> None:
+        directories = [directory]
+        if recursive:
+            directories.extend(
+                os.path.join(root, name)
+                for root, names, _ in os.walk(directory)
+                for name in names
+            )
+        for path in directories:
+            wd = self.__libc.inotify_add_watch(
+                self.__fd, os.fsencode(path), self.WATCH_MASK
+            )
+            if wd < 0:
+                InotifyWatcher.__raise_errno('inotify_add_watch')
+            self.__watched_dirs[wd] = os.path.abspath(path)
+
+    @staticmethod
+    def __load_libc():
+        library = ctypes.util.find_library('c')
+        if library is None:
+            return None
+        libc = ctypes.CDLL(library, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            return None
+        return libc
+
+    @staticmethod
+    def __raise_errno(function: str) -> None:
+        errno = ctypes.get_errno()
+        raise OSError(errno, '{}: {}'.format(function, os.strerror(errno)))
+
+
+def create_watcher(
+    inputs: List[str],
+    debounce: float = DEFAULT_DEBOUNCE_SECONDS,
+    poll_interval: float = DEFAULT_POLL_INTERVAL_SECONDS,
+    use_inotify: bool = True,
+) -> Watcher:
+    """
+    uses inotify where it is available, polling otherwise
+    """
+
+    if use_inotify and InotifyWatcher.is_supported():
+        try:
+            return InotifyWatcher(inputs, debounce)
+        except OSError:
+            # e.g. the limit of inotify watches is reached
+            pass
+    return PollingWatcher(inputs, debounce, poll_interval)
+
+
+def _get_watch_roots(inputs: Iterable[str]):
+    """
+    yields (directory, recursive) pairs covering all the inputs
+    """
+
+    for path in inputs:
+        if os.path.isdir(path):
+            yield path, True
+        elif glob.has_magic(path):
+            root = path
+            while glob.has_magic(root):
+                root = os.path.dirname(root)
+            yield root or '.', True
+        else:
+            yield os.path.dirname(path) or '.', False
+
+
+class WatchSession:
+    """
+    Keeps parsed models of the watched schemas in memory,
+    so a change re-parses only the changed definitions
+    and rewrites only the outputs whose content changed.
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        code_generator: CodeGenerator = None,
+    ) -> None:
+        self.output_dir = output_dir
+        self.code_generator = code_generator or CodeGenerator()
+        self.__parsers: Dict[str, Parser] = {}
+
+    def update(
+        self, source_path: str, source_root: Optional[str] = None
+    ) -> Set[str]:
+        """
+        applies the current content of the schema,
+        returns names of the items affected by the change.
+        source_root: see get_result_path()
+        """
+
+        source_path = os.path.abspath(source_path)
+        if not os.path.exists(source_path):
+            self.__parsers.pop(source_path, None)
+            return set()
+
+        parser = self.__parsers.get(source_path)
+        is_new = parser is None
+        if is_new:
+            parser = Parser(self.code_generator.collect_errors)
+        else:
+            # the state is kept once the model is written, so a failed
+            # write is retried on the next update
+            parser = parser.copy()
+
+        definitions = yaml_loader.iter_definitions(source_path)
+        with closing(definitions):
+            affected = parser.update_definitions(definitions)
+
+        if affected or is_new:
+            self.code_generator.write_model(
+                parser.get_items(),
+                get_result_path(
+                    source_path,
+                    self.output_dir,
+                    source_root and os.path.abspath(source_root),
+                ),
+            )
+        self.__parsers[source_path] = parser
+        return affected
+
+
+def run_watch(
+    inputs: List[str],
+    output_dir: str,
+    watcher: Watcher = None,
+    session: WatchSession = None,
+    max_cycles: int = None,
+    quiet: bool = False,
+) -> None:
+    """
+    generates all the schemas and regenerates the changed ones
+    until interrupted (or max_cycles change bursts are processed),
+    quiet: report errors only
+    """
+
+    watcher = watcher or create_watcher(inputs)
+    session = session or WatchSession(output_dir)
+    with closing(watcher):
+        _process(session, collect_sources(inputs), inputs, quiet)
+        if not quiet:
+            print('watching {} for changes...'.format(', '.join(inputs)))
+
+        cycles = 0
+        try:
+            while max_cycles is None or cycles < max_cycles:
+                changes = watcher.wait_for_changes()
+                if changes:
+                    _process(session, sorted(changes), inputs, quiet)
+                    cycles += 1
+        except KeyboardInterrupt:
+            pass
+
+
+def _process(
+    session: WatchSession,
+    source_paths: List[str],
+    inputs: List[str],
+    quiet: bool,
+) -> None:
+    # the inputs are scanned again, new sources may have appeared
+    source_roots = {
+        os.path.abspath(path): root
+        for path, root in collect_source_roots(inputs).items()
+    }
+    for source_path in source_paths:
+        start = time.perf_counter()
+        try:
+            affected = session.update(
+                source_path, source_roots.get(os.path.abspath(source_path))
+            )
+        except Exception as e:
+            print(
+                '{}: {}: {}'.format(source_path, type(e).__name__, e),
+                file=sys.stderr,
+            )
+            continue
+        if quiet:
+            continue
+        print('{}: {} item(s) affected, {:.1f} ms'.format(
+            source_path,
+            len(affected),
+            (time.perf_counter() - start) * 1000,
+        ))
@@ -1,44 +1,241 @@
+import os
+from typing import Iterator
+
 import yaml
-from yaml.constructor import ConstructorError
+from yaml.composer import Composer
+from yaml.constructor import ConstructorError, SafeConstructor
+from yaml.events import (
+    MappingEndEvent,
+    MappingStartEvent,
+    StreamEndEvent,
+)
+from yaml.nodes import MappingNode
+from yaml.resolver import Resolver
+
+import codegen.stats as stats
+from codegen.parser.utils import Definition, ParsingError
 
 
 try:
-    from yaml import CLoader as Loader
+    from yaml import CSafeLoader as _FastSafeLoader
+    HAS_LIBYAML = True
 except ImportError:
-    from yaml import Loader
+    from yaml import SafeLoader as _FastSafeLoader
+    HAS_LIBYAML = False
+
+
+MERGE_TAG = 'tag:yaml.org,2002:merge'
+DEFINITIONS_BLOCK_NAME = 'definitions'
+
+
+class _NoDuplicatesConstructor:
+    """
+    custom mapping constructor raising errors in case of key duplicating.
+    Keys and values are constructed exactly once; keys pulled in
+    by merge keys ('<<') may still be overridden by the mapping itself.
+    """
+
+    def construct_mapping(self, node, deep=False):
+        if not isinstance(node, MappingNode):
+            return super().construct_mapping(node, deep=deep)
+
+        own_keys_count = sum(
+            1 for key_node, _ in node.value if key_node.tag != MERGE_TAG
+        )
+        self.flatten_mapping(node)
+        first_own_key = len(node.value) - own_keys_count
+
+        mapping = {}
+        own_keys = set()
+        for index, (key_node, value_node) in enumerate(node.value):
+            key = self.construct_object(key_node, deep=deep)
+            try:
+                is_duplicate = key in own_keys
+            except TypeError:
+                raise ConstructorError(
+                    "while constructing a mapping",
+                    node.start_mark,
+                    "found unhashable key",
+                    key_node.start_mark,
+                )
+            if is_duplicate:
+                raise ConstructorError(
+                    "YAML mapping ",
+                    node.start_mark,
+                    "found duplicate key (%s)" % key,
+                    key_node.start_mark,
+                )
+            if index >= first_own_key:
+                own_keys.add(key)
+            mapping[key] = self.construct_object(value_node, deep=deep)
+
+        return mapping
+
+
+class Loader(_NoDuplicatesConstructor, _FastSafeLoader):
+    """
+    safe loader backed by libyaml when it is available
+    """
+
+
+class PyLoader(_NoDuplicatesConstructor, yaml.SafeLoader):
+    """
+    pure-Python safe loader
+    """
 
 
-def __no_duplicates_constructor(loader, node, deep=False):
+class _NodeLoader(_NoDuplicatesConstructor, Composer,
+                  SafeConstructor, Resolver):
     """
-    custom constructor raising errors in case of key duplicating
+    composes and constructs single nodes pulling events
+    from another loader, so a document may be handled piece by piece
     """
 
-    mapping = {}
-    for key_node, value_node in node.value:
-        key = loader.construct_object(key_node, deep=deep)
-        value = loader.construct_object(value_node, deep=deep)
-        if key in mapping:
+    def __init__(self, events_source) -> None:
+        Composer.__init__(self)
+        SafeConstructor.__init__(self)
+        Resolver.__init__(self)
+        self.__events_source = events_source
+
+    def check_event(self, *choices) -> bool:
+        return self.__events_source.check_event(*choices)
+
+    def peek_event(self):
+        return self.__events_source.peek_event()
+
+    def get_event(self):
+        return self.__events_source.get_event()
+
+    def load_node(self):
+        node = self.compose_node(None, None)
+        return self.construct_document(node), node.start_mark
+
+
+def get_loader(use_libyaml: bool = True):
+    return Loader if use_libyaml else PyLoader
+
+
+def load(source_path: str, use_libyaml: bool = True):
+    with stats.span('load'), open(source_path, 'r') as file:
+        _count_bytes_read(file)
+        yaml_document = yaml.load(file, Loader=get_loader(use_libyaml))
+    if not yaml_document:
+        raise RuntimeError('No YAML documents found')
+    return yaml_document
+
+
+def iter_documents(source_path: str, use_libyaml: bool = True) -> Iterator:
+    """
+    lazily yields every document of a multi-document YAML stream.
+    The file is closed as soon as the iterator is exhausted or closed.
+    """
+
+    with open(source_path, 'r') as file:
+        _count_bytes_read(file)
+        yield from yaml.load_all(file, Loader=get_loader(use_libyaml))
+
+
+def iter_definitions(
+    source_path: str, use_libyaml: bool = True
+) -> Iterator[Definition]:
+    """
+    lazily yields definitions from the 'definitions' block
+    of every document in the file together with their positions.
+    Only a single definition is held in memory at a time. Anchors
+    may be referenced across definitions of the same document.
+    The file is closed as soon as the iterator is exhausted or closed.
+    """
+
+    with open(source_path, 'r') as file:
+        _count_bytes_read(file)
+        yield from iter_stream_definitions(file, use_libyaml)
+
+
+def iter_stream_definitions(
+    stream, use_libyaml: bool = True
+) -> Iterator[Definition]:
+    events_loader = get_loader(use_libyaml)(stream)
+    try:
+        events_loader.get_event()  # stream start
+        documents_count = 0
+        while not events_loader.check_event(StreamEndEvent):
+            events_loader.get_event()  # document start
+            documents_count += 1
+            yield from _iter_document_definitions(events_loader)
+            events_loader.get_event()  # document end
+        if not documents_count:
+            raise RuntimeError('No YAML documents found')
+    finally:
+        events_loader.dispose()
+
+
+def _iter_document_definitions(
+    events_loader
+) -> Iterator[Definition]:
+    node_loader = _NodeLoader(events_loader)
+    if not events_loader.check_event(MappingStartEvent):
+        node_loader.load_node()
+        raise _missing_definitions_error()
+
+    root_start_event = events_loader.get_event()
+    root_keys = set()
+    while not events_loader.check_event(MappingEndEvent):
+        key, key_mark = node_loader.load_node()
+        if key in root_keys:
             raise ConstructorError(
                 "YAML mapping ",
-                node.start_mark,
+                root_start_event.start_mark,
                 "found duplicate key (%s)" % key,
-                key_node.start_mark,
+                key_mark,
             )
-        mapping[key] = value
+        root_keys.add(key)
 
-    return loader.construct_mapping(node, deep)
+        if key != DEFINITIONS_BLOCK_NAME:
+            # compose anyway to register anchors
+            node_loader.compose_node(None, None)
+            continue
 
+        if not events_loader.check_event(MappingStartEvent):
+            node_loader.load_node()
+            raise ParsingError(
+                '\'{}\' must be a dictionary'.format(DEFINITIONS_BLOCK_NAME)
+            )
+        yield from _iter_definitions_block(events_loader, node_loader)
 
-yaml.add_constructor(
-    yaml.resolver.BaseResolver.DEFAULT_MAPPING_TAG,
-    __no_duplicates_constructor,
-    Loader=yaml.SafeLoader,
-)
+    events_loader.get_event()  # root mapping end
+    if DEFINITIONS_BLOCK_NAME not in root_keys:
+        raise _missing_definitions_error()
 
 
-def load(source_path: str):
-    file = open(source_path, 'r')
-    yaml_document = yaml.safe_load(file)
-    if not yaml_document:
-        raise RuntimeError('No YAML documents found')
-    return yaml_document
+def _iter_definitions_block(
+    events_loader, node_loader: _NodeLoader
+) -> Iterator[Definition]:
+    block_start_event = events_loader.get_event()
+    names = set()
+    while not events_loader.check_event(MappingEndEvent):
+        name, name_mark = node_loader.load_node()
+        if name in names:
+            raise ConstructorError(
+                "YAML mapping ",
+                block_start_event.start_mark,
+                "found duplicate key (%s)" % name,
+                name_mark,
+            )
+        names.add(name)
+        item_dict, _ = node_loader.load_node()
+        yield Definition(
+            name, item_dict, name_mark.line + 1, name_mark.column + 1
+        )
+    events_loader.get_event()  # definitions mapping end
+
+
+def _count_bytes_read(file) -> None:
+    if stats.get_active() is not None:
+        stats.count(stats.BYTES_READ, os.fstat(file.fileno()).st_size)
+
+
+def _missing_definitions_error() -> ParsingError:
+    return ParsingError(
+        'cannot find \'{}\' block '
+        'in the root of the document'.format(DEFINITIONS_BLOCK_NAME)
+    )
@@ -0,0 +1,139 @@
+import os
+
+import pytest
+
+from codegen.batch import (
+    BatchError,
+    collect_source_roots,
+    collect_sources,
+    generate_batch,
+    get_result_path,
+)
+
+
+VALID_SCHEMA = 'definitions:\n  Flag:\n    type: bool\n'
+BROKEN_SCHEMA = 'definitions:\n  Flag:\n    type: boolean\n'
+
+
+def write_schemas(directory, schemas: dict) -> list:
+    paths = []
+    for name, text in schemas.items():
+        path = directory / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+        paths.append(str(path))
+    return paths
+
+
+def test_collect_sources(tmp_path):
+    write_schemas(tmp_path, {
+        'b.yaml': VALID_SCHEMA,
+        'a.yml': VALID_SCHEMA,
+        'nested/c.yaml': VALID_SCHEMA,
+        'notes.txt': '',
+    })
+    explicit = str(tmp_path / 'b.yaml')
+    sources = collect_sources([
+        explicit, str(tmp_path), str(tmp_path / '*.yaml')
+    ])
+    assert sources == [
+        explicit,
+        str(tmp_path / 'a.yml'),
+        str(tmp_path / 'nested' / 'c.yaml'),
+    ]
+
+
+def test_collect_source_roots(tmp_path, monkeypatch):
+    write_schemas(tmp_path, {
+        'a/x.yaml': VALID_SCHEMA,
+        'b/x.yaml': VALID_SCHEMA,
+    })
+    explicit = str(tmp_path / 'a' / 'x.yaml')
+    assert collect_source_roots([
+        explicit, str(tmp_path), str(tmp_path / '*' / '*.yaml')
+    ]) == {
+        explicit: str(tmp_path / 'a'),
+        str(tmp_path / 'b' / 'x.yaml'): str(tmp_path),
+    }
+    monkeypatch.chdir(tmp_path)
+    assert collect_source_roots(['*.yaml', 'user.yaml']) == {
+        'user.yaml': os.curdir,
+    }
+
+
+def test_get_result_path():
+    assert get_result_path('schemas/user.yaml', 'out') == os.path.join(
+        'out', 'user'
+    )
+    assert get_result_path(
+        'schemas/a/user.yaml', 'out', 'schemas'
+    ) == os.path.join('out', 'a', 'user')
+
+
+@pytest.mark.parametrize('jobs', [1, 2], ids=['in-process', 'pool'])
+def test_generate_batch(tmp_path, jobs: int):
+    sources = write_schemas(tmp_path, {
+        'first.yaml': VALID_SCHEMA,
+        'second.yaml': VALID_SCHEMA,
+        'third.yaml': VALID_SCHEMA,
+    })
+    results = generate_batch(sources, str(tmp_path / 'out'), jobs=jobs)
+    assert [result.source_path for result in results] == sources
+    assert all(result.is_ok() for result in results)
+
+
+@pytest.mark.parametrize('jobs', [1, 2], ids=['in-process', 'pool'])
+def test_generate_batch_errors(tmp_path, jobs: int):
+    sources = write_schemas(tmp_path, {
+        'first.yaml': BROKEN_SCHEMA,
+        'second.yaml': VALID_SCHEMA,
+        'third.yaml': 'definitions: [',
+    })
+    with pytest.raises(BatchError) as error:
+        generate_batch(sources, str(tmp_path / 'out'), jobs=jobs)
+
+    results = error.value.results
+    assert [result.source_path for result in results] == sources
+    assert [result.is_ok() for result in results] == [False, True, False]
+    assert str(error.value).startswith('2 of 3 schemas failed')
+    assert 'ParsingError' in results[0].error
+
+
+def test_generate_batch_unusable_cache(tmp_path):
+    sources = write_schemas(tmp_path, {'first.yaml': VALID_SCHEMA})
+    # a file where the cache directory should be
+    cache_dir = tmp_path / 'cache'
+    cache_dir.write_text('')
+    with pytest.raises(BatchError) as error:
+        generate_batch(
+            sources, str(tmp_path / 'out'), jobs=1, cache_dir=str(cache_dir)
+        )
+    [result] = error.value.results
+    assert not result.is_ok()
+    assert 'FileExistsError' in result.error
+
+
+def test_generate_batch_result_collision(tmp_path):
+    sources = write_schemas(tmp_path, {
+        'a/schema.yaml': VALID_SCHEMA,
+        'b/schema.yaml': VALID_SCHEMA,
+    })
+    with pytest.raises(ValueError):
+        generate_batch(sources, str(tmp_path / 'out'))
+
+
+def test_generate_batch_mirrors_directories(tmp_path):
+    write_schemas(tmp_path, {
+        'schemas/a/x.yaml': VALID_SCHEMA,
+        'schemas/b/x.yaml': VALID_SCHEMA,
+    })
+    source_roots = collect_source_roots([str(tmp_path / 'schemas')])
+    output_dir = tmp_path / 'out'
+    results = generate_batch(
+        list(source_roots), str(output_dir), source_roots=source_roots
+    )
+    assert [result.result_path for result in results] == [
+        str(output_dir / 'a' / 'x'), str(output_dir / 'b' / 'x')
+    ]
+    assert (output_dir / 'a' / 'x.h').exists()
+    assert (output_dir / 'b' / 'x.h').exists()
@@ -0,0 +1,48 @@
+import shutil
+
+import pytest
+
+import codegen.yaml_loader as yaml_loader
+from benchmarks.json_codec import run_json_benchmark
+from benchmarks.run import STAGES, compare, measure_stage
+from benchmarks.schema_gen import SHAPES, generate_schema, write_schema
+from codegen.parser.linker import Linker
+from codegen.parser.parser import Parser
+
+
+@pytest.mark.parametrize('shape', SHAPES)
+def test_generated_schema_is_valid(tmp_path, shape: str):
+    schema = generate_schema(50, shape=shape, depth=3, fanout=4)
+    path = str(tmp_path / 'schema.yaml')
+    write_schema(schema, path)
+
+    assert yaml_loader.load(path) == schema
+    model = Parser().parse(schema)
+    assert len(Linker(model).link()) == 50
+
+
+def test_measure_and_compare(tmp_path):
+    path = str(tmp_path / 'schema.yaml')
+    write_schema(generate_schema(20), path)
+    results = []
+    for stage in STAGES:
+        result = measure_stage(stage, path, 20, repeats=1)
+        result.update(
+            {'shape': 'mixed', 'definitions': 20, 'stage': stage.name}
+        )
+        results.append(result)
+
+    report = {'results': results}
+    lines = compare(report, report)
+    assert len(lines) == len(STAGES)
+    assert all('time    1.00x' in line for line in lines)
+
+
+@pytest.mark.skipif(shutil.which('g++') is None, reason='g++ is required')
+def test_json_benchmark(tmp_path):
+    result = run_json_benchmark(
+        lines_count=3, iterations=10, work_dir=str(tmp_path)
+    )
+    assert set(result) == {'document_bytes', 'decode', 'encode'}
+    assert result['decode']['generated_ns'] > 0
+    assert result['encode']['dom_ns'] > 0
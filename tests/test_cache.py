@@ -0,0 +1,114 @@
+import os
+import pickle
+import zlib
+
+import pytest
+
+import codegen.parser.models as models
+from codegen.cache import ParseCache
+from codegen.codegen import CodeGenerator
+
+
+SCHEMA = (
+    'definitions:\n'
+    '  Id:\n'
+    '    type: int\n'
+    '    format: int64\n'
+    '  Ids:\n'
+    '    type: array\n'
+    '    items: "#Id"\n'
+)
+
+
+@pytest.fixture
+def schema_path(tmp_path) -> str:
+    path = tmp_path / 'schema.yaml'
+    path.write_text(SCHEMA)
+    return str(path)
+
+
+def test_key_depends_on_content(tmp_path, schema_path: str):
+    key = ParseCache.get_key(schema_path)
+    assert key == ParseCache.get_key(schema_path)
+
+    other_path = tmp_path / 'other.yaml'
+    other_path.write_text(SCHEMA + '  Flag:\n    type: bool\n')
+    assert key != ParseCache.get_key(str(other_path))
+
+
+def test_key_depends_on_model_layout(schema_path: str, monkeypatch):
+    import codegen.cache as cache
+
+    key = ParseCache.get_key(schema_path)
+    assert 'ModelInt(id,name,description,int_type)' in (
+        models.get_model_layout()
+    )
+    monkeypatch.setattr(cache, 'get_model_layout', lambda: 'ModelInt(id)')
+    assert key != ParseCache.get_key(schema_path)
+
+
+def test_store_and_load(tmp_path):
+    cache = ParseCache(str(tmp_path / 'cache'))
+    item = models.ModelInt('Id')
+    item.parse({'type': 'int', 'format': 'int64'})
+
+    assert cache.load('key') is None
+    cache.store('key', {'Id': item})
+    model = cache.load('key')
+
+    assert list(model) == ['Id']
+    assert model['Id'].int_type == models.ModelInt.IntType.Int64
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_broken_entry_is_a_miss(tmp_path):
+    cache = ParseCache(str(tmp_path))
+    (tmp_path / 'key.model').write_bytes(b'garbage')
+    assert cache.load('key') is None
+    assert not (tmp_path / 'key.model').exists()
+
+
+class _Invalid:
+    def __reduce__(self):
+        return int, ('not a number',)
+
+
+@pytest.mark.parametrize('payload', [[1, 2], _Invalid()],
+                         ids=['not-a-model', 'value-error'])
+def test_invalid_entry_is_a_miss(tmp_path, payload):
+    cache = ParseCache(str(tmp_path))
+    entry_path = tmp_path / 'key.model'
+    entry_path.write_bytes(zlib.compress(pickle.dumps(payload)))
+    assert cache.load('key') is None
+    assert not entry_path.exists()
+    assert cache.misses == 1
+
+
+def test_lru_eviction(tmp_path):
+    model = {'Flag': models.ModelBool('Flag')}
+    cache = ParseCache(str(tmp_path), max_size_bytes=1024 * 1024)
+    cache.store('old', model)
+    cache.store('recent', model)
+    entry_size = os.path.getsize(tmp_path / 'old.model')
+
+    os.utime(tmp_path / 'old.model', ns=(0, 0))
+    os.utime(tmp_path / 'recent.model', ns=(1, 1))
+    cache.load('old')  # refreshes 'old', 'recent' is now the oldest
+
+    cache.max_size_bytes = 2 * entry_size
+    cache.store('new', model)
+
+    assert sorted(os.listdir(tmp_path)) == ['new.model', 'old.model']
+
+
+def test_generator_uses_cache(tmp_path, schema_path: str, monkeypatch):
+    cache = ParseCache(str(tmp_path / 'cache'))
+    CodeGenerator(cache).generate_cpp(schema_path, str(tmp_path / 'out'))
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    def fail(*args, **kwargs):
+        raise AssertionError('unchanged schema must not be parsed')
+
+    monkeypatch.setattr('codegen.yaml_loader.iter_definitions', fail)
+    CodeGenerator(cache).generate_cpp(schema_path, str(tmp_path / 'out'))
+    assert (cache.hits, cache.misses) == (1, 1)
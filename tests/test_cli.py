@@ -0,0 +1,250 @@
+import json
+import os
+
+import pytest
+
+from codegen.cli import (
+    EXIT_GENERATION_FAILED,
+    EXIT_OK,
+    EXIT_USAGE_ERROR,
+    main,
+)
+
+
+VALID_SCHEMA = 'definitions:\n  Flag:\n    type: bool\n'
+BROKEN_SCHEMA = 'definitions:\n  Flag:\n    type: boolean\n'
+
+
+@pytest.fixture
+def schemas(tmp_path):
+    directory = tmp_path / 'schemas'
+    directory.mkdir()
+    (directory / 'first.yaml').write_text(VALID_SCHEMA)
+    (directory / 'second.yaml').write_text(VALID_SCHEMA)
+    return directory
+
+
+def test_generate(schemas, tmp_path, capsys):
+    output_dir = tmp_path / 'out'
+    argv = [str(schemas), '-o', str(output_dir), '--jobs', '1', '--timing']
+    assert main(argv) == EXIT_OK
+    assert sorted(os.listdir(output_dir)) == [
+        'first.cpp', 'first.h', 'second.cpp', 'second.h'
+    ]
+    out = capsys.readouterr().out
+    assert ' ms)' in out
+    assert '2 schema(s), 0 failed, 4 file(s) changed' in out
+
+    # nothing is rewritten on the second run
+    assert main(argv + ['--quiet']) == EXIT_OK
+    assert capsys.readouterr().out == ''
+    assert main(argv) == EXIT_OK
+    assert '0 file(s) changed' in capsys.readouterr().out
+
+
+def test_nested_sources(schemas, tmp_path):
+    (schemas / 'nested').mkdir()
+    (schemas / 'nested' / 'first.yaml').write_text(VALID_SCHEMA)
+    output_dir = tmp_path / 'out'
+    assert main([str(schemas), '-o', str(output_dir), '-q']) == EXIT_OK
+    assert (output_dir / 'first.h').exists()
+    assert (output_dir / 'nested' / 'first.h').exists()
+
+def test_dry_run(schemas, tmp_path, capsys):
+    output_dir = tmp_path / 'out'
+    assert main([str(schemas), '-o', str(output_dir), '-n']) == EXIT_OK
+    assert not output_dir.exists()
+    out = capsys.readouterr().out
+    assert 'would write {}'.format(output_dir / 'first.h') in out
+    assert '4 file(s) to change' in out
+
+
+def test_serializers(schemas, tmp_path):
+    output_dir = tmp_path / 'out'
+    argv = [str(schemas), '-o', str(output_dir), '-j', '1']
+    assert main(argv + ['-q']) == EXIT_OK
+    assert 'codegen_json' not in (output_dir / 'first.h').read_text()
+    assert main(argv + ['-q', '--json']) == EXIT_OK
+    assert 'namespace codegen_json' in (output_dir / 'first.h').read_text()
+    assert main(argv + ['-q', '--binary']) == EXIT_OK
+    header = (output_dir / 'first.h').read_text()
+    assert 'codegen_json' not in header
+    assert 'namespace codegen_binary' in header
+
+
+LAYOUT_SCHEMA = '''\
+definitions:
+  Point:
+    type: object
+    properties:
+      visible: {type: bool}
+      x: {type: number, format: double}
+      y: {type: int, format: int32}
+    required: [visible, x, y]
+'''
+
+
+def test_layout_report(tmp_path, capsys):
+    schema_path = tmp_path / 'point.yaml'
+    schema_path.write_text(LAYOUT_SCHEMA)
+    output_dir = tmp_path / 'out'
+    argv = [str(schema_path), '-o', str(output_dir)]
+    assert main(argv + ['--layout-report']) == EXIT_OK
+    assert not output_dir.exists()
+    out = capsys.readouterr().out
+    assert 'Point                                24 ->     16 bytes' in out
+    assert 'total 24 -> 16 bytes' in out
+
+    assert main(argv + ['-q', '-j', '1', '--reorder-members']) == EXIT_OK
+    header = (output_dir / 'point.h').read_text()
+    assert header.index('PointX x;') < header.index('PointVisible visible;')
+
+
+CONTAINER_SCHEMA = '''\
+definitions:
+  Ids:
+    type: array
+    items: {type: int}
+  Names:
+    type: array
+    array_type: set
+    items: {type: string}
+'''
+
+
+def test_containers(tmp_path, capsys):
+    schema_path = tmp_path / 'ids.yaml'
+    schema_path.write_text(CONTAINER_SCHEMA)
+    output_dir = tmp_path / 'out'
+    argv = [str(schema_path), '-o', str(output_dir), '-q', '-j', '1']
+    assert main(argv) == EXIT_OK
+    header = (output_dir / 'ids.h').read_text()
+    assert 'using Ids = std::vector<IdsItems>;' in header
+    assert 'using Names = std::set<NamesItems>;' in header
+    assert main(argv + [
+        '--array-container', 'small_vector', '--set-container', 'flat_set',
+    ]) == EXIT_OK
+    header = (output_dir / 'ids.h').read_text()
+    assert 'codegen_containers::SmallVector<IdsItems, 4>;' in header
+    assert 'codegen_containers::FlatSet<NamesItems>;' in header
+    with pytest.raises(SystemExit):
+        main(argv + ['--set-container', 'vector'])
+    capsys.readouterr()
+
+
+def test_watch(schemas, tmp_path, capsys, monkeypatch):
+    import codegen.watch as watch
+
+    run_watch = watch.run_watch
+    # generates once and stops instead of waiting for changes
+    monkeypatch.setattr(
+        watch, 'run_watch',
+        lambda *args, **kwargs: run_watch(*args, max_cycles=0, **kwargs),
+    )
+    (schemas / 'broken.yaml').write_text(BROKEN_SCHEMA)
+    output_dir = tmp_path / 'out'
+    argv = [str(schemas), '-o', str(output_dir), '-q']
+    assert main(['watch'] + argv + ['--dry-run']) == EXIT_OK
+    assert not output_dir.exists()
+    assert main(['--watch'] + argv) == EXIT_OK
+    assert (output_dir / 'first.h').exists()
+    out, err = capsys.readouterr()
+    assert out == ''
+    assert 'broken.yaml' in err
+
+    cache_argv = argv + ['--cache-dir', str(tmp_path / 'cache')]
+    assert main(['watch'] + cache_argv) == EXIT_USAGE_ERROR
+    assert '--cache-dir' in capsys.readouterr().err
+
+
+def test_generation_failed(schemas, tmp_path, capsys):
+    (schemas / 'second.yaml').write_text(BROKEN_SCHEMA)
+    argv = [str(schemas), '-o', str(tmp_path / 'out'), '-q']
+    assert main(argv) == EXIT_GENERATION_FAILED
+    captured = capsys.readouterr()
+    assert captured.out == ''
+    assert 'second.yaml: ParsingError' in captured.err
+    assert (tmp_path / 'out' / 'first.h').exists()
+
+
+
+def test_collect_errors(schemas, tmp_path, capsys):
+    (schemas / 'second.yaml').write_text(
+        'definitions:\n'
+        '  Flag:\n'
+        '    type: boolean\n'
+        '  Count:\n'
+        '    type: integer\n'
+    )
+    argv = [str(schemas), '-o', str(tmp_path / 'out'), '-q', '-j', '1']
+    assert main(argv + ['--collect-errors']) == EXIT_GENERATION_FAILED
+    err = capsys.readouterr().err
+    assert 'second.yaml: ParsingErrors: 2 error(s) found' in err
+    assert '2:3: Flag: ' in err and '4:3: Count: ' in err
+
+    argv += ['--error-format', 'json']
+    assert main(argv + ['--collect-errors']) == EXIT_GENERATION_FAILED
+    errors = json.loads(capsys.readouterr().err)['errors']
+    assert [(e['definition'], e['line']) for e in errors] == [
+        ('Flag', 2), ('Count', 4)
+    ]
+    assert {e['source_path'] for e in errors} == {
+        str(schemas / 'second.yaml')
+    }
+
+    # without collecting, the first error is reported in the same format
+    assert main(argv) == EXIT_GENERATION_FAILED
+    [error] = json.loads(capsys.readouterr().err)['errors']
+    assert error['definition'] == 'Flag'
+
+def test_usage_errors(tmp_path, capsys):
+    assert main([str(tmp_path / '*.yaml')]) == EXIT_USAGE_ERROR
+    assert 'no schema files found' in capsys.readouterr().err
+
+    with pytest.raises(SystemExit) as error:
+        main(['schema.yaml', '--jobs', '0'])
+    assert error.value.code == EXIT_USAGE_ERROR
+
+
+def test_profile(schemas, tmp_path, capsys):
+    stats_path = tmp_path / 'profile.stats'
+    argv = [str(schemas), '-o', str(tmp_path / 'out'), '-q']
+    assert main(argv + ['--profile', str(stats_path)]) == EXIT_OK
+    assert stats_path.stat().st_size > 0
+
+    assert main(argv + ['--profile']) == EXIT_OK
+    assert 'cumulative' in capsys.readouterr().err
+
+
+def test_verbose(schemas, tmp_path, capsys):
+    argv = [str(schemas), '-o', str(tmp_path / 'out'), '-j', '1']
+    assert main(argv + ['-v']) == EXIT_OK
+    err = capsys.readouterr().err
+    assert 'parsing file {}'.format(schemas / 'first.yaml') in err
+    assert 'ModelBool' not in err
+
+    assert main(argv + ['-vv']) == EXIT_OK
+    assert 'parsed ModelBool(' in capsys.readouterr().err
+
+    assert main(argv) == EXIT_OK
+    assert capsys.readouterr().err == ''
+
+
+def test_stats(schemas, tmp_path):
+    stats_path = tmp_path / 'stats.json'
+    trace_path = tmp_path / 'trace.json'
+    argv = [
+        str(schemas), '-o', str(tmp_path / 'out'), '-q', '-j', '2',
+        '--stats', str(stats_path), '--trace', str(trace_path),
+    ]
+    assert main(argv) == EXIT_OK
+
+    # worker profiles are merged into the parent one
+    stats = json.loads(stats_path.read_text())
+    assert stats['counters']['items.bool'] == 2
+    assert stats['counters']['files_written'] == 4
+    assert stats['timers']['parse']['calls'] == 2
+    trace = json.loads(trace_path.read_text())
+    assert {event['name'] for event in trace['traceEvents']} == {
+        'parse', 'link', 'emit', 'write'
+    }
@@ -0,0 +1,41 @@
+import os
+
+import pytest
+import yaml
+
+from codegen.codegen import CodeGenerator
+from codegen.parser.models import ModelObject
+from codegen.parser.utils import ParsingErrors
+
+
+SCHEMA = '''
+definitions:
+  User:
+    type: object
+    properties:
+      id: '#Id'
+  Id:
+    type: int
+'''
+
+
+@pytest.mark.parametrize('document', [
+    SCHEMA, SCHEMA.encode('utf-8'), yaml.safe_load(SCHEMA)
+])
+def test_generate_in_memory(document, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    output = CodeGenerator().generate(document, 'model')
+    assert list(output.model) == ['User', 'Id']
+    assert isinstance(output.model['User'], ModelObject)
+    assert [item.name for item in output.ordered_items] == ['Id', 'User']
+    assert output.sources.header_name == 'model.h'
+    assert 'struct User' in output.sources.header
+    assert '#include "model.h"' in output.sources.source
+    assert os.listdir(tmp_path) == []
+
+
+def test_parse_in_memory_collect_errors():
+    document = 'definitions:\n  A:\n    type: x\n  B:\n    type: y\n'
+    with pytest.raises(ParsingErrors) as error:
+        CodeGenerator(collect_errors=True).parse(document)
+    assert [record.line for record in error.value.errors] == [2, 4]
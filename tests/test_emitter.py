@@ -0,0 +1,742 @@
+import shutil
+import subprocess
+
+import pytest
+
+from codegen.emitter.cpp import CppEmitter, EmitterOptions
+from codegen.emitter.dispatch import emit_string_switch
+from codegen.emitter.names import (
+    to_enum_constants,
+    to_identifier,
+    to_string_literal,
+)
+from codegen.parser.linker import Linker
+from codegen.parser.parser import Parser
+from codegen.parser.utils import ParsingError
+
+
+SCHEMA = {
+    'definitions': {
+        'UserId': {
+            'type': 'int',
+            'format': 'int64',
+            'description': 'unique user id',
+        },
+        'Status': {
+            'type': 'string',
+            'enum': ['active', 'in-progress', 'quote"d'],
+        },
+        'Tags': {
+            'type': 'array',
+            'array_type': 'set',
+            'items': {'type': 'string'},
+        },
+        'User': {
+            'type': 'object',
+            'properties': {
+                'id': '#UserId',
+                'status': '#Status',
+                'tags': '#Tags',
+                'score': {'type': 'number', 'format': 'double'},
+                'class': '#Flag',
+            },
+            'required': ['id', 'status'],
+        },
+        'Users': {'type': 'array', 'items': '#User'},
+        'Flag': {'type': 'bool'},
+    },
+}
+
+
+def emit(schema: dict = SCHEMA, options: EmitterOptions = None):
+    items = Linker(Parser().parse(schema)).link()
+    return CppEmitter(options).emit(items, 'models')
+
+
+@pytest.mark.parametrize(
+    "name,expected",
+    [('user', 'user'), ('class', 'class_'), ('1st-name', '_1st_name')],
+)
+def test_to_identifier(name: str, expected: str):
+    assert to_identifier(name) == expected
+
+
+def test_to_enum_constants():
+    assert to_enum_constants(['in-progress', 'in_progress', '']) == {
+        'in-progress': 'kInProgress',
+        'in_progress': 'kInProgress1',
+        '': 'kValue',
+    }
+
+
+def test_to_string_literal():
+    assert to_string_literal('a"b\\c\n\x01') == '"a\\"b\\\\c\\n\\001"'
+
+
+def test_emit_string_switch():
+    code = emit_string_switch('key', {
+        'id': 'return 1;',
+        'name': 'return 2;',
+        'none': 'return 3;',
+        'nope': 'return 4;',
+    }, indent='')
+    assert code.startswith('switch (key.size()) {\n')
+    assert '    case 2: {\n        if (key == "id") {\n' in code
+    # the third character tells all the four-character keys apart
+    assert 'switch (static_cast<unsigned char>(key[2])) {' in code
+    assert code.count('if (key == ') == 4
+    assert emit_string_switch('key', {}) == ''
+
+
+def test_emit_header():
+    sources = emit()
+    assert sources.header_name == 'models.h'
+    header = sources.header
+
+    expected_parts = [
+        '#pragma once',
+        '#include <cstdint>\n#include <optional>\n#include <set>\n',
+        '// unique user id\nusing UserId = std::int64_t;',
+        'enum class Status {\n'
+        '    kActive,\n    kInProgress,\n    kQuoteD,\n};',
+        'using TagsItems = std::string;\nusing Tags = std::set<TagsItems>;',
+        'using Flag = bool;',
+        'struct User {\n'
+        '    UserId id;\n'
+        '    Status status;\n'
+        '    std::optional<Tags> tags;\n'
+        '    std::optional<UserScore> score;\n'
+        '    std::optional<Flag> class_;\n'
+        '};',
+        'using Users = std::vector<User>;',
+    ]
+    for part in expected_parts:
+        assert part in header.replace('\n\n', '\n')
+
+    # dependencies are declared first
+    assert header.index('using Flag') < header.index('struct User')
+    assert header.index('struct User') < header.index('using Users')
+
+
+def test_emit_source():
+    source = emit().source
+    assert '#include "models.h"' in source
+    assert 'case Status::kInProgress:\n            return "in-progress";' \
+        in source
+    assert 'if (value == "quote\\"d") {' in source
+
+
+def test_emit_namespace():
+    sources = emit(options=EmitterOptions(namespace='dto'))
+    assert 'namespace dto {' in sources.header
+    assert sources.header.rstrip().endswith('}  // namespace dto')
+    assert 'namespace dto {' in sources.source
+
+
+NESTED_SCHEMA = {
+    'definitions': {
+        # clashes with the name of the nested start point
+        'ShapeStart': {'type': 'bool'},
+        'Shape': {
+            'type': 'object',
+            'properties': {
+                'start': {
+                    'type': 'object',
+                    'properties': {'x': {'type': 'number'}},
+                },
+                'end': {
+                    'type': 'object',
+                    'properties': {'x': {'type': 'number'}},
+                },
+            },
+        },
+        'Path': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'properties': {'x': {'type': 'number'}},
+            },
+        },
+    },
+}
+
+
+def test_emit_shared_nested_items():
+    header = emit(NESTED_SCHEMA).header
+
+    # the point shape is declared once, with a unique name
+    assert header.count('struct ') == 2
+    assert 'using ShapeStart1X = float;' in header
+    assert 'struct ShapeStart1 {\n    std::optional<ShapeStart1X> x;\n};' \
+        in header
+    assert '    std::optional<ShapeStart1> start;\n' \
+        '    std::optional<ShapeStart1> end;\n' in header
+    assert 'using Path = std::vector<ShapeStart1>;' in header
+
+
+def test_emit_equal_nested_items_of_separate_parses():
+    # the same shape parsed by different parsers is still emitted once
+    first = Parser().parse(NESTED_SCHEMA)
+    second = Parser().parse(NESTED_SCHEMA)
+    first['Path'] = second['Path']
+    items = Linker(first).link()
+    assert CppEmitter().emit(items, 'models').header.count('struct ') == 2
+
+
+def compile_and_run(tmp_path, sources, main_body: str) -> None:
+    (tmp_path / sources.header_name).write_text(sources.header)
+    (tmp_path / 'models.cpp').write_text(sources.source)
+    (tmp_path / 'main.cpp').write_text(
+        '#include "models.h"\n'
+        'int main() {\n' + main_body + '}\n'
+    )
+    binary = tmp_path / 'main'
+    subprocess.run(
+        ['g++', '-std=c++17', '-Wall', '-Wextra', '-Werror',
+         'main.cpp', 'models.cpp', '-o', str(binary)],
+        cwd=tmp_path, check=True,
+    )
+    subprocess.run([str(binary)], check=True)
+
+
+@pytest.mark.skipif(shutil.which('g++') is None, reason='g++ is required')
+def test_emitted_code_compiles(tmp_path):
+    compile_and_run(
+        tmp_path,
+        emit(options=EmitterOptions(namespace='dto')),
+        '    dto::User user{};\n'
+        '    dto::Status status{};\n'
+        '    bool ok = dto::FromString("in-progress", status);\n'
+        '    user.status = status;\n'
+        '    return ok && dto::ToString(user.status) == "in-progress"'
+        ' ? 0 : 1;\n',
+    )
+
+
+@pytest.mark.skipif(shutil.which('g++') is None, reason='g++ is required')
+def test_shared_nested_items_compile(tmp_path):
+    compile_and_run(
+        tmp_path,
+        emit(NESTED_SCHEMA),
+        '    Shape shape{};\n'
+        '    shape.start = ShapeStart1{1.0f};\n'
+        '    Path path{*shape.start};\n'
+        '    ShapeStart flag = true;\n'
+        '    return flag && path.size() == 1 ? 0 : 1;\n',
+    )
+
+
+@pytest.mark.skipif(shutil.which('g++') is None, reason='g++ is required')
+def test_json_round_trip(tmp_path):
+    compile_and_run(
+        tmp_path,
+        emit(options=EmitterOptions(namespace='dto', json=True)),
+        '    dto::User user{};\n'
+        '    const char* json = R"({"tags": ["b\\n", "a"], "x": {"y": [1,'
+        ' "}"]}, "id": 7, "status": "quote\\"d", "class": true})";\n'
+        '    if (!dto::FromJson(json, user)) return 1;\n'
+        '    if (user.id != 7 || user.status != dto::Status::kQuoteD ||\n'
+        '        !user.class_ || !*user.class_ || user.score ||\n'
+        '        user.tags->size() != 2 || *user.tags->begin() != "a")\n'
+        '        return 2;\n'
+        '    std::string text = dto::ToJson(user);\n'
+        '    if (text != R"({"id":7,"status":"quote\\"d",'
+        '"tags":["a","b\\n"],"class":true})") return 3;\n'
+        '    dto::User copy{};\n'
+        '    if (!dto::FromJson(text, copy) || dto::ToJson(copy) != text)\n'
+        '        return 4;\n'
+        '    if (dto::FromJson(R"({"id": 7})", copy)) return 5;\n'
+        '    if (dto::FromJson(R"({"id": 7, "status": "active"} x)", copy))\n'
+        '        return 6;\n'
+        '    dto::Users users;\n'
+        '    std::string array = "[" + text + "," + text + "]";\n'
+        '    codegen_json::Reader reader(array);\n'
+        '    return codegen_json::Read(reader, users) && users.size() == 2'
+        ' ? 0 : 7;\n',
+    )
+
+
+
+@pytest.mark.skipif(shutil.which('g++') is None, reason='g++ is required')
+@pytest.mark.parametrize('container', ['vector', 'small_vector'])
+def test_json_bool_array(tmp_path, container: str):
+    schema = {'definitions': {'Flags': {
+        'type': 'object',
+        'properties': {'values': {
+            'type': 'array', 'items': {'type': 'bool'},
+            'container': container,
+        }},
+        'required': ['values'],
+    }}}
+    compile_and_run(
+        tmp_path,
+        emit(schema, EmitterOptions(json=True)),
+        '    Flags flags{};\n'
+        '    const char* json = R"({"values":[true,false,true]})";\n'
+        '    return FromJson(json, flags) && flags.values.size() == 3 &&\n'
+        '        flags.values[0] && !flags.values[1] &&\n'
+        '        ToJson(flags) == json ? 0 : 1;\n',
+    )
+
+@pytest.mark.skipif(shutil.which('g++') is None, reason='g++ is required')
+def test_json_read_resets_object(tmp_path):
+    compile_and_run(
+        tmp_path,
+        emit(options=EmitterOptions(namespace='dto', json=True)),
+        '    dto::User user{};\n'
+        '    if (!dto::FromJson(R"({"id": 7, "status": "active",'
+        ' "tags": ["a"], "class": true})", user)) return 1;\n'
+        '    if (!dto::FromJson(R"({"id": 8, "status": "active"})", user))\n'
+        '        return 2;\n'
+        '    return user.id == 8 && !user.tags && !user.class_ ? 0 : 3;\n',
+    )
+
+
+@pytest.mark.skipif(shutil.which('g++') is None, reason='g++ is required')
+def test_json_rejects_malformed_values(tmp_path):
+    compile_and_run(
+        tmp_path,
+        emit(options=EmitterOptions(namespace='dto', json=True)),
+        '    const char* invalid[] = {\n'
+        '        R"({"id": 7, "status": "active", "score": nan})",\n'
+        '        R"({"id": 7, "status": "active", "score": -inf})",\n'
+        '        R"({"id": 7, "status": "active", "score": 0x1p3})",\n'
+        '        R"({"id": 07, "status": "active"})",\n'
+        '        R"({"id": 7.5, "status": "active"})",\n'
+        '        R"({"id": 7, "status": "active", "x": [1 2 3]})",\n'
+        '        R"({"id": 7, "status": "active", "x": {"a" "b"}})",\n'
+        '        R"({"id": 7, "status": "active", "x": {"a": 1 "b": 2}})",\n'
+        '        R"({"id": 7, "status": "active", "x": [1,]})",\n'
+        '        R"({"id": 7, "status": "active", "x": nope})",\n'
+        '    };\n'
+        '    for (const char* json : invalid) {\n'
+        '        dto::User user{};\n'
+        '        if (dto::FromJson(json, user)) return 1;\n'
+        '    }\n'
+        '    dto::User user{};\n'
+        '    return dto::FromJson(R"({"id": 7, "status": "active",'
+        ' "score": -1.5e2, "x": [1, {"a": [true, null]}, {}, []]})",'
+        ' user) && *user.score == -150 ? 0 : 2;\n',
+    )
+
+BINARY_SCHEMA = {
+    'definitions': {
+        'Sample': {
+            'type': 'object',
+            'properties': {
+                'small': {'type': 'int', 'format': 'int32'},
+                'big': {'type': 'int', 'format': 'uint64'},
+                'ratio': {'type': 'number', 'format': 'float'},
+                'enabled': {'type': 'bool'},
+                'name': {'type': 'string'},
+                'flags': {'type': 'array', 'items': {'type': 'bool'}},
+                'visible': {'type': 'bool'},
+                'children': {'type': 'array', 'items': '#Child'},
+            },
+            'required': ['small', 'big', 'ratio', 'enabled', 'flags'],
+        },
+        'Child': {
+            'type': 'object',
+            'properties': {'id': {'type': 'int', 'format': 'int64'}},
+        },
+    },
+}
+
+
+@pytest.mark.skipif(shutil.which('g++') is None, reason='g++ is required')
+def test_binary_round_trip(tmp_path):
+    compile_and_run(
+        tmp_path,
+        emit(BINARY_SCHEMA, EmitterOptions(binary=True, json=True)),
+        '    Sample sample{};\n'
+        '    sample.small = -2;\n'
+        '    sample.big = 300;\n'
+        '    sample.ratio = 0.5f;\n'
+        '    sample.enabled = true;\n'
+        '    sample.flags = {true, false, false, false,'
+        ' false, false, false, false, true};\n'
+        '    sample.visible = false;\n'
+        '    std::string data = ToBinary(sample);\n'
+        # bits, small, big, ratio, flags (count and two bytes)
+        '    if (data != std::string("\\x05\\x03\\xac\\x02\\0\\0\\0\\x3f'
+        '\\x09\\x01\\x01", 11)) return 1;\n'
+        '    Sample copy{};\n'
+        '    if (!FromBinary(data, copy) || ToJson(copy) != ToJson(sample))'
+        ' return 2;\n'
+        '    if (FromBinary(data.substr(0, 10), copy)) return 3;\n'
+        '    if (FromBinary(data + "x", copy)) return 4;\n'
+        '    sample.name = "name";\n'
+        '    sample.children = SampleChildren{Child{-1}, Child{}};\n'
+        '    if (!FromBinary(ToBinary(sample), copy) ||'
+        ' ToJson(copy) != ToJson(sample)) return 5;\n'
+        '    std::string names("\\x02\\x01" "a\\x02" "bc", 6);\n'
+        '    std::vector<std::string_view> views;\n'
+        '    codegen_binary::Decoder decoder(names);\n'
+        '    if (!codegen_binary::Decode(decoder, views) ||'
+        ' views.size() != 2 || views[1] != "bc" ||\n'
+        '        views[1].data() != names.data() + 4) return 6;\n'
+        '    return 0;\n',
+    )
+
+
+LAYOUT_SCHEMA = {
+    'definitions': {
+        'Mode': {'type': 'string', 'enum': ['fast', 'slow']},
+        'Point': {
+            'type': 'object',
+            'properties': {
+                'visible': {'type': 'bool'},
+                'x': {'type': 'number', 'format': 'double'},
+                'mode': '#Mode',
+            },
+            'required': ['visible', 'x', 'mode'],
+        },
+        'Record': {
+            'type': 'object',
+            'properties': {
+                'flag': {'type': 'bool'},
+                'id': {'type': 'int', 'format': 'int64'},
+                'count': {'type': 'int', 'format': 'int32'},
+                'ratio': {'type': 'number', 'format': 'float'},
+                'name': {'type': 'string'},
+                'point': '#Point',
+                'tags': {
+                    'type': 'array',
+                    'array_type': 'set',
+                    'items': {'type': 'string'},
+                },
+                'small': {'type': 'int', 'format': 'uint32'},
+                'flags': {'type': 'array', 'items': {'type': 'bool'}},
+                'bits': {
+                    'type': 'array',
+                    'array_type': 'set',
+                    'container': 'flat_set',
+                    'items': {'type': 'bool'},
+                },
+            },
+            'required': ['flag', 'id', 'count', 'point', 'flags'],
+        },
+    },
+}
+
+
+def test_emit_reordered_members():
+    sources = emit(LAYOUT_SCHEMA, EmitterOptions(reorder_members=True))
+    assert (
+        '// members are ordered by alignment\n'
+        'struct Point {\n'
+        '    Point() = default;\n'
+        '    Point(\n'
+        '        PointVisible visible,\n'
+        '        PointX x,\n'
+        '        Mode mode);\n'
+        '\n'
+        '    PointX x;\n'
+        '    Mode mode;\n'
+        '    PointVisible visible;\n'
+    ) in sources.header
+    layouts = {
+        layout.name: layout for layout in sources.struct_layouts
+    }
+    assert layouts['Point'].declared_size == 24
+    assert layouts['Point'].packed_size == 16
+    assert layouts['Record'].get_saved_bytes() > 0
+    assert emit(LAYOUT_SCHEMA).struct_layouts == []
+
+
+@pytest.mark.skipif(shutil.which('g++') is None, reason='g++ is required')
+@pytest.mark.parametrize('reorder_members', [False, True])
+def test_estimated_struct_sizes(tmp_path, reorder_members: bool):
+    layouts = emit(
+        LAYOUT_SCHEMA, EmitterOptions(reorder_members=True)
+    ).struct_layouts
+    sources = emit(LAYOUT_SCHEMA, EmitterOptions(
+        reorder_members=reorder_members, json=True, binary=True
+    ))
+    checks = ''.join(
+        '    static_assert(sizeof({}) == {});\n'.format(
+            layout.name,
+            layout.packed_size if reorder_members else layout.declared_size,
+        )
+        for layout in layouts
+    )
+    compile_and_run(
+        tmp_path,
+        sources,
+        checks +
+        # positional initialization follows the schema order
+        '    Point point{true, 1.5, Mode::kSlow};\n'
+        '    if (!point.visible || point.x != 1.5 ||\n'
+        '        point.mode != Mode::kSlow) return 2;\n'
+        '    Record record{};\n'
+        '    record.name = "name";\n'
+        '    record.point.x = 1.5;\n'
+        '    Record copy{};\n'
+        '    return FromJson(ToJson(record), copy) &&\n'
+        '        FromBinary(ToBinary(record), copy) &&\n'
+        '        ToJson(copy) == ToJson(record) &&\n'
+        '        ToJson(record).rfind("{\\"flag\\":false,\\"id\\":0", 0) == 0'
+        ' ? 0 : 1;\n',
+    )
+
+
+def get_many_enum_values():
+    values = ['v{:03d}'.format(index) for index in range(400)]
+    values += ['x' * length for length in range(1, 20)]
+    values += ['', '\u00e9', 'e\u0301', 'status-\u00fc']
+    return values
+
+
+def test_emit_enum_from_string_switch():
+    sources = emit({'definitions': {
+        'Code': {'type': 'string', 'enum': get_many_enum_values()},
+    }})
+    from_string = sources.source[sources.source.index('bool FromString'):]
+    assert from_string.startswith(
+        'bool FromString(std::string_view value, Code& result) {\n'
+        '    switch (value.size()) {\n'
+    )
+    # dispatched by the length, then by a character
+    assert 'if (value == "v123") {' in from_string
+    assert 'switch (static_cast<unsigned char>(value[3])) {' in from_string
+
+
+@pytest.mark.skipif(shutil.which('g++') is None, reason='g++ is required')
+def test_many_enum_values_compile(tmp_path):
+    values = get_many_enum_values()
+    sources = emit({'definitions': {
+        'Code': {'type': 'string', 'enum': values},
+    }})
+    literals = ', '.join(to_string_literal(value) for value in values)
+    compile_and_run(
+        tmp_path,
+        sources,
+        '    const char* values[] = {' + literals + '};\n'
+        '    for (const char* value : values) {\n'
+        '        Code code{};\n'
+        '        if (!FromString(value, code) || ToString(code) != value)'
+        ' return 1;\n'
+        '    }\n'
+        '    Code code{};\n'
+        '    for (const char* value : {"v400", "v12", "v0000", "x_", "e",'
+        ' "V001"}) {\n'
+        '        if (FromString(value, code)) return 2;\n'
+        '    }\n'
+        '    return 0;\n',
+    )
+
+
+CONTAINER_SCHEMA = {
+    'definitions': {
+        'Point': {
+            'type': 'object',
+            'properties': {
+                'x': {'type': 'int'},
+                'y': {'type': 'int'},
+            },
+            'required': ['x', 'y'],
+        },
+        'Label': {
+            'type': 'object',
+            'properties': {
+                'words': {
+                    'type': 'array',
+                    'array_type': 'set',
+                    'container': 'unordered_set',
+                    'items': {'type': 'string'},
+                },
+                'weight': {'type': 'number'},
+            },
+            'required': ['words'],
+        },
+        'Shape': {
+            'type': 'object',
+            'properties': {
+                'points': {
+                    'type': 'array',
+                    'array_type': 'set',
+                    'container': 'flat_set',
+                    'items': '#Point',
+                },
+                'ids': {
+                    'type': 'array',
+                    'container': 'small_vector',
+                    'inline_capacity': 2,
+                    'reserve': 8,
+                    'items': {'type': 'int', 'format': 'int64'},
+                },
+                'labels': {
+                    'type': 'array',
+                    'array_type': 'set',
+                    'container': 'unordered_set',
+                    'items': '#Label',
+                },
+                'names': {'type': 'array', 'items': {'type': 'string'}},
+            },
+            'required': ['points', 'ids', 'labels'],
+        },
+    },
+}
+
+
+def test_emit_containers():
+    sources = emit(CONTAINER_SCHEMA, EmitterOptions(json=True))
+    header = sources.header
+    assert 'using ShapePoints = codegen_containers::FlatSet<Point>;' in header
+    assert (
+        'using ShapeIds = codegen_containers::SmallVector<ShapeIdsItems, 2>;'
+    ) in header
+    assert (
+        'using ShapeLabels = '
+        'std::unordered_set<Label, codegen_containers::Hasher>;'
+    ) in header
+    assert 'using ShapeNames = std::vector<LabelWordsItems>;' in header
+    # labels hold an unordered set and cannot be ordered
+    assert 'bool operator<(const Point& lhs, const Point& rhs);' in header
+    assert 'bool operator==(const Label& lhs, const Label& rhs);' in header
+    assert 'operator<(const Label&' not in header
+    assert 'operator==(const Shape&' not in header
+    assert 'struct hash<::Point> {' in header
+    assert header.index('namespace codegen_containers {') < header.index(
+        'namespace codegen_json {'
+    )
+    assert 'codegen_json::ReadReserved(reader, result.ids, 8)' in (
+        sources.source
+    )
+
+    header = emit(CONTAINER_SCHEMA, EmitterOptions(
+        namespace='dto',
+        array_container='small_vector',
+        set_container='unordered_set',
+    )).header
+    assert 'struct hash<::dto::Point> {' in header
+    assert (
+        'using ShapeNames = '
+        'codegen_containers::SmallVector<LabelWordsItems, 4>;'
+    ) in header
+    assert 'codegen_containers' not in emit().header
+    with pytest.raises(ValueError):
+        EmitterOptions(set_container='small_vector')
+
+
+@pytest.mark.parametrize('container', [None, 'set', 'flat_set'])
+def test_ordered_set_of_unordered_items(container: str):
+    objs = {'type': 'array', 'array_type': 'set', 'items': '#Obj'}
+    if container:
+        objs['container'] = container
+    schema = {'definitions': {
+        'Obj': {
+            'type': 'object',
+            'properties': {'ids': {
+                'type': 'array',
+                'array_type': 'set',
+                'container': 'unordered_set',
+                'items': {'type': 'int'},
+            }},
+        },
+        'Objs': objs,
+    }}
+    with pytest.raises(ParsingError) as e:
+        emit(schema)
+    assert e.value.context == 'Objs'
+    if container is None:
+        header = emit(schema, EmitterOptions(
+            set_container='unordered_set'
+        )).header
+        assert 'bool operator==(const Obj& lhs' in header
+        assert 'operator<(const Obj&' not in header
+
+
+@pytest.mark.skipif(shutil.which('g++') is None, reason='g++ is required')
+@pytest.mark.parametrize('namespace', ['', 'dto'])
+def test_member_named_like_its_type(tmp_path, namespace: str):
+    schema = {'definitions': {
+        'Addr': {
+            'type': 'object',
+            'properties': {'street': {'type': 'string'}},
+            'required': ['street'],
+        },
+        'Tag': {'type': 'string'},
+        'Person': {
+            'type': 'object',
+            'properties': {'Flag': {'type': 'bool'}, 'Addr': '#Addr',
+                           'Tag': '#Tag'},
+            'required': ['Flag', 'Addr'],
+        },
+    }}
+    prefix = namespace + '::' if namespace else ''
+    compile_and_run(
+        tmp_path,
+        emit(schema, EmitterOptions(
+            namespace=namespace, json=True, binary=True,
+            reorder_members=True,
+        )),
+        '    {0}Person person{{true, {0}Addr{{"x"}}, "t"}};\n'
+        '    {0}Person copy{{}};\n'
+        '    return {0}FromJson({0}ToJson(person), copy) &&\n'
+        '        copy.Addr.street == "x" && *copy.Tag == "t" ? 0 : 1;\n'
+        .format(prefix),
+    )
+
+def test_clashing_item_names():
+    with pytest.raises(ParsingError) as e:
+        emit({'definitions': {
+            'a-b': {'type': 'int'},
+            'a_b': {'type': 'bool'},
+        }})
+    assert "'a-b' and 'a_b'" in str(e.value)
+
+
+@pytest.mark.skipif(shutil.which('g++') is None, reason='g++ is required')
+def test_containers_compile(tmp_path):
+    layouts = emit(
+        CONTAINER_SCHEMA, EmitterOptions(reorder_members=True)
+    ).struct_layouts
+    checks = ''.join(
+        '    static_assert(sizeof(dto::{}) == {});\n'.format(
+            layout.name, layout.declared_size
+        )
+        for layout in layouts
+    )
+    compile_and_run(
+        tmp_path,
+        emit(CONTAINER_SCHEMA, EmitterOptions(
+            namespace='dto', json=True, binary=True
+        )),
+        checks +
+        '    dto::Shape shape{};\n'
+        '    shape.points.insert(dto::Point{2, 1});\n'
+        '    shape.points.insert(dto::Point{1, 5});\n'
+        '    shape.points.insert(dto::Point{2, 1});\n'
+        '    if (shape.points.size() != 2 || shape.points.begin()->x != 1)'
+        ' return 1;\n'
+        '    for (int i = 0; i < 5; ++i) shape.ids.push_back(i);\n'
+        '    shape.ids.emplace_back(shape.ids[4]);\n'
+        '    if (shape.ids.size() != 6 || shape.ids[5] != 4) return 2;\n'
+        '    dto::Label label{};\n'
+        '    label.words = {"a", "b", "c"};\n'
+        '    shape.labels.insert(label);\n'
+        '    label.words = {"c", "b", "a"};\n'
+        '    shape.labels.insert(label);\n'
+        '    label.weight = 0.5f;\n'
+        '    shape.labels.insert(label);\n'
+        '    if (shape.labels.size() != 2) return 3;\n'
+        '    std::hash<dto::Point> hash;\n'
+        '    if (hash(dto::Point{1, 5}) != hash(dto::Point{1, 5}) ||\n'
+        '        hash(dto::Point{1, 5}) == hash(dto::Point{5, 1})) return 4;\n'
+        '    dto::Shape copy{};\n'
+        '    if (!dto::FromJson(dto::ToJson(shape), copy) ||\n'
+        '        copy.points != shape.points || copy.ids != shape.ids ||\n'
+        '        copy.labels != shape.labels) return 5;\n'
+        '    copy = dto::Shape{};\n'
+        '    if (!dto::FromBinary(dto::ToBinary(shape), copy) ||\n'
+        '        copy.points != shape.points || copy.ids != shape.ids ||\n'
+        '        copy.labels != shape.labels) return 6;\n'
+        '    dto::ShapeIds ids = shape.ids;\n'
+        '    ids = std::move(copy.ids);\n'
+        '    ids.pop_back();\n'
+        '    dto::ShapeIds small{7};\n'
+        '    dto::ShapeIds moved = std::move(small);\n'
+        '    return ids.size() == 5 && moved.size() == 1 && moved[0] == 7'
+        ' ? 0 : 7;\n',
+    )
@@ -0,0 +1,107 @@
+import pytest
+
+import codegen.parser.models as models
+from codegen.parser.linker import Linker, iter_item_refs
+from codegen.parser.parser import Parser
+from codegen.parser.utils import ParsingError
+
+
+def parse(**definitions) -> dict:
+    return Parser().parse({'definitions': definitions})
+
+
+def test_link_resolves_references():
+    model = parse(
+        User={
+            'type': 'object',
+            'properties': {
+                'id': '#Id',
+                'friends': {'type': 'array', 'items': '#User'},
+            },
+        },
+        Id={'type': 'int'},
+    )
+    linker = Linker(model)
+    linker.resolve()
+
+    refs = list(iter_item_refs(model['User']))
+    assert [ref.is_ref() for ref in refs] == [True, False, True]
+    assert refs[0].get_target() is model['Id']
+    assert refs[1].get_target() is refs[1].get_item()
+    assert refs[2].get_target() is model['User']
+    assert linker.get_item('Id') is model['Id']
+
+
+def test_link_reports_all_dangling_references():
+    model = parse(
+        Users={'type': 'array', 'items': '#User'},
+        Pair={
+            'type': 'object',
+            'properties': {'first': '#Id', 'second': '#Other'},
+        },
+    )
+    with pytest.raises(ParsingError) as error:
+        Linker(model).link()
+    message = str(error.value)
+    assert 'Users: unknown item \'User\'' in message
+    assert 'Pair: unknown item \'Id\'' in message
+    assert 'Pair: unknown item \'Other\'' in message
+
+
+def test_link_dependency_order():
+    model = parse(
+        Users={'type': 'array', 'items': '#User'},
+        Flag={'type': 'bool'},
+        User={
+            'type': 'object',
+            'properties': {
+                'id': '#Id',
+                'tags': {'type': 'array', 'items': '#Tag'},
+            },
+        },
+        Tag={'type': 'string'},
+        Id={'type': 'int'},
+    )
+    order = [item.name for item in Linker(model).link()]
+    assert order == ['Id', 'Tag', 'User', 'Users', 'Flag']
+
+
+@pytest.mark.parametrize(
+    "definitions,exp_cycle",
+    [
+        (
+            {'Node': {'type': 'array', 'items': '#Node'}},
+            'Node -> Node',
+        ),
+        (
+            {
+                'First': {'type': 'array', 'items': '#Second'},
+                'Second': {
+                    'type': 'object',
+                    'properties': {'first': '#First'},
+                },
+                'Root': {'type': 'array', 'items': '#First'},
+            },
+            'First -> Second -> First',
+        ),
+    ],
+    ids=['self', 'transitive']
+)
+def test_link_cycle(definitions: dict, exp_cycle: str):
+    with pytest.raises(ParsingError) as error:
+        Linker(parse(**definitions)).link()
+    assert str(error.value) == 'circular reference: {}'.format(exp_cycle)
+
+
+def test_item_ref_resolve():
+    item_ref = models.ItemRef()
+    item_ref.set_ref('Id')
+    assert not item_ref.is_resolved()
+
+    target = models.ModelInt('Id')
+    item_ref.resolve(target)
+    assert item_ref.is_resolved()
+    assert item_ref.get_target() is target
+
+    item_ref.set_ref('Other')
+    assert item_ref.get_target() is None
@@ -0,0 +1,84 @@
+import os
+import stat
+
+from codegen.codegen import CodeGenerator
+from codegen.output import OutputWriter
+
+
+def test_write_if_changed(tmp_path):
+    path = str(tmp_path / 'model.h')
+    writer = OutputWriter()
+
+    assert writer.write(path, 'struct A {};\n')
+    os.utime(path, ns=(1, 1))
+    assert not writer.write(path, 'struct A {};\n')
+    assert os.stat(path).st_mtime_ns == 1
+
+    assert writer.write(path, 'struct B {};\n')
+    assert open(path).read() == 'struct B {};\n'
+    assert (writer.written, writer.skipped) == (2, 1)
+    assert os.listdir(tmp_path) == ['model.h']
+
+
+def test_written_file_mode(tmp_path):
+    path = str(tmp_path / 'model.h')
+    OutputWriter().write(path, '')
+    umask = os.umask(0)
+    os.umask(umask)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o666 & ~umask
+
+
+def test_manifest(tmp_path, monkeypatch):
+    path = str(tmp_path / 'model.h')
+    manifest_path = str(tmp_path / 'manifest.json')
+    writer = OutputWriter(manifest_path)
+    assert writer.write(path, 'struct A {};\n')
+    writer.save_manifest()
+
+    # unchanged files are recognized without reading them
+    original_open = open
+
+    def no_reading_open(file, mode='r', *args, **kwargs):
+        assert not (file == path and 'r' in mode), 'file must not be read'
+        return original_open(file, mode, *args, **kwargs)
+
+    monkeypatch.setattr('builtins.open', no_reading_open)
+    writer = OutputWriter(manifest_path)
+    assert not writer.write(path, 'struct A {};\n')
+    assert writer.write(path, 'struct B {};\n')
+    monkeypatch.undo()
+
+    # the manifest is not trusted once the file is touched by others
+    with open(path, 'w') as file:
+        file.write('struct C {};\n')
+    writer = OutputWriter(manifest_path)
+    assert writer.write(path, 'struct B {};\n')
+
+
+def test_generator_keeps_unchanged_outputs(tmp_path):
+    schema_path = tmp_path / 'schema.yaml'
+    schema_path.write_text('definitions:\n  Flag:\n    type: bool\n')
+    result_path = str(tmp_path / 'out' / 'schema')
+
+    CodeGenerator().generate_cpp(str(schema_path), result_path)
+    for extension in ('.h', '.cpp'):
+        os.utime(result_path + extension, ns=(1, 1))
+
+    CodeGenerator().generate_cpp(str(schema_path), result_path)
+    for extension in ('.h', '.cpp'):
+        assert os.stat(result_path + extension).st_mtime_ns == 1
+
+    schema_path.write_text('definitions:\n  Flag:\n    type: int\n')
+    CodeGenerator().generate_cpp(str(schema_path), result_path)
+    assert os.stat(result_path + '.h').st_mtime_ns != 1
+    assert os.stat(result_path + '.cpp').st_mtime_ns == 1
+
+
+def test_dry_run(tmp_path):
+    path = str(tmp_path / 'model.h')
+    manifest_path = str(tmp_path / 'manifest.json')
+    writer = OutputWriter(manifest_path, dry_run=True)
+    assert writer.write(path, 'struct A {};\n')
+    writer.save_manifest()
+    assert (writer.written, writer.bytes_written) == (1, 13)
+    assert os.listdir(tmp_path) == []
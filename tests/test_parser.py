@@ -1,7 +1,12 @@
+import json
+import logging
+
 import pytest
 
 from codegen.parser.utils import ParsingError
+import codegen.parser.utils as utils
 import codegen.parser.models as models
+from codegen.parser.parser import Parser
 
 
 def get_item_ref(item: dict, ref: str):
@@ -286,7 +291,7 @@ def test_parse_array(
     if exp_items:
         assert item.items_type.is_item()
         assert not item.items_type.is_ref()
-        assert exp_items.__dict__ == item.items_type.get_item().__dict__
+        assert exp_items == item.items_type.get_item()
 
     if exp_ref:
         assert not item.items_type.is_item()
@@ -294,6 +299,70 @@ def test_parse_array(
         assert exp_ref == item.items_type.get_ref()
 
 
+@pytest.mark.parametrize(
+    "item_dict,exp_container,exp_capacity,exp_reserve,is_err_exp",
+    [
+        ({}, None, 4, None, False),
+        (
+            {'container': 'small_vector', 'inline_capacity': 8},
+            models.ModelArray.Container.SmallVector,
+            8,
+            None,
+            False,
+        ),
+        ({'inline_capacity': 2}, None, 2, None, False),
+        (
+            {'array_type': 'set', 'container': 'flat_set', 'reserve': 16},
+            models.ModelArray.Container.FlatSet,
+            4,
+            16,
+            False,
+        ),
+        ({'array_type': 'set', 'reserve': 0}, None, 4, 0, False),
+        ({'container': 'flat_set'}, None, 4, None, True),
+        ({'array_type': 'set', 'container': 'vector'}, None, 4, None, True),
+        ({'container': 'list'}, None, 4, None, True),
+        ({'container': 'vector', 'inline_capacity': 2}, None, 4, None, True),
+        ({'inline_capacity': 0}, None, 4, None, True),
+        ({'array_type': 'set', 'inline_capacity': 2}, None, 4, None, True),
+        ({'reserve': -1}, None, 4, None, True),
+        ({'reserve': True}, None, 4, None, True),
+        (
+            {'array_type': 'set', 'container': 'set', 'reserve': 4},
+            None,
+            4,
+            None,
+            True,
+        ),
+    ],
+    ids=[
+        'default', 'small vector', 'global small vector', 'flat set',
+        'set reserve', 'set container of array', 'array container of set',
+        'unknown container', 'capacity of vector', 'zero capacity',
+        'capacity of set', 'negative reserve', 'bool reserve',
+        'std::set reserve',
+    ]
+)
+def test_parse_array_container(
+    item_dict: dict,
+    exp_container: models.ModelArray.Container,
+    exp_capacity: int,
+    exp_reserve: int,
+    is_err_exp: bool,
+):
+    item = models.ModelArray('Array')
+    try:
+        item.parse(dict(item_dict, items={'type': 'int'}))
+        assert not is_err_exp
+    except ParsingError as e:
+        assert is_err_exp, 'unexpected exception: {}'.format(e)
+        return
+
+    assert exp_container == item.container
+    assert exp_capacity == item.get_inline_capacity()
+    assert exp_reserve == item.reserve
+
+
 @pytest.mark.parametrize(
     "item_dict,exp_properties,exp_required,is_err_exp",
     [
@@ -344,7 +413,7 @@ def test_parse_array(
             },
             {
                 'int_type': get_item_ref(
-                    models.ModelInt('ObjectItems'),
+                    models.ModelInt('ObjectIntType'),
                     None,
                 )
             },
@@ -358,7 +427,7 @@ def test_parse_array(
             },
             {
                 'int_type': get_item_ref(
-                    models.ModelInt('ObjectItems'),
+                    models.ModelInt('ObjectIntType'),
                     None,
                 )
             },
@@ -372,7 +441,7 @@ def test_parse_array(
             },
             {
                 'int_type': get_item_ref(
-                    models.ModelInt('ObjectItems'),
+                    models.ModelInt('ObjectIntType'),
                     None,
                 )
             },
@@ -409,8 +478,295 @@ def test_parse_object(
             assert prop.get_ref() == value.get_ref()
         else:
             assert prop.is_item()
-            assert prop.get_item().__dict__ == value.get_item().__dict__
+            assert prop.get_item() == value.get_item()
 
     assert len(exp_required) == len(item.required)
     for i in range(len(exp_required)):
         exp_required[i] == item.required[i]
+
+
+def get_schema(**definitions) -> dict:
+    return {'definitions': definitions}
+
+
+INCREMENTAL_SCHEMA = get_schema(
+    Id={'type': 'int'},
+    Name={'type': 'string'},
+    User={
+        'type': 'object',
+        'properties': {'id': '#Id', 'name': '#Name'},
+    },
+    Users={'type': 'array', 'items': '#User'},
+    Flag={'type': 'bool'},
+)
+
+
+def test_parser_returns_items():
+    model = Parser().parse(INCREMENTAL_SCHEMA)
+    assert list(model) == ['Id', 'Name', 'User', 'Users', 'Flag']
+    assert isinstance(model['Users'], models.ModelArray)
+
+
+def test_parser_dependents():
+    parser = Parser()
+    parser.parse(INCREMENTAL_SCHEMA)
+    assert parser.get_dependents('Id') == {'User'}
+    assert parser.get_dependents('User') == {'Users'}
+    assert parser.get_dependents('Flag') == set()
+
+
+@pytest.mark.parametrize(
+    "changes,exp_affected",
+    [
+        (
+            {},
+            set(),
+        ),
+        (
+            {'Flag': {'type': 'bool', 'description': 'flag'}},
+            {'Flag'},
+        ),
+        (
+            {'Id': {'type': 'int', 'format': 'int64'}},
+            {'Id', 'User', 'Users'},
+        ),
+        (
+            {'Users': {'type': 'array', 'items': '#Name'}},
+            {'Users'},
+        ),
+        (
+            {'Flag': None},
+            {'Flag'},
+        ),
+        (
+            {'Extra': {'type': 'bool'}},
+            {'Extra'},
+        ),
+    ],
+    ids=['unchanged', 'leaf', 'transitive', 'new ref', 'removed', 'added']
+)
+def test_parser_update(changes: dict, exp_affected: set):
+    parser = Parser()
+    model = parser.parse(INCREMENTAL_SCHEMA)
+    old_items = dict(model)
+
+    definitions = dict(INCREMENTAL_SCHEMA['definitions'])
+    for name, item_dict in changes.items():
+        if item_dict is None:
+            del definitions[name]
+        else:
+            definitions[name] = item_dict
+
+    affected = parser.update(get_schema(**definitions))
+    assert affected == exp_affected
+
+    new_model = parser.get_items()
+    assert list(new_model) == list(definitions)
+    for name, item in new_model.items():
+        if name in changes:
+            assert item is not old_items.get(name)
+        else:
+            assert item is old_items[name]
+
+
+def test_parser_update_keeps_model_on_error():
+    parser = Parser()
+    parser.parse(INCREMENTAL_SCHEMA)
+    definitions = dict(INCREMENTAL_SCHEMA['definitions'])
+    definitions['Id'] = {'type': 'int', 'format': 'int128'}
+
+    with pytest.raises(ParsingError):
+        parser.update(get_schema(**definitions))
+
+    model = parser.get_items()
+    assert model['Id'].int_type == models.ModelInt.IntType.Int32
+    assert parser.update(INCREMENTAL_SCHEMA) == set()
+
+
+@pytest.mark.parametrize(
+    "item_class",
+    [
+        models.ModelInt, models.ModelNumber, models.ModelBool,
+        models.ModelString, models.ModelArray, models.ModelObject,
+    ],
+)
+def test_compact_items(item_class):
+    item = item_class('Item')
+    assert not hasattr(item, '__dict__')
+    assert item == item_class('Item')
+    assert item != models.ModelItem('Item')
+    assert item.ALLOWED_FIELDS is item_class('Other').ALLOWED_FIELDS
+    assert not hasattr(models.ItemRef(), '__dict__')
+
+
+@pytest.mark.parametrize(
+    "value,is_err_expected",
+    [('int64', False), ('int128', True), (['int64'], True), (None, True)],
+    ids=['valid', 'unknown', 'unhashable', 'none'],
+)
+def test_parse_enum(value, is_err_expected: bool):
+    try:
+        result = utils.parse_enum(value, models.ModelInt.IntType, 'format')
+        assert not is_err_expected
+        assert result == models.ModelInt.IntType.Int64
+    except ParsingError as e:
+        assert is_err_expected, 'unexpected exception: {}'.format(e)
+
+
+def test_item_types_registry():
+    assert set(models.ITEM_TYPES) == set(models.ModelItemType) - {
+        models.ModelItemType.Item
+    }
+    for item_type, item_class in models.ITEM_TYPES.items():
+        assert isinstance(models.create_item('Item', item_type), item_class)
+    with pytest.raises(ParsingError):
+        models.create_item('Item', models.ModelItemType.Item)
+
+
+def test_parser_collect_errors():
+    definitions = [
+        utils.Definition('Id', {'type': 'int', 'format': 'int128'}, 2, 3),
+        utils.Definition('Flag', {'type': 'bool'}, 5, 3),
+        utils.Definition('Users', {'type': 'array'}, 7, 3),
+        utils.Definition('Flag', {'type': 'bool'}, 9, 3),
+        utils.Definition('Tags', {
+            'type': 'array',
+            'items': {'type': 'string', 'enum': []},
+        }),
+    ]
+    with pytest.raises(ParsingError) as error:
+        Parser().parse_definitions(definitions)
+    assert not isinstance(error.value, utils.ParsingErrors)
+
+    with pytest.raises(utils.ParsingErrors) as error:
+        Parser(collect_errors=True).parse_definitions(definitions)
+    assert error.value.errors == [
+        ('Id', 'field format has invalid value \'int128\'', 2, 3),
+        ('Users', 'array requires field items', 7, 3),
+        ('Flag', 'Flag is defined more than once', 9, 3),
+        ('Tags', 'TagsItems: empty enum', None, None),
+    ]
+    assert error.value.to_text().splitlines() == [
+        '2:3: Id: field format has invalid value \'int128\'',
+        '7:3: Users: array requires field items',
+        '9:3: Flag: Flag is defined more than once',
+        'Tags: TagsItems: empty enum',
+    ]
+    assert json.loads(error.value.format('json'))['errors'][1] == {
+        'definition': 'Users',
+        'message': 'array requires field items',
+        'line': 7,
+        'column': 3,
+    }
+
+
+@pytest.mark.parametrize(
+    "definitions,is_err_exp",
+    [
+        ({'A': {'type': 'int'}}, False),
+        ({'A': None}, True),
+        ({'A': ['type', 'int']}, True),
+        ({'A': 'int'}, True),
+        ({'A': {'type': 'item'}}, True),
+        ({'A': {'type': 'object', 'properties': {'a': None}}}, True),
+        (
+            {'A': {'type': 'object', 'properties': {'a': {'type': 'item'}}}},
+            True,
+        ),
+        (
+            {'A': {'type': 'array', 'items': {'type': 'item'}}},
+            True,
+        ),
+        (['A'], True),
+    ],
+    ids=[
+        'valid', 'none', 'list', 'string', 'base type', 'none property',
+        'base type property', 'base type items', 'definitions list',
+    ]
+)
+def test_parser_collect_malformed_definitions(
+    definitions, is_err_exp: bool
+):
+    try:
+        Parser(collect_errors=True).parse({'definitions': definitions})
+        assert not is_err_exp
+    except ParsingError as e:
+        assert is_err_exp, 'unexpected exception: {}'.format(e)
+
+
+def test_parser_non_string_keys():
+    items = Parser().parse({'definitions': {
+        1: {'type': 'object', 'properties': {2: {'type': 'int'}}},
+        'Ref': {'type': 'array', 'items': '#1'},
+    }})
+    assert list(items) == ['1', 'Ref']
+    assert items['1'].name == '1'
+    assert list(items['1'].properties) == ['2']
+    assert items['Ref'].items_type.get_ref() == '1'
+
+
+def test_parser_update_collect_errors():
+    parser = Parser(collect_errors=True)
+    parser.parse(INCREMENTAL_SCHEMA)
+    definitions = dict(INCREMENTAL_SCHEMA['definitions'])
+    definitions['Id'] = {'type': 'integer'}
+    definitions['Flag'] = {'type': 'bool', 'extra': 1}
+
+    with pytest.raises(utils.ParsingErrors) as error:
+        parser.update(get_schema(**definitions))
+    assert [e.definition for e in error.value.errors] == ['Id', 'Flag']
+    assert parser.update(INCREMENTAL_SCHEMA) == set()
+
+
+def test_parser_debug_log(caplog):
+    with caplog.at_level(logging.INFO, logger='codegen'):
+        Parser().parse(INCREMENTAL_SCHEMA)
+    assert caplog.records == []
+
+    with caplog.at_level(logging.DEBUG, logger='codegen'):
+        Parser().parse(INCREMENTAL_SCHEMA)
+    assert len(caplog.records) == len(INCREMENTAL_SCHEMA['definitions'])
+    assert caplog.records[0].getMessage().startswith('parsed ModelInt(')
+
+
+def test_parser_shares_nested_items():
+    point = {'type': 'object', 'properties': {'x': {'type': 'number'}}}
+    model = Parser().parse(get_schema(
+        Shape={
+            'type': 'object',
+            'properties': {'start': point, 'end': point},
+        },
+        Path={'type': 'array', 'items': dict(point)},
+    ))
+
+    shape = model['Shape']
+    start = shape.properties['start'].get_item()
+    assert start.name == 'ShapeStart'
+    assert shape.properties['end'].get_item() is start
+    assert model['Path'].items_type.get_item() is start
+    assert [name for name, _ in shape.get_nested_items()] == [
+        'start', 'end'
+    ]
+
+
+def test_nested_item_names():
+    model = Parser().parse(get_schema(
+        User={
+            'type': 'object',
+            'properties': {
+                'home_address': {'type': 'string'},
+                'score': {'type': 'int'},
+            },
+        },
+    ))
+    properties = model['User'].properties
+    assert properties['home_address'].get_item().name == 'UserHomeAddress'
+    assert properties['score'].get_item().name == 'UserScore'
+
+
+def test_get_shape():
+    first = models.ModelInt('First')
+    second = models.ModelInt('Second')
+    assert models.get_shape(first) == models.get_shape(second)
+    second.int_type = models.ModelInt.IntType.Int64
+    assert models.get_shape(first) != models.get_shape(second)
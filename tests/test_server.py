@@ -0,0 +1,137 @@
+import asyncio
+import multiprocessing
+import os
+import socket
+import threading
+import time
+
+import pytest
+
+import codegen
+from codegen.cli import EXIT_OK, EXIT_SERVER_UNAVAILABLE, main
+from codegen.client import GenerationClient, ServerError
+from codegen.server import GenerationServer
+
+
+VALID_SCHEMA = 'definitions:\n  Flag:\n    type: bool\n'
+BROKEN_SCHEMA = 'definitions:\n  Flag:\n    type: boolean\n'
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    path = str(tmp_path / 'codegen.sock')
+    server = GenerationServer(path, jobs=2)
+    thread = threading.Thread(target=asyncio.run, args=(server.serve(),))
+    thread.start()
+    assert server.ready.wait(timeout=10)
+
+    yield path
+
+    if thread.is_alive():
+        GenerationClient(path).shutdown()
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+
+
+def test_generate(socket_path, tmp_path):
+    (tmp_path / 'good.yaml').write_text(VALID_SCHEMA)
+    (tmp_path / 'bad.yaml').write_text(BROKEN_SCHEMA)
+    output_dir = tmp_path / 'out'
+
+    with GenerationClient(socket_path) as client:
+        assert client.ping() == codegen.__version__
+        results = client.generate(
+            [str(tmp_path / 'good.yaml'), str(tmp_path / 'bad.yaml')],
+            str(output_dir),
+        )
+        assert [result['error'] is None for result in results] == [
+            True, False
+        ]
+        assert results[0]['changed_paths'] == [
+            str(output_dir / 'good.h'), str(output_dir / 'good.cpp')
+        ]
+        assert 'ParsingError' in results[1]['error']
+
+        [result] = client.generate(
+            [str(tmp_path / 'bad.yaml')],
+            str(output_dir),
+            collect_errors=True,
+            error_format='json',
+        )
+        assert '"definition": "Flag"' in result['error']
+        with pytest.raises(ServerError, match='invalid generate request'):
+            client.generate(
+                [str(tmp_path / 'bad.yaml')], str(output_dir),
+                error_format='xml',
+            )
+
+        # the connection is reused, nothing changed since the last request
+        results = client.generate([str(tmp_path / 'good.yaml')], output_dir)
+        assert results[0]['changed_paths'] == []
+
+        with pytest.raises(ServerError):
+            client.request({'command': 'restart'})
+
+
+def test_socket_owner_only(socket_path):
+    assert os.stat(socket_path).st_mode & 0o777 == 0o600
+
+
+def test_second_server(socket_path, tmp_path):
+    with pytest.raises(RuntimeError):
+        asyncio.run(GenerationServer(socket_path, jobs=1).serve())
+    with GenerationClient(socket_path) as client:
+        assert client.ping() == codegen.__version__
+
+    # a socket nothing listens on is left by a server which is gone
+    stale_path = str(tmp_path / 'stale.sock')
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(stale_path)
+    stale.close()
+    server = GenerationServer(stale_path, jobs=1)
+    thread = threading.Thread(target=asyncio.run, args=(server.serve(),))
+    thread.start()
+    assert server.ready.wait(timeout=10)
+    GenerationClient(stale_path).shutdown()
+    thread.join(timeout=10)
+
+
+def test_broken_worker_pool(socket_path, tmp_path):
+    (tmp_path / 'good.yaml').write_text(VALID_SCHEMA)
+    sources = [str(tmp_path / 'good.yaml')]
+    output_dir = str(tmp_path / 'out')
+    with GenerationClient(socket_path) as client:
+        client.generate(sources, output_dir)
+        for process in multiprocessing.active_children():
+            process.kill()
+            process.join()
+        with pytest.raises(ServerError, match='worker pool is broken'):
+            client.generate(sources, output_dir)
+        # the pool is replaced
+        [result] = client.generate(sources, output_dir)
+        assert result['error'] is None
+
+
+def test_shutdown(socket_path):
+    GenerationClient(socket_path).shutdown()
+    deadline = time.monotonic() + 10
+    while os.path.exists(socket_path):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_cli_connect(socket_path, tmp_path, capsys):
+    (tmp_path / 'model.yaml').write_text(VALID_SCHEMA)
+    argv = [
+        str(tmp_path / 'model.yaml'), '-o', str(tmp_path / 'out'),
+        '--connect', socket_path,
+    ]
+    assert main(argv) == EXIT_OK
+    assert '1 schema(s), 0 failed, 2 file(s) changed' in (
+        capsys.readouterr().out
+    )
+    assert (tmp_path / 'out' / 'model.h').exists()
+
+    argv[-1] = str(tmp_path / 'missing.sock')
+    assert main(argv) == EXIT_SERVER_UNAVAILABLE
+    assert 'cannot reach the server' in capsys.readouterr().err
@@ -0,0 +1,75 @@
+import os
+import subprocess
+import sys
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# cumulative import time of codegen.cli, generous for slow CI machines
+IMPORT_BUDGET_US = 100000
+IMPORT_RUNS = 3
+
+# not needed by every invocation, so must not be imported at start
+LAZY_MODULES = [
+    'yaml',
+    'asyncio',
+    'cProfile',
+    'concurrent.futures.process',
+    'codegen.codegen',
+    'codegen.parser.models',
+    'codegen.emitter.cpp',
+    'codegen.server',
+    'codegen.watch',
+]
+
+
+def run_python(code: str, *options: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *options, '-c', code],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def get_import_times(module: str) -> dict:
+    """
+    returns cumulative import times in microseconds by module name
+    """
+
+    stderr = run_python('import ' + module, '-X', 'importtime').stderr
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_cli_import_budget():
+    times = get_import_times('codegen.cli')
+    for module in LAZY_MODULES:
+        assert module not in times, '{} is imported at start'.format(module)
+
+    best = min(
+        get_import_times('codegen.cli')['codegen.cli']
+        for _ in range(IMPORT_RUNS)
+    )
+    assert best < IMPORT_BUDGET_US
+
+
+def test_cache_hit_does_not_import_yaml(tmp_path):
+    schema_path = tmp_path / 'model.yaml'
+    schema_path.write_text('definitions:\n  Flag:\n    type: bool\n')
+    code = (
+        'import sys\n'
+        'from codegen.cli import main\n'
+        'main([{!r}, "-o", {!r}, "--cache-dir", {!r}, "-j", "1", "-q"])\n'
+        'print("yaml" in sys.modules)\n'
+    ).format(
+        str(schema_path), str(tmp_path / 'out'), str(tmp_path / 'cache')
+    )
+    assert run_python(code).stdout == 'True\n'
+    assert run_python(code).stdout == 'False\n'
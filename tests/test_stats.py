@@ -0,0 +1,77 @@
+import codegen.stats as stats
+from codegen.cache import ParseCache
+from codegen.codegen import CodeGenerator
+
+
+SCHEMA = '''
+definitions:
+  Id:
+    type: int
+  User:
+    type: object
+    properties:
+      id: '#Id'
+      name:
+        type: string
+'''
+
+
+def test_inactive():
+    assert stats.get_active() is None
+    with stats.span('parse'):
+        stats.count(stats.BYTES_READ, 10)
+
+    with stats.profiling() as profile:
+        assert stats.get_active() is profile
+    assert stats.get_active() is None
+    assert profile.to_dict() == {
+        'timers': {}, 'counters': {}, 'cache_hit_rate': None
+    }
+
+
+def test_generation_stats(tmp_path):
+    schema_path = tmp_path / 'model.yaml'
+    schema_path.write_text(SCHEMA)
+    result_path = str(tmp_path / 'out' / 'model')
+    cache = ParseCache(str(tmp_path / 'cache'))
+
+    with stats.profiling() as profile:
+        CodeGenerator(cache).generate_cpp(str(schema_path), result_path)
+        CodeGenerator(cache).generate_cpp(str(schema_path), result_path)
+
+    counters = profile.to_dict()['counters']
+    assert counters == {
+        'bytes_read': len(SCHEMA),
+        'bytes_written': counters['bytes_written'],
+        'cache_hits': 1,
+        'cache_misses': 1,
+        'files_skipped': 2,
+        'files_written': 2,
+        'items.int': 1,
+        'items.object': 1,
+    }
+    assert profile.get_cache_hit_rate() == 0.5
+    assert set(profile.timers) == {
+        'load', 'parse', 'parse_item.int', 'parse_item.object',
+        'link', 'emit', 'write',
+    }
+    # the cached model is neither loaded nor parsed again
+    assert profile.timers['load'].calls == 1
+    assert profile.timers['parse'].calls == 1
+    assert profile.timers['link'].calls == 2
+
+
+def test_merge_and_chrome_trace():
+    first, second = stats.Profile(), stats.Profile()
+    with first.span('parse'):
+        first.count('items.int')
+    with second.span('emit'):
+        second.count('items.int', 2)
+    first.merge(second)
+
+    assert first.counters == {'items.int': 3}
+    trace = first.to_chrome_trace()
+    assert [event['name'] for event in trace['traceEvents']] == [
+        'parse', 'emit'
+    ]
+    assert all(event['ph'] == 'X' for event in trace['traceEvents'])
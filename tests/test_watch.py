@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+
+import pytest
+
+from codegen.watch import (
+    InotifyWatcher,
+    PollingWatcher,
+    WatchSession,
+    run_watch,
+)
+
+
+SCHEMA = (
+    'definitions:\n'
+    '  Id:\n'
+    '    type: int\n'
+    '  User:\n'
+    '    type: object\n'
+    '    properties:\n'
+    '      id: "#Id"\n'
+    '  Flag:\n'
+    '    type: bool\n'
+)
+
+
+def make_watcher(kind: str, inputs):
+    if kind == 'inotify':
+        if not InotifyWatcher.is_supported():
+            pytest.skip('inotify is not available')
+        return InotifyWatcher(inputs, debounce=0.05)
+    return PollingWatcher(inputs, debounce=0.05, poll_interval=0.01)
+
+
+def write_later(path, text: str, delay: float = 0.05):
+    def write():
+        time.sleep(delay)
+        # make sure mtime differs for the polling watcher
+        path.write_text(text)
+        os.utime(path, ns=(time.time_ns(), time.time_ns()))
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    return thread
+
+
+@pytest.mark.parametrize('kind', ['inotify', 'polling'])
+def test_watcher_reports_changes(tmp_path, kind: str):
+    schema_path = tmp_path / 'schemas' / 'user.yaml'
+    schema_path.parent.mkdir()
+    schema_path.write_text(SCHEMA)
+    (tmp_path / 'schemas' / 'notes.txt').write_text('')
+
+    watcher = make_watcher(kind, [str(tmp_path / 'schemas')])
+    try:
+        assert watcher.wait_for_changes(timeout=0.05) == set()
+
+        thread = write_later(schema_path, SCHEMA + '  Other:\n    type: int\n')
+        changes = watcher.wait_for_changes(timeout=5)
+        thread.join()
+        assert changes == {str(schema_path)}
+
+        thread = write_later(tmp_path / 'schemas' / 'notes.txt', 'text')
+        assert watcher.wait_for_changes(timeout=0.3) == set()
+        thread.join()
+    finally:
+        watcher.close()
+
+
+@pytest.mark.parametrize('kind', ['inotify', 'polling'])
+def test_watcher_filters_listed_files(tmp_path, kind: str):
+    watched_path = tmp_path / 'watched.yaml'
+    other_path = tmp_path / 'other.yaml'
+    watched_path.write_text(SCHEMA)
+    other_path.write_text(SCHEMA)
+
+    watcher = make_watcher(kind, [str(watched_path)])
+    try:
+        thread = write_later(other_path, SCHEMA + '\n')
+        assert watcher.wait_for_changes(timeout=0.3) == set()
+        thread.join()
+    finally:
+        watcher.close()
+
+
+def test_watch_session(tmp_path):
+    schema_path = tmp_path / 'user.yaml'
+    schema_path.write_text(SCHEMA)
+    session = WatchSession(str(tmp_path / 'out'))
+
+    assert session.update(str(schema_path)) == {'Id', 'User', 'Flag'}
+    header_path = tmp_path / 'out' / 'user.h'
+    assert 'struct User' in header_path.read_text()
+
+    assert session.update(str(schema_path)) == set()
+
+    schema_path.write_text(SCHEMA.replace('type: int', 'type: bool'))
+    assert session.update(str(schema_path)) == {'Id', 'User'}
+    assert 'using Id = bool;' in header_path.read_text()
+
+    schema_path.unlink()
+    assert session.update(str(schema_path)) == set()
+
+
+def test_watch_session_write_failure(tmp_path, monkeypatch):
+    schema_path = tmp_path / 'user.yaml'
+    schema_path.write_text(SCHEMA)
+    session = WatchSession(str(tmp_path / 'out'))
+    session.update(str(schema_path))
+
+    def fail(*args):
+        raise OSError('disk full')
+
+    schema_path.write_text(SCHEMA.replace('type: int', 'type: bool'))
+    with monkeypatch.context() as patch:
+        patch.setattr(session.code_generator, 'write_model', fail)
+        with pytest.raises(OSError):
+            session.update(str(schema_path))
+
+    # the change is not lost, it is written on the next update
+    assert session.update(str(schema_path)) == {'Id', 'User'}
+    header = (tmp_path / 'out' / 'user.h').read_text()
+    assert 'using Id = bool;' in header
+
+def test_run_watch(tmp_path):
+    schemas = tmp_path / 'schemas'
+    schema_path = schemas / 'nested' / 'user.yaml'
+    schema_path.parent.mkdir(parents=True)
+    schema_path.write_text(SCHEMA)
+    output_dir = tmp_path / 'out'
+    watcher = PollingWatcher([str(schemas)], debounce=0.05,
+                             poll_interval=0.01)
+
+    thread = write_later(schema_path, SCHEMA.replace('Flag', 'Enabled'))
+    run_watch([str(schemas)], str(output_dir), watcher=watcher,
+              max_cycles=1)
+    thread.join()
+
+    # the sources are mirrored under the output directory
+    header = (output_dir / 'nested' / 'user.h').read_text()
+    assert 'using Enabled = bool;' in header
@@ -0,0 +1,162 @@
+import pytest
+import yaml
+from yaml.constructor import ConstructorError
+
+import codegen.yaml_loader as yaml_loader
+from codegen.parser.utils import ParsingError
+
+
+@pytest.fixture(params=[True, False], ids=['libyaml', 'python'])
+def use_libyaml(request):
+    return request.param
+
+
+def write_yaml(tmp_path, text: str) -> str:
+    path = tmp_path / 'schema.yaml'
+    path.write_text(text)
+    return str(path)
+
+
+def test_load(tmp_path, use_libyaml: bool):
+    path = write_yaml(
+        tmp_path,
+        'definitions:\n'
+        '  Item:\n'
+        '    type: object\n'
+        '    properties:\n'
+        '      key: "#Other"\n',
+    )
+    document = yaml_loader.load(path, use_libyaml=use_libyaml)
+    assert document == {
+        'definitions': {
+            'Item': {'type': 'object', 'properties': {'key': '#Other'}},
+        },
+    }
+
+
+def test_load_duplicate_key(tmp_path, use_libyaml: bool):
+    path = write_yaml(
+        tmp_path,
+        'definitions:\n'
+        '  Item:\n'
+        '    type: int\n'
+        '  Item:\n'
+        '    type: bool\n',
+    )
+    with pytest.raises(ConstructorError) as error:
+        yaml_loader.load(path, use_libyaml=use_libyaml)
+    assert 'found duplicate key (Item)' in str(error.value)
+    assert error.value.problem_mark.line == 3
+    assert error.value.problem_mark.column == 2
+
+
+def test_load_merge_key_override(tmp_path, use_libyaml: bool):
+    path = write_yaml(
+        tmp_path,
+        'base: &base\n'
+        '  type: int\n'
+        '  format: int32\n'
+        'definitions:\n'
+        '  Item:\n'
+        '    <<: *base\n'
+        '    format: int64\n',
+    )
+    document = yaml_loader.load(path, use_libyaml=use_libyaml)
+    assert document['definitions']['Item'] == {
+        'type': 'int', 'format': 'int64',
+    }
+
+
+def test_load_unhashable_key(tmp_path, use_libyaml: bool):
+    path = write_yaml(tmp_path, '? [a, b]\n: value\n')
+    with pytest.raises(ConstructorError):
+        yaml_loader.load(path, use_libyaml=use_libyaml)
+
+
+def test_loader_backend():
+    if yaml.__with_libyaml__:
+        assert yaml_loader.HAS_LIBYAML
+        assert issubclass(yaml_loader.Loader, yaml.CSafeLoader)
+    assert issubclass(yaml_loader.PyLoader, yaml.SafeLoader)
+
+
+def test_iter_definitions(tmp_path, use_libyaml: bool):
+    path = write_yaml(
+        tmp_path,
+        'base: &base\n'
+        '  type: int\n'
+        'definitions:\n'
+        '  First: *base\n'
+        '  Second:\n'
+        '    type: array\n'
+        '    items: "#First"\n'
+        '---\n'
+        'definitions:\n'
+        '  Third:\n'
+        '    type: bool\n',
+    )
+    definitions = yaml_loader.iter_definitions(path, use_libyaml=use_libyaml)
+    assert list(definitions) == [
+        ('First', {'type': 'int'}, 4, 3),
+        ('Second', {'type': 'array', 'items': '#First'}, 5, 3),
+        ('Third', {'type': 'bool'}, 10, 3),
+    ]
+
+
+def test_iter_definitions_is_lazy(tmp_path, use_libyaml: bool):
+    path = write_yaml(
+        tmp_path,
+        'definitions:\n'
+        '  First:\n'
+        '    type: int\n'
+        '  Second: [\n',
+    )
+    definitions = yaml_loader.iter_definitions(path, use_libyaml=use_libyaml)
+    assert next(definitions) == ('First', {'type': 'int'}, 2, 3)
+    with pytest.raises(yaml.YAMLError):
+        next(definitions)
+
+
+def test_iter_definitions_closes_file(tmp_path, monkeypatch):
+    path = write_yaml(tmp_path, 'definitions:\n  Item:\n    type: int\n')
+    opened_files = []
+    original_open = open
+
+    def tracking_open(*args, **kwargs):
+        file = original_open(*args, **kwargs)
+        opened_files.append(file)
+        return file
+
+    monkeypatch.setattr('builtins.open', tracking_open)
+    definitions = yaml_loader.iter_definitions(path)
+    next(definitions)
+    assert not opened_files[0].closed
+    definitions.close()
+    assert opened_files[0].closed
+
+
+@pytest.mark.parametrize(
+    "text,expected_error",
+    [
+        ('', RuntimeError),
+        ('other: 1\n', ParsingError),
+        ('- item\n', ParsingError),
+        ('definitions: 1\n', ParsingError),
+        ('definitions:\n  A: {type: int}\n  A: {type: int}\n',
+         ConstructorError),
+        ('definitions: {}\ndefinitions: {}\n', ConstructorError),
+    ],
+    ids=[
+        'empty', 'no definitions', 'not a mapping', 'bad definitions',
+        'duplicate definition', 'duplicate block'
+    ]
+)
+def test_iter_definitions_errors(
+    tmp_path,
+    use_libyaml: bool,
+    text: str,
+    expected_error,
+):
+    path = write_yaml(tmp_path, text)
+    with pytest.raises(expected_error):
+        list(yaml_loader.iter_definitions(path, use_libyaml=use_libyaml))